@@ -11,13 +11,31 @@ import sys
 import json
 import yaml
 import logging
-import shutil
+import hashlib
+import io
+import time
+import cProfile
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterator, Union, Callable
 from collections import defaultdict
-import uuid
-import re
+from concurrent.futures import ProcessPoolExecutor
+
+from keyinventory import InventorySnapshot, safe_load
+from keyinventory.assets import BROTLI_AVAILABLE, publish_assets
+from keyinventory.backups import DEFAULT_BACKUP_DIR, BackupStore, RetentionPolicy
+from keyinventory.changes import last_commit
+from keyinventory.index import DEFAULT_INDEX_FILE, IndexEntry, index_entry, write_index_database
+from keyinventory.output import RecordSpool, atomic_write, render_json, write_keys_document
+from keyinventory.profiling import DEFAULT_TOP_FILES, BuildProfiler
+from keyinventory.schema import ValidationError, compile_schema
+from keyinventory.search import DEFAULT_SEARCH_INDEX, SearchIndex, search_text, trigrams, write_search_index
+from keyinventory.serializer import BACKENDS as JSON_BACKENDS, dumps, get_backend as json_backend, set_backend as set_json_backend
+from keyinventory.shards import DEFAULT_PAGE_SIZE, MANIFEST_FILE, write_shards
+from keyinventory.statistics import StatisticsEngine
+from keyinventory.table import KeyTable
+from keyinventory.watch import InventoryWatcher
 
 
 # Configure logging
@@ -28,10 +46,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bump VALIDATOR_VERSION whenever validation or normalization rules change so
+# that cached build results are discarded.
+SCHEMA_VERSION = "2.0"
+VALIDATOR_VERSION = 3
 
-class ValidationError(Exception):
-    """Custom validation error."""
-    pass
+# Files parsed per window; parse results of one window are held at a time
+PARSE_WINDOW = 2048
 
 
 class BuildStatistics:
@@ -55,308 +76,270 @@ class BuildStatistics:
         self.compliance_status_counts = defaultdict(int)
         self.enhanced_schema_count = 0
         self.legacy_schema_count = 0
+        # Build cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Cross-tabs such as environment x risk, keyed "<row>_by_<column>"
+        self.cross_tabs = {}
+        # Accepted keys, stored column by column for the counts above
+        self.keys = KeyTable()
+    
+    def tally(self):
+        """Recompute the per-category counts from the accepted keys."""
+        keys = self.keys
+        statistics = STATISTICS_ENGINE.from_table(keys)
+        counts = statistics.counts
+        self.environment_counts = defaultdict(int, counts['environment'])
+        self.compliance_counts = defaultdict(int, counts['nist_classification'])
+        self.key_type_counts = defaultdict(int, counts['key_type'])
+        self.key_store_counts = defaultdict(int, counts['key_store_type'])
+        self.lifecycle_status_counts = defaultdict(int, counts['status'])
+        self.risk_assessment_counts = defaultdict(int, counts['risk'])
+        self.compliance_status_counts = defaultdict(int, counts['compliance_status'])
+        self.enhanced_schema_count = keys.enhanced_count()
+        self.cross_tabs = statistics.crosstabs_dict()
+        self.legacy_schema_count = len(keys) - self.enhanced_schema_count
 
 
-def validate_uuid(value: str) -> bool:
-    """Validate UUID format."""
-    try:
-        uuid.UUID(value)
-        return True
-    except ValueError:
-        return False
+# Compiled once from the schema table shared with validate-key-creation.py
+KEY_VALIDATOR = compile_schema()
+# Group-by counts and cross-tabs published in metadata.statistics
+STATISTICS_ENGINE = StatisticsEngine.for_keys()
 
 
-def validate_email(value: str) -> bool:
-    """Basic email validation - relaxed for internal domains."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+$'
-    return re.match(pattern, value) is not None
+def validate_enhanced_key_schema(data: Dict[str, Any], filename: str) -> Dict[str, Any]:
+    """Validate key data against enhanced schema v2.0."""
+    return KEY_VALIDATOR.validate(data)
 
 
-def validate_datetime_iso(value: str) -> bool:
-    """Validate ISO 8601 datetime format."""
-    try:
-        datetime.fromisoformat(value.replace('Z', '+00:00'))
-        return True
-    except ValueError:
-        return False
+# Keep backward compatibility with old function name
+def validate_key_schema(data: Dict[str, Any], filename: str) -> Dict[str, Any]:
+    """Backward compatibility wrapper for enhanced schema validation."""
+    return validate_enhanced_key_schema(data, filename)
 
 
-def normalize_tags(tags: List[str]) -> List[str]:
-    """Normalize and validate tags."""
-    if not isinstance(tags, list):
-        raise ValidationError("tags must be a list")
-    
-    normalized = []
-    for tag in tags:
-        if not isinstance(tag, str):
-            raise ValidationError(f"Tag must be a string, got {type(tag)}")
-        
-        if not re.match(r'^[a-zA-Z0-9\-_]+$', tag):
-            raise ValidationError(f"Tag '{tag}' contains invalid characters")
-        
-        normalized.append(tag.lower())
-    
-    if len(normalized) != len(set(normalized)):
-        raise ValidationError("Duplicate tags are not allowed")
-    
-    return normalized
+# (document, key_data, error): the document as parsed from YAML, the validated
+# and normalized record (None if invalid) and the error message (None if valid)
+ParseResult = Tuple[Any, Optional[Dict[str, Any]], Optional[str]]
 
+YAML_ERROR_PREFIX = "YAML parsing error - "
+UNEXPECTED_ERROR_PREFIX = "Unexpected error - "
 
-def validate_enhanced_key_schema(data: Dict[str, Any], filename: str) -> Dict[str, Any]:
-    """Validate key data against enhanced schema v2.0."""
-    errors = []
-    
-    # Required fields for enhanced schema
-    required_fields = ['key_id', 'alias', 'environment', 'owner', 'purpose', 
-                      'created_at', 'rotation_interval_days', 'location', 'compliance', 'tags']
-    
-    for field in required_fields:
-        if field not in data:
-            errors.append(f"Missing required field: {field}")
-    
-    if errors:
-        raise ValidationError("; ".join(errors))
-    
-    # Validate key_id
-    if not validate_uuid(data['key_id']):
-        errors.append("key_id must be a valid UUID")
-    
-    # Validate alias
-    if not re.match(r'^[a-zA-Z0-9\-_]+$', data['alias']):
-        errors.append("alias can only contain alphanumeric characters, dashes, and underscores")
-    
-    # Validate environment (enhanced list)
-    valid_envs = ['dev', 'stage', 'staging', 'prod', 'production']
-    if data['environment'] not in valid_envs:
-        errors.append(f"environment must be one of: {', '.join(valid_envs)}")
-    
-    # Validate owner email
-    if not validate_email(data['owner']):
-        errors.append("owner must be a valid email address")
-    
-    # Validate created_at
-    if not validate_datetime_iso(data['created_at']):
-        errors.append("created_at must be a valid ISO 8601 datetime")
+
+def parse_key_file(file_path: Path) -> ParseResult:
+    """Load and validate a single YAML file without touching builder state.
     
-    # Validate rotation_interval_days
+    Returns ``(document, key_data, None)`` on success or
+    ``(document, None, error)`` on failure. Kept at module level so it can be
+    dispatched to worker processes.
+    """
     try:
-        rotation_days = int(data['rotation_interval_days'])
-        if rotation_days <= 0 or rotation_days > 3650:
-            errors.append("rotation_interval_days must be between 1 and 3650")
-    except (ValueError, TypeError):
-        errors.append("rotation_interval_days must be an integer")
-    
-    # Validate compliance (enhanced)
-    if not isinstance(data['compliance'], dict):
-        errors.append("compliance must be an object")
-    else:
-        # Required compliance fields
-        if 'pci_scope' not in data['compliance']:
-            errors.append("compliance.pci_scope is required")
-        elif data['compliance']['pci_scope'] not in ['none', 'cardholder-data', 'out-of-scope']:
-            errors.append("compliance.pci_scope must be 'none', 'cardholder-data', or 'out-of-scope'")
-        
-        if 'nist_classification' not in data['compliance']:
-            errors.append("compliance.nist_classification is required")
-        elif data['compliance']['nist_classification'] not in ['internal', 'confidential', 'secret', 'top-secret']:
-            errors.append("compliance.nist_classification must be 'internal', 'confidential', 'secret', or 'top-secret'")
-        
-        # Optional compliance fields validation
-        if 'retention_period_days' in data['compliance']:
-            try:
-                retention_days = int(data['compliance']['retention_period_days'])
-                if retention_days <= 0:
-                    errors.append("compliance.retention_period_days must be positive")
-            except (ValueError, TypeError):
-                errors.append("compliance.retention_period_days must be an integer")
-    
-    # Validate enhanced optional sections
-    if 'lifecycle' in data:
-        lifecycle_errors = validate_lifecycle_section(data['lifecycle'])
-        errors.extend(lifecycle_errors)
-    
-    if 'technical' in data:
-        technical_errors = validate_technical_section(data['technical'])
-        errors.extend(technical_errors)
-    
-    if 'relationships' in data:
-        relationship_errors = validate_relationships_section(data['relationships'])
-        errors.extend(relationship_errors)
-    
-    if 'operational' in data:
-        operational_errors = validate_operational_section(data['operational'])
-        errors.extend(operational_errors)
-    
-    if 'audit' in data:
-        audit_errors = validate_audit_section(data['audit'])
-        errors.extend(audit_errors)
-    
-    if 'metadata' in data:
-        metadata_errors = validate_metadata_section(data['metadata'])
-        errors.extend(metadata_errors)
-    
-    # Validate and normalize tags
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return _parse_key_stream(f, file_path)
+    except Exception as e:
+        return None, None, f"{UNEXPECTED_ERROR_PREFIX}{e}"
+
+
+def parse_key_content(content: bytes, file_path: Path) -> ParseResult:
+    """Same as parse_key_file() for file content that has already been read."""
+    return _parse_key_stream(_content_stream(content, file_path), file_path)
+
+
+def created_at_key(key_data: Dict[str, Any]) -> Any:
+    """Sort key of the generated keys list (newest first, with reverse=True)."""
+    return key_data['created_at']
+
+
+def _content_stream(content: bytes, file_path: Path) -> io.TextIOWrapper:
+    buffer = io.BytesIO(content)
+    buffer.name = str(file_path)  # Keeps YAML error marks identical to parse_key_file
+    return io.TextIOWrapper(buffer, encoding='utf-8')
+
+
+def _load_key_stream(stream) -> Tuple[Any, Optional[str]]:
+    """Parse an open YAML stream, returning ``(document, error)``."""
     try:
-        data['tags'] = normalize_tags(data['tags'])
-    except ValidationError as e:
-        errors.append(str(e))
-    
-    if errors:
-        raise ValidationError("; ".join(errors))
-    
-    # Normalize data (don't lowercase alias to preserve readability)
-    data['owner'] = data['owner'].lower()
-    data['environment'] = data['environment'].lower()
-    
-    return data
+        return safe_load(stream), None
+    except yaml.YAMLError as e:
+        return None, f"{YAML_ERROR_PREFIX}{e}"
+    except Exception as e:
+        return None, f"{UNEXPECTED_ERROR_PREFIX}{e}"
 
 
-def validate_lifecycle_section(lifecycle: Dict[str, Any]) -> List[str]:
-    """Validate lifecycle section of enhanced schema."""
-    errors = []
-    
-    if 'status' in lifecycle:
-        valid_statuses = ['active', 'deprecated', 'revoked', 'emergency-replaced']
-        if lifecycle['status'] not in valid_statuses:
-            errors.append(f"lifecycle.status must be one of: {', '.join(valid_statuses)}")
-    
-    # Validate GitHub usernames
-    username_fields = ['created_by', 'approved_by']
-    for field in username_fields:
-        if field in lifecycle:
-            if not re.match(r'^[a-zA-Z0-9\-_.]+$', lifecycle[field]):
-                errors.append(f"lifecycle.{field} must be a valid GitHub username")
-    
-    # Validate datetime fields
-    datetime_fields = ['approved_at', 'last_rotated_at', 'next_rotation_due']
-    for field in datetime_fields:
-        if field in lifecycle:
-            if not validate_datetime_iso(lifecycle[field]):
-                errors.append(f"lifecycle.{field} must be a valid ISO 8601 datetime")
-    
-    # Validate rotation_count
-    if 'rotation_count' in lifecycle:
-        try:
-            count = int(lifecycle['rotation_count'])
-            if count < 0:
-                errors.append("lifecycle.rotation_count must be non-negative")
-        except (ValueError, TypeError):
-            errors.append("lifecycle.rotation_count must be an integer")
-    
-    # Validate emergency_contact
-    if 'emergency_contact' in lifecycle:
-        if not validate_email(lifecycle['emergency_contact']):
-            errors.append("lifecycle.emergency_contact must be a valid email address")
-    
-    return errors
+def _parse_key_stream(stream, file_path: Path) -> ParseResult:
+    """Parse and validate an open YAML stream."""
+    raw_data, error = _load_key_stream(stream)
+    if error is not None:
+        return None, None, error
+    return _validate_document(raw_data, file_path)
 
 
-def validate_technical_section(technical: Dict[str, Any]) -> List[str]:
-    """Validate technical section of enhanced schema."""
-    errors = []
-    
-    if 'key_type' in technical:
-        valid_types = ['rsa', 'ec', 'symmetric', 'api-key', 'jwt']
-        if technical['key_type'] not in valid_types:
-            errors.append(f"technical.key_type must be one of: {', '.join(valid_types)}")
-    
-    if 'key_size' in technical:
-        try:
-            size = int(technical['key_size'])
-            if size <= 0:
-                errors.append("technical.key_size must be positive")
-        except (ValueError, TypeError):
-            errors.append("technical.key_size must be an integer")
-    
-    if 'key_store_type' in technical:
-        valid_stores = ['aws-kms', 'azure-kv', 'hashicorp-vault', 'custom']
-        if technical['key_store_type'] not in valid_stores:
-            errors.append(f"technical.key_store_type must be one of: {', '.join(valid_stores)}")
-    
-    return errors
-
-
-def validate_relationships_section(relationships: Dict[str, Any]) -> List[str]:
-    """Validate relationships section of enhanced schema."""
-    errors = []
-    
-    # Validate array fields
-    array_fields = ['depends_on', 'used_by', 'related_keys', 'environments']
-    for field in array_fields:
-        if field in relationships:
-            if not isinstance(relationships[field], list):
-                errors.append(f"relationships.{field} must be an array")
-            else:
-                for item in relationships[field]:
-                    if not isinstance(item, str):
-                        errors.append(f"All items in relationships.{field} must be strings")
+def _validate_document(raw_data: Any, file_path: Path) -> ParseResult:
+    """Validate a parsed YAML document."""
+    try:
+        if not raw_data:
+            return raw_data, None, "File is empty"
+        
+        # Validate a shallow copy so normalization does not alter the parsed document
+        data = dict(raw_data) if isinstance(raw_data, dict) else raw_data
+        return raw_data, validate_key_schema(data, file_path.name), None
     
-    return errors
+    except ValidationError as e:
+        return raw_data, None, f"Validation error - {e}"
+    except Exception as e:
+        return raw_data, None, f"{UNEXPECTED_ERROR_PREFIX}{e}"
 
 
-def validate_operational_section(operational: Dict[str, Any]) -> List[str]:
-    """Validate operational section of enhanced schema."""
-    errors = []
+def _load_error_from(document: Any, error: Optional[str]) -> Optional[Exception]:
+    """Turn a parse-stage error message back into the exception a loader would see.
     
-    # Validate boolean fields
-    boolean_fields = ['monitoring_enabled', 'alerting_enabled', 'auto_rotation_enabled', 'emergency_revocation_enabled']
-    for field in boolean_fields:
-        if field in operational:
-            if not isinstance(operational[field], bool):
-                errors.append(f"operational.{field} must be a boolean")
-    
-    return errors
+    Validation errors and empty files are not load errors: the document was
+    read successfully and is kept in the snapshot as-is.
+    """
+    if document is not None or not error:
+        return None
+    if error.startswith(YAML_ERROR_PREFIX):
+        return yaml.YAMLError(error[len(YAML_ERROR_PREFIX):])
+    if error.startswith(UNEXPECTED_ERROR_PREFIX):
+        return Exception(error[len(UNEXPECTED_ERROR_PREFIX):])
+    return None
 
 
-def validate_audit_section(audit: Dict[str, Any]) -> List[str]:
-    """Validate audit section of enhanced schema."""
-    errors = []
+class BuildCache:
+    """Persistent cache of per-file parse and validation results.
     
-    # Validate boolean fields
-    boolean_fields = ['access_logs_enabled', 'usage_tracking_enabled', 'compliance_scan_enabled']
-    for field in boolean_fields:
-        if field in audit:
-            if not isinstance(audit[field], bool):
-                errors.append(f"audit.{field} must be a boolean")
+    Entries are keyed by file path and reused only when the SHA-256 of the file
+    content still matches, so unchanged files are never re-parsed. The cache
+    stores the parsed document and the validated, normalized record (or the
+    error) for each file; the statistics contribution is derived from that
+    record when it is registered. A change of SCHEMA_VERSION or
+    VALIDATOR_VERSION discards the whole cache.
+    """
     
-    # Validate datetime fields
-    if 'last_compliance_check' in audit:
-        if not validate_datetime_iso(audit['last_compliance_check']):
-            errors.append("audit.last_compliance_check must be a valid ISO 8601 datetime")
+    CACHE_FILE = "build-cache.json"
+    FORMAT_VERSION = 2
     
-    # Validate compliance_status
-    if 'compliance_status' in audit:
-        valid_statuses = ['compliant', 'non-compliant', 'needs-review']
-        if audit['compliance_status'] not in valid_statuses:
-            errors.append(f"audit.compliance_status must be one of: {', '.join(valid_statuses)}")
+    def __init__(self, cache_dir: str):
+        self.cache_path = Path(cache_dir) / self.CACHE_FILE
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.used: Dict[str, Dict[str, Any]] = {}
+        self.load()
     
-    return errors
-
-
-def validate_metadata_section(metadata: Dict[str, Any]) -> List[str]:
-    """Validate metadata section of enhanced schema."""
-    errors = []
+    @staticmethod
+    def digest(content: bytes) -> str:
+        """Return the content hash used as cache key."""
+        return hashlib.sha256(content).hexdigest()
     
-    if 'risk_assessment' in metadata:
-        valid_risks = ['low', 'medium', 'high', 'critical']
-        if metadata['risk_assessment'] not in valid_risks:
-            errors.append(f"metadata.risk_assessment must be one of: {', '.join(valid_risks)}")
+    def load(self):
+        """Load cache entries from disk, ignoring missing or outdated caches."""
+        if not self.cache_path.exists():
+            return
+        
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable build cache {self.cache_path}: {e}")
+            return
+        
+        if (data.get('format_version') != self.FORMAT_VERSION or
+                data.get('schema_version') != SCHEMA_VERSION or
+                data.get('validator_version') != VALIDATOR_VERSION):
+            logger.info("Schema or validator version changed, discarding build cache")
+            return
+        
+        self.entries = data.get('entries', {})
     
-    return errors
-
-
-# Keep backward compatibility with old function name
-def validate_key_schema(data: Dict[str, Any], filename: str) -> Dict[str, Any]:
-    """Backward compatibility wrapper for enhanced schema validation."""
-    return validate_enhanced_key_schema(data, filename)
+    def lookup(self, file_path: Path, digest: str) -> Optional[ParseResult]:
+        """Return the cached ``(document, key_data, error)`` for a file, or None on a miss."""
+        entry = self.entries.get(str(file_path))
+        if entry is None or entry.get('sha256') != digest:
+            return None
+        
+        self.used[str(file_path)] = entry
+        return entry.get('document'), entry.get('key_data'), entry.get('error')
+    
+    def store(self, file_path: Path, digest: str, document: Any,
+              key_data: Optional[Dict[str, Any]], error: Optional[str]):
+        """Record the result for a freshly parsed file.
+        
+        Results that would not survive a JSON round trip unchanged (e.g. YAML
+        timestamps parsed as datetime) are not cached, so a cache hit always
+        returns exactly what parsing would.
+        """
+        result = [document, key_data]
+        try:
+            if json.loads(json.dumps(result, ensure_ascii=False)) != result:
+                return
+        except (TypeError, ValueError):
+            return
+        
+        self.used[str(file_path)] = {
+            "sha256": digest,
+            "document": document,
+            "key_data": key_data,
+            "error": error
+        }
+    
+    def save(self) -> bool:
+        """Persist the entries used in this build, dropping files that no longer exist."""
+        data = {
+            "format_version": self.FORMAT_VERSION,
+            "schema_version": SCHEMA_VERSION,
+            "validator_version": VALIDATOR_VERSION,
+            "entries": self.used
+        }
+        
+        try:
+            with atomic_write(self.cache_path) as f:
+                f.write(dumps(data))
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write build cache: {e}")
+            return False
 
 
 class KeyInventoryBuilder:
     """Enhanced key inventory builder with validation."""
     
-    def __init__(self, input_dir: str = "inventory", output_file: str = "docs/keys.json"):
+    def __init__(self, input_dir: str = "inventory", output_file: str = "docs/keys.json",
+                 cache_dir: Optional[str] = None, pack_file: Optional[str] = None,
+                 stream_output: bool = False, shard_dir: Optional[str] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, search_index_file: Optional[str] = None,
+                 assets_dir: Optional[str] = None, minify_assets: bool = False,
+                 backup_dir: str = DEFAULT_BACKUP_DIR,
+                 retention: Optional[RetentionPolicy] = None, profile_file: Optional[str] = None,
+                 profile_top: int = DEFAULT_TOP_FILES, profile_allocations: bool = True,
+                 pstats_file: Optional[str] = None, key_index_file: Optional[str] = None):
         self.input_dir = Path(input_dir)
         self.output_file = Path(output_file)
+        self.cache = BuildCache(cache_dir) if cache_dir else None
+        self.pack_file = Path(pack_file) if pack_file else None
+        self.pack_snapshot = InventorySnapshot(input_dir)
+        # SQLite key_id/alias index the PR duplicate checks query instead of parsing the inventory
+        self.key_index_file = Path(key_index_file) if key_index_file else None
+        self.index_entries: List[IndexEntry] = []
+        # Spool validated records to disk instead of holding them in memory
+        self.stream_output = stream_output
+        self.shard_dir = Path(shard_dir) if shard_dir else None
+        self.page_size = page_size
+        self.search_index_file = Path(search_index_file) if search_index_file else None
+        self.assets_dir = Path(assets_dir) if assets_dir else None
+        self.minify_assets = minify_assets
+        # Deduplicated generations of previous outputs
+        self.backup_dir = Path(backup_dir)
+        self.retention = retention or RetentionPolicy()
+        # Timing report of each build (and cProfile statistics) when profiling
+        self.profile_file = Path(profile_file) if profile_file else None
+        self.profile_top = profile_top
+        self.profile_allocations = profile_allocations
+        self.pstats_file = Path(pstats_file) if pstats_file else None
+        self.profiler = BuildProfiler(profile_top, profile_allocations) if self.profile_file else None
+        # Generated JSON files, published as hashed assets when assets_dir is set
+        self.generated_files: List[Path] = []
+        # Parse results and per-record derived values kept in memory between rebuilds in watch mode
+        self.parsed: Optional[Dict[Path, ParseResult]] = None
+        self.derived: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
         self.stats = BuildStatistics()
         self.seen_key_ids: Set[str] = set()
         self.seen_aliases: Set[str] = set()
@@ -375,35 +358,57 @@ class KeyInventoryBuilder:
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
         return True
     
+    def backup_store(self) -> BackupStore:
+        """The backup store for previous outputs."""
+        return BackupStore(self.backup_dir, self.retention)
+    
     def backup_previous_build(self) -> bool:
-        """Create backup of previous build if it exists."""
+        """Create backup of previous build if it exists.
+        
+        The previous output is added to the backup store as a new generation,
+        unless it is unchanged since the latest one; old generations are then
+        pruned by the retention policy.
+        """
         if not self.output_file.exists():
             return True
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = self.output_file.with_suffix(f".{timestamp}.backup")
-        
         try:
-            shutil.copy2(self.output_file, backup_file)
-            logger.info(f"Created backup: {backup_file}")
+            store = self.backup_store()
+            adopted = store.adopt_legacy(self.output_file)
+            if adopted:
+                logger.info(f"Moved {adopted} old backup files into {self.backup_dir}")
+            
+            generation = store.backup(self.output_file)
+            if generation is None:
+                logger.info("Previous build unchanged since the latest backup, skipping backup")
+            else:
+                logger.info(f"Created backup generation {generation['id']} ({generation['stored_by']})")
             return True
         except Exception as e:
             logger.warning(f"Failed to create backup: {e}")
             return False
     
+    def _phase(self, name: str):
+        """Profile the block as phase ``name`` of the build, when profiling."""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+    
     def load_and_validate_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
         """Load and validate a single YAML file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                raw_data = yaml.safe_load(f)
-            
-            if not raw_data:
-                self.stats.errors.append(f"{file_path.name}: File is empty")
-                return None
-            
-            # Validate schema
-            key_data = validate_key_schema(raw_data, file_path.name)
-            
+        _, key_data, error = parse_key_file(file_path)
+        return self.register_key(file_path, key_data, error)
+    
+    def register_key(self, file_path: Path, key_data: Optional[Dict[str, Any]],
+                     error: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Apply duplicate detection and statistics to a parsed key file.
+        
+        This step is order dependent and always runs in the main process so that
+        serial and parallel builds produce identical results.
+        """
+        if error:
+            self.stats.errors.append(f"{file_path.name}: {error}")
+            return None
+        
+        with self._phase('dedupe'):
             # Check for duplicates
             if key_data['key_id'] in self.seen_key_ids:
                 self.stats.errors.append(f"{file_path.name}: Duplicate key_id '{key_data['key_id']}'")
@@ -415,87 +420,234 @@ class KeyInventoryBuilder:
             
             self.seen_key_ids.add(key_data['key_id'])
             self.seen_aliases.add(key_data['alias'])
+        
+        with self._phase('stats'):
+            # Counted column by column once all files are processed (see BuildStatistics.tally)
+            self.stats.keys.append(key_data)
+        
+        return key_data
+    
+    def parse_files(self, yaml_files: List[Path], jobs: int = 1) -> Iterator[Tuple[Path, Any, Optional[Dict[str, Any]], Optional[str]]]:
+        """Parse and validate files, yielding results in input order.
+        
+        Files are handled in windows of PARSE_WINDOW, so only one window of
+        parse results is held at a time. Files whose content matches the build
+        cache are not parsed again. With more than one job the remaining files
+        of each window are fanned out over a process pool in chunks; results
+        are still yielded in the order of ``yaml_files``. When profiling,
+        files are parsed in this process so that each phase can be timed.
+        """
+        if self.profiler is not None and jobs > 1:
+            logger.info("Profiling: parsing files in the main process instead of worker processes")
+            jobs = 1
+        
+        executor = None
+        try:
+            for start in range(0, len(yaml_files), PARSE_WINDOW):
+                window = yaml_files[start:start + PARSE_WINDOW]
+                if executor is None and jobs > 1 and len(window) >= 2:
+                    logger.info(f"Parsing {len(yaml_files)} files with {jobs} worker processes")
+                    executor = ProcessPoolExecutor(max_workers=jobs)
+                
+                results = self._parse_window(window, jobs, executor)
+                if self.parsed is not None:
+                    self.parsed.update(zip(window, results))
+                for file_path, (document, key_data, error) in zip(window, results):
+                    yield file_path, document, key_data, error
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        if self.cache is not None:
+            total = self.stats.cache_hits + self.stats.cache_misses
+            logger.info(f"Build cache: {self.stats.cache_hits}/{total} hits ({self.cache_hit_ratio():.1%})")
+            # Watch mode saves the cache once, when it stops
+            if self.parsed is None:
+                self.cache.save()
+    
+    def _parse_window(self, yaml_files: List[Path], jobs: int,
+                      executor: Optional[ProcessPoolExecutor]) -> List[ParseResult]:
+        """Parse and validate one window of files, returning results in input order."""
+        results: List[Optional[ParseResult]] = [None] * len(yaml_files)
+        pending = []
+        contents = []
+        digests = []
+        
+        for index, file_path in enumerate(yaml_files):
+            if self.parsed is not None and file_path in self.parsed:
+                results[index] = self.parsed[file_path]
+                continue
             
-            # Update enhanced statistics
-            self.stats.environment_counts[key_data['environment']] += 1
-            self.stats.compliance_counts[key_data['compliance']['nist_classification']] += 1
-            
-            # Enhanced schema statistics
-            if any(field in key_data for field in ['lifecycle', 'technical', 'relationships', 'operational', 'audit', 'metadata']):
-                self.stats.enhanced_schema_count += 1
-            else:
-                self.stats.legacy_schema_count += 1
+            if self.cache is None:
+                pending.append(index)
+                continue
             
-            # Technical statistics
-            if 'technical' in key_data:
-                technical = key_data['technical']
-                if 'key_type' in technical:
-                    self.stats.key_type_counts[technical['key_type']] += 1
-                if 'key_store_type' in technical:
-                    self.stats.key_store_counts[technical['key_store_type']] += 1
+            try:
+                with self._phase('read'):
+                    content = file_path.read_bytes()
+            except Exception as e:
+                results[index] = (None, None, f"{UNEXPECTED_ERROR_PREFIX}{e}")
+                continue
             
-            # Lifecycle statistics
-            if 'lifecycle' in key_data:
-                lifecycle = key_data['lifecycle']
-                status = lifecycle.get('status', 'active')
-                self.stats.lifecycle_status_counts[status] += 1
+            with self._phase('cache'):
+                digest = BuildCache.digest(content)
+                cached = self.cache.lookup(file_path, digest)
+            if cached is not None:
+                results[index] = cached
+                self.stats.cache_hits += 1
             else:
-                self.stats.lifecycle_status_counts['active'] += 1  # Default for legacy
-            
-            # Risk assessment statistics
-            if 'metadata' in key_data and 'risk_assessment' in key_data['metadata']:
-                risk = key_data['metadata']['risk_assessment']
-                self.stats.risk_assessment_counts[risk] += 1
-            
-            # Compliance status statistics
-            if 'audit' in key_data and 'compliance_status' in key_data['audit']:
-                status = key_data['audit']['compliance_status']
-                self.stats.compliance_status_counts[status] += 1
-            
-            return key_data
-            
-        except yaml.YAMLError as e:
-            self.stats.errors.append(f"{file_path.name}: YAML parsing error - {e}")
-            return None
-        except ValidationError as e:
-            self.stats.errors.append(f"{file_path.name}: Validation error - {e}")
-            return None
-        except Exception as e:
-            self.stats.errors.append(f"{file_path.name}: Unexpected error - {e}")
-            return None
-    
-    def process_inventory(self) -> List[Dict[str, Any]]:
-        """Process all YAML files in the inventory directory."""
-        valid_keys = []
-        yaml_files = list(self.input_dir.glob("*.yaml")) + list(self.input_dir.glob("*.yml"))
+                pending.append(index)
+                contents.append(content)
+                digests.append(digest)
+                self.stats.cache_misses += 1
         
-        if not yaml_files:
-            logger.warning(f"No YAML files found in {self.input_dir}")
-            return valid_keys
+        pending_files = [yaml_files[index] for index in pending]
+        if self.profiler is not None:
+            parse_args = (self._profile_parse, pending_files) + (() if self.cache is None else (contents,))
+        elif self.cache is None:
+            parse_args = (parse_key_file, pending_files)
+        else:
+            parse_args = (parse_key_content, contents, pending_files)
         
-        self.stats.total_files = len(yaml_files)
-        logger.info(f"Processing {self.stats.total_files} YAML files...")
+        if executor is not None and len(pending) >= 2:
+            parsed = executor.map(*parse_args, chunksize=max(1, len(pending) // (jobs * 4)))
+        else:
+            parsed = map(*parse_args)
+        
+        for position, (index, result) in enumerate(zip(pending, parsed)):
+            logger.debug(f"Processed {yaml_files[index].name}")
+            results[index] = result
+            if self.cache is not None:
+                with self._phase('cache'):
+                    self.cache.store(yaml_files[index], digests[position], *result)
+        
+        return results
+    
+    def _profile_parse(self, file_path: Path, content: Optional[bytes] = None) -> ParseResult:
+        """parse_key_file() (or parse_key_content()) with the read, parse and validate phases timed."""
+        profiler = self.profiler
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        result: Optional[ParseResult] = None
         
-        for file_path in sorted(yaml_files):
-            logger.debug(f"Processing {file_path.name}")
+        if content is None:
+            try:
+                with profiler.phase('read'):
+                    content = file_path.read_bytes()
+            except Exception as e:
+                result = (None, None, f"{UNEXPECTED_ERROR_PREFIX}{e}")
+            timings['read'] = time.perf_counter() - started
+        
+        if result is None:
+            mark = time.perf_counter()
+            with profiler.phase('parse'):
+                document, error = _load_key_stream(_content_stream(content, file_path))
+            timings['parse'] = time.perf_counter() - mark
             
-            key_data = self.load_and_validate_file(file_path)
+            if error is not None:
+                result = (None, None, error)
+            else:
+                mark = time.perf_counter()
+                with profiler.phase('validate'):
+                    result = _validate_document(document, file_path)
+                timings['validate'] = time.perf_counter() - mark
+                if result[1] is not None:
+                    profiler.sample(document)
+        
+        profiler.record_file(file_path.name, time.perf_counter() - started, timings)
+        return result
+    
+    def reset(self):
+        """Clear the per-build state so that the builder can run again."""
+        self.stats = BuildStatistics()
+        self.seen_key_ids = set()
+        self.seen_aliases = set()
+        self.pack_snapshot = InventorySnapshot(self.input_dir)
+        self.index_entries = []
+        self.generated_files = []
+        if self.profiler is not None:
+            self.profiler = BuildProfiler(self.profile_top, self.profile_allocations)
+        if self.parsed is not None:
+            # Drop values derived from records that are no longer parsed
+            live = {id(key_data) for _, key_data, _ in self.parsed.values() if key_data is not None}
+            self.derived = {key: entry for key, entry in self.derived.items() if key in live}
+    
+    def invalidate(self, names: Set[str]):
+        """Forget the in-memory parse results of the named inventory files."""
+        for name in names:
+            file_path = self.input_dir / name
+            if self.parsed is not None:
+                self.parsed.pop(file_path, None)
+            if self.cache is not None:
+                self.cache.used.pop(str(file_path), None)
+    
+    def cache_hit_ratio(self) -> float:
+        """Fraction of files served from the build cache."""
+        total = self.stats.cache_hits + self.stats.cache_misses
+        return self.stats.cache_hits / total if total else 0.0
+    
+    def discover_files(self) -> List[Path]:
+        """Return the inventory files in processing order."""
+        return sorted(list(self.input_dir.glob("*.yaml")) + list(self.input_dir.glob("*.yml")))
+    
+    def accepted_keys(self, yaml_files: List[Path], jobs: int = 1) -> Iterator[Dict[str, Any]]:
+        """Parse, validate and register files, yielding the accepted keys in file order.
+        
+        The statistics are tallied once the last file has been registered.
+        """
+        for file_path, document, key_data, error in self.parse_files(yaml_files, jobs):
+            if self.pack_file:
+                with self._phase('pack'):
+                    self.pack_snapshot.add_document(file_path, document, _load_error_from(document, error))
+            if self.key_index_file:
+                self.index_entries.append(index_entry(file_path.name, document))
+            key_data = self.register_key(file_path, key_data, error)
             if key_data:
-                valid_keys.append(key_data)
                 self.stats.valid_keys += 1
+                yield key_data
             else:
                 self.stats.invalid_keys += 1
         
-        # Sort keys by creation date (newest first)
-        valid_keys.sort(key=lambda x: x['created_at'], reverse=True)
+        with self._phase('stats'):
+            self.stats.tally()
+    
+    def process_inventory(self, jobs: int = 1) -> Union[List[Dict[str, Any]], RecordSpool]:
+        """Process all YAML files in the inventory directory.
+        
+        Files flow through discover_files(), parse_files() and accepted_keys()
+        one window at a time. In streaming mode the accepted keys go straight
+        to a RecordSpool, which sorts them externally and yields them in the
+        same order as the sorted list.
+        """
+        with self._phase('glob'):
+            yaml_files = self.discover_files()
+        
+        if not yaml_files:
+            logger.warning(f"No YAML files found in {self.input_dir}")
+            return RecordSpool(sort_key=created_at_key, reverse=True) if self.stream_output else []
+        
+        self.stats.total_files = len(yaml_files)
+        logger.info(f"Processing {self.stats.total_files} YAML files...")
+        
+        keys = self.accepted_keys(yaml_files, jobs)
         
-        return valid_keys
+        # Sort keys by creation date (newest first); a spool replays in this order
+        if self.stream_output:
+            spool = RecordSpool(sort_key=created_at_key, reverse=True)
+            for key_data in keys:
+                with self._phase('serialize'):
+                    spool.append(key_data)
+            return spool
+        keys = list(keys)
+        with self._phase('sort'):
+            keys.sort(key=created_at_key, reverse=True)
+        return keys
     
     def generate_build_metadata(self) -> Dict[str, Any]:
         """Generate enhanced metadata about the build process."""
         return {
             "build_timestamp": datetime.now().isoformat(),
-            "schema_version": "2.0",
+            "schema_version": SCHEMA_VERSION,
             "total_keys": self.stats.valid_keys,
             "statistics": {
                 "by_environment": dict(self.stats.environment_counts),
@@ -505,6 +657,7 @@ class KeyInventoryBuilder:
                 "by_lifecycle_status": dict(self.stats.lifecycle_status_counts),
                 "by_risk_assessment": dict(self.stats.risk_assessment_counts),
                 "by_compliance_status": dict(self.stats.compliance_status_counts),
+                "cross_tabs": self.stats.cross_tabs,
                 "schema_usage": {
                     "enhanced_schema_v2": self.stats.enhanced_schema_count,
                     "legacy_schema_v1": self.stats.legacy_schema_count
@@ -523,27 +676,128 @@ class KeyInventoryBuilder:
             }
         }
     
-    def write_output(self, keys: List[Dict[str, Any]], include_metadata: bool = False) -> bool:
-        """Write the processed keys to JSON file."""
+    def write_output(self, keys: Union[List[Dict[str, Any]], RecordSpool],
+                     include_metadata: bool = False) -> bool:
+        """Write the processed keys to JSON file.
+        
+        Records are written one at a time through a temporary file that replaces
+        the output only once complete. The bytes are identical to a single
+        ``json.dump(..., indent=2)`` of the whole document.
+        """
         try:
-            output_data = keys
+            metadata = self.generate_build_metadata() if include_metadata else None
             
-            if include_metadata:
-                output_data = {
-                    "metadata": self.generate_build_metadata(),
-                    "keys": keys
-                }
+            if isinstance(keys, RecordSpool):
+                records = keys.rendered()
+            else:
+                records = (self._render(key_data) for key_data in keys)
             
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False, default=str)
+            # Records are rendered as they are written; rendering counts as serialize
+            with self._phase('write'), atomic_write(self.output_file) as f:
+                write_keys_document(f, records, metadata)
+            self.generated_files.append(self.output_file)
             
             logger.info(f"Successfully wrote {len(keys)} keys to {self.output_file}")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to write output file: {e}")
             return False
     
+    def _render(self, key_data: Dict[str, Any]) -> str:
+        with self._phase('serialize'):
+            return self.derive(key_data, 'json', render_json)
+    
+    def derive(self, key_data: Dict[str, Any], kind: str, func: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Return ``func(key_data)``, remembered across watch-mode rebuilds.
+        
+        Unchanged files keep their parsed record objects between rebuilds, so
+        values are keyed by record identity; outside watch mode nothing is kept.
+        """
+        if self.parsed is None:
+            return func(key_data)
+        entry = self.derived.get(id(key_data))
+        if entry is None or entry[0] is not key_data:
+            entry = self.derived[id(key_data)] = (key_data, {})
+        values = entry[1]
+        if kind not in values:
+            values[kind] = func(key_data)
+        return values[kind]
+    
+    def write_shards(self, keys: Union[List[Dict[str, Any]], RecordSpool], include_metadata: bool = False) -> bool:
+        """Write keys as pages and per-environment shards with a manifest.
+        
+        The manifest always carries the statistics the dashboard reads; the
+        build timestamp only with include_metadata, as in docs/keys.json.
+        """
+        try:
+            metadata = self.generate_build_metadata()
+            if not include_metadata:
+                del metadata["build_timestamp"]
+            manifest = write_shards(self.shard_dir, keys, self.page_size, metadata)
+            self.generated_files.append(self.shard_dir / MANIFEST_FILE)
+            self.generated_files.extend(self.shard_dir / page["file"] for page in manifest["pages"])
+            self.generated_files.extend(self.shard_dir / shard["file"] for shard in manifest["environments"].values())
+            logger.info(f"Wrote {len(manifest['pages'])} pages and {len(manifest['environments'])} "
+                        f"environment shards to {self.shard_dir}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write shards: {e}")
+            return False
+    
+    def write_search_index(self, keys: Union[List[Dict[str, Any]], RecordSpool]) -> bool:
+        """Write the trigram search index for the keys, in output order."""
+        try:
+            index = SearchIndex()
+            for key_data in keys:
+                text = self.derive(key_data, 'search_text', search_text)
+                index.add(key_data, text, self.derive(key_data, 'trigrams', lambda _: trigrams(text)))
+            
+            changed = write_search_index(self.search_index_file, index)
+            self.generated_files.append(self.search_index_file)
+            if changed:
+                logger.info(f"Wrote search index for {len(index.texts)} keys to {self.search_index_file}")
+            else:
+                logger.info(f"Search index {self.search_index_file} is up to date")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write search index: {e}")
+            return False
+    
+    def publish_assets(self) -> bool:
+        """Write content-hashed, gzip and brotli copies of the generated files."""
+        try:
+            manifest = publish_assets(self.assets_dir, self.output_file.parent, self.generated_files,
+                                      minify=self.minify_assets)
+            encodings = "gzip and brotli" if BROTLI_AVAILABLE else "gzip (brotli not installed)"
+            logger.info(f"Published {len(manifest['assets'])} hashed assets with {encodings} to {self.assets_dir}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish assets: {e}")
+            return False
+    
+    def write_pack(self, keys: List[Dict[str, Any]]) -> bool:
+        """Write the parsed inventory and validated keys as a binary pack."""
+        try:
+            self.pack_snapshot.write_pack(self.pack_file, list(keys), schema_version=SCHEMA_VERSION,
+                                          inventory_commit=last_commit([str(self.input_dir)]))
+            logger.info(f"Wrote inventory pack to {self.pack_file}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write inventory pack: {e}")
+            return False
+    
+    def write_key_index(self) -> bool:
+        """Write the key_id/alias index database of every parsed inventory file."""
+        try:
+            write_index_database(self.key_index_file, self.index_entries, self.input_dir,
+                                 last_commit([str(self.input_dir)]))
+            logger.info(f"Wrote key index of {len(self.index_entries)} files to {self.key_index_file}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write key index: {e}")
+            return False
+    
     def print_summary(self, verbose: bool = False):
         """Print a summary of the build process."""
         print(f"\n{'='*60}")
@@ -559,6 +813,10 @@ class KeyInventoryBuilder:
         if self.stats.duplicate_keys > 0:
             print(f"⚠ Duplicate keys: {self.stats.duplicate_keys}")
         
+        if self.cache is not None:
+            print(f"✓ Cache hits: {self.stats.cache_hits}/{self.stats.total_files} "
+                  f"({self.cache_hit_ratio():.1%})")
+        
         # Schema usage
         if self.stats.enhanced_schema_count > 0 or self.stats.legacy_schema_count > 0:
             print(f"\nSchema Usage:")
@@ -621,8 +879,55 @@ class KeyInventoryBuilder:
         
         print(f"\n{'='*60}")
     
-    def build(self, backup: bool = True, include_metadata: bool = False, verbose: bool = False) -> bool:
-        """Main build process."""
+    def build(self, backup: bool = True, include_metadata: bool = False, verbose: bool = False,
+              jobs: int = 1, summary: bool = True) -> bool:
+        """Main build process.
+        
+        When profiling, the phases of the build are timed and the timing report
+        is written to profile_file, along with cProfile statistics to
+        pstats_file when it is set.
+        """
+        if self.profiler is None:
+            return self._build(backup, include_metadata, verbose, jobs, summary)
+        
+        profile = cProfile.Profile() if self.pstats_file else None
+        self.profiler.start()
+        try:
+            if profile is not None:
+                profile.enable()
+            return self._build(backup, include_metadata, verbose, jobs, summary)
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.profiler.stop()
+            if profile is not None:
+                self.pstats_file.parent.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(self.pstats_file)
+                logger.info(f"Wrote cProfile statistics to {self.pstats_file}")
+            self.write_profile_report(jobs)
+    
+    def write_profile_report(self, jobs: int = 1) -> bool:
+        """Write the timing report of the last build next to the output."""
+        try:
+            report = self.profiler.write_report(
+                self.profile_file,
+                input_dir=str(self.input_dir),
+                output_file=str(self.output_file),
+                jobs=jobs,
+                json_backend=json_backend(),
+                build_cache=self.cache is not None,
+                stream=self.stream_output,
+                pstats_file=str(self.pstats_file) if self.pstats_file else None
+            )
+            slowest = sorted(report["phases"].items(), key=lambda item: -item[1]["seconds"])[:3]
+            logger.info(f"Wrote build profile to {self.profile_file} ({report['total_seconds']:.2f} s; "
+                        + ", ".join(f"{name} {phase['share']:.0%}" for name, phase in slowest) + ")")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write build profile: {e}")
+            return False
+    
+    def _build(self, backup: bool, include_metadata: bool, verbose: bool, jobs: int, summary: bool) -> bool:
         logger.info("Starting enhanced key inventory build...")
         
         # Validate directories
@@ -631,17 +936,50 @@ class KeyInventoryBuilder:
         
         # Backup previous build
         if backup:
-            self.backup_previous_build()
+            with self._phase('backup'):
+                self.backup_previous_build()
         
         # Process inventory
-        valid_keys = self.process_inventory()
+        valid_keys = self.process_inventory(jobs)
         
         # Write output
         if not self.write_output(valid_keys, include_metadata):
             return False
         
+        # Write the paginated shards loaded lazily by the dashboard
+        if self.shard_dir:
+            with self._phase('shards'):
+                if not self.write_shards(valid_keys, include_metadata):
+                    return False
+        
+        # Write the search index used by the dashboard
+        if self.search_index_file:
+            with self._phase('search_index'):
+                if not self.write_search_index(valid_keys):
+                    return False
+        
+        # Publish hashed, precompressed copies of the generated JSON files
+        if self.assets_dir:
+            with self._phase('assets'):
+                if not self.publish_assets():
+                    return False
+        
+        # Write the binary pack used by the scripts to skip YAML parsing
+        if self.pack_file:
+            with self._phase('pack'):
+                self.write_pack(valid_keys)
+        
+        # Write the key index queried by the PR duplicate checks
+        if self.key_index_file:
+            with self._phase('key_index'):
+                self.write_key_index()
+        
+        if isinstance(valid_keys, RecordSpool):
+            valid_keys.close()
+        
         # Print summary
-        self.print_summary(verbose)
+        if summary:
+            self.print_summary(verbose)
         
         # Return success/failure based on whether we have valid keys and no critical errors
         success = self.stats.valid_keys > 0 and self.stats.invalid_keys == 0
@@ -652,6 +990,43 @@ class KeyInventoryBuilder:
             logger.info("Build completed successfully")
         
         return success
+    
+    def watch(self, include_metadata: bool = False, verbose: bool = False, jobs: int = 1,
+              interval: float = 0.5) -> bool:
+        """Build, then rebuild the outputs whenever inventory files change.
+        
+        Parse results are kept in memory, so a rebuild only re-reads and
+        re-validates the touched files; duplicate detection and statistics are
+        re-applied over all files in order, giving the same output as a full
+        build. Runs until interrupted with Ctrl+C.
+        """
+        self.parsed = {}
+        success = self.build(backup=False, include_metadata=include_metadata, verbose=verbose, jobs=jobs)
+        
+        watcher = InventoryWatcher(self.input_dir, interval=interval)
+        logger.info(f"Watching {self.input_dir} for changes ({watcher.backend}), press Ctrl+C to stop")
+        
+        try:
+            for names in watcher.changes():
+                started = time.perf_counter()
+                self.invalidate(names)
+                self.reset()
+                success = self.build(backup=False, include_metadata=include_metadata, verbose=verbose,
+                                     summary=False)
+                elapsed = (time.perf_counter() - started) * 1000
+                
+                logger.info(f"Rebuilt {self.stats.valid_keys} keys after changes to "
+                            f"{', '.join(sorted(names))} in {elapsed:.0f} ms")
+                for error in self.stats.errors:
+                    logger.error(f"  {error}")
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+        finally:
+            watcher.stop()
+            if self.cache is not None:
+                self.cache.save()
+        
+        return success
 
 
 def main():
@@ -665,6 +1040,18 @@ def main():
                       help='Output JSON file path (default: docs/keys.json)')
     parser.add_argument('--no-backup', action='store_true',
                       help='Skip creating backup of previous build')
+    parser.add_argument('--backup-dir', default=DEFAULT_BACKUP_DIR,
+                      help=f'Directory of the deduplicated backup store (default: {DEFAULT_BACKUP_DIR})')
+    parser.add_argument('--keep-last', type=int, default=10,
+                      help='Backup generations always kept (default: 10)')
+    parser.add_argument('--keep-daily', type=int, default=7,
+                      help='Days for which the newest backup generation is kept (default: 7)')
+    parser.add_argument('--keep-weekly', type=int, default=4,
+                      help='Weeks for which the newest backup generation is kept (default: 4)')
+    parser.add_argument('--list-backups', action='store_true',
+                      help='List the backup generations of the output file and exit')
+    parser.add_argument('--restore-backup', nargs='?', const='', default=None, metavar='GENERATION',
+                      help='Restore the output file from a backup generation (default: the latest) and exit')
     parser.add_argument('--include-metadata', action='store_true',
                       help='Include build metadata in output file')
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -673,25 +1060,115 @@ def main():
                       help='Validate files without generating output')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                       default='INFO', help='Set logging level')
+    parser.add_argument('--cache-dir', default='.build-cache',
+                      help='Directory for the incremental build cache (default: .build-cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Parse and validate every file, ignoring the build cache')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                      help='Worker processes for parsing and validation (default: 1, 0 = all CPUs)')
+    parser.add_argument('--json-backend', choices=JSON_BACKENDS, default=None,
+                      help='JSON encoder for the generated files (default: auto, orjson when installed)')
+    parser.add_argument('--pack-file', nargs='?', const='docs/keys.pack', default=None,
+                      help='Also write a binary inventory pack for the scripts (default path: docs/keys.pack)')
+    parser.add_argument('--key-index', nargs='?', const=DEFAULT_INDEX_FILE, default=None,
+                      help=f'Also write the SQLite key index used by the PR checks and scripts/lookup-keys.py '
+                           f'(default path: {DEFAULT_INDEX_FILE})')
+    parser.add_argument('--stream', action='store_true',
+                      help='Spool validated keys to a temporary file instead of keeping them in memory')
+    parser.add_argument('--shard-dir', nargs='?', const='docs/keys', default=None,
+                      help='Also write paginated and per-environment shards for the dashboard (default path: docs/keys)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                      help=f'Keys per shard page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--search-index', nargs='?', const=DEFAULT_SEARCH_INDEX, default=None,
+                      help=f'Also write a trigram search index for the dashboard (default path: {DEFAULT_SEARCH_INDEX})')
+    parser.add_argument('--assets-dir', nargs='?', const='docs/assets', default=None,
+                      help='Publish content-hashed gzip/brotli copies of the generated JSON (default path: docs/assets)')
+    parser.add_argument('--minify', action='store_true',
+                      help='Drop indentation in the published asset copies')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='REPORT',
+                      help='Write a JSON timing report of the build phases (default path: next to the output, '
+                           '<output>.profile.json)')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP_FILES,
+                      help=f'Slowest files listed in the timing report (default: {DEFAULT_TOP_FILES})')
+    parser.add_argument('--profile-no-allocations', action='store_true',
+                      help='Time the phases without tracing allocations (tracemalloc slows parsing down severalfold)')
+    parser.add_argument('--profile-pstats', default=None, metavar='FILE',
+                      help='Also write cProfile statistics of the build to FILE (implies --profile)')
+    parser.add_argument('--watch', action='store_true',
+                      help='Rebuild incrementally whenever files in the input directory change')
+    parser.add_argument('--watch-interval', type=float, default=0.5,
+                      help='Polling interval in seconds when watchdog is not installed (default: 0.5)')
     
     args = parser.parse_args()
     
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
+    profile_file = args.profile
+    if profile_file is None and args.profile_pstats:
+        profile_file = ''
+    if profile_file == '':
+        output_file = Path(args.output_file)
+        profile_file = str(output_file.with_name(f"{output_file.stem}.profile.json"))
+    
     # Configure logging level
     logging.getLogger().setLevel(getattr(logging, args.log_level))
     
+    if args.json_backend:
+        set_json_backend(args.json_backend)
+    
     if args.verbose:
         print("Enhanced Key Inventory Data Builder")
         print(f"Input directory: {args.input_dir}")
         print(f"Output file: {args.output_file}")
+        print(f"JSON encoder: {json_backend()}")
         if args.dry_run:
             print("Running in dry-run mode (no output will be generated)")
     
-    builder = KeyInventoryBuilder(args.input_dir, args.output_file)
+    builder = KeyInventoryBuilder(args.input_dir, args.output_file,
+                                  cache_dir=None if args.no_cache else args.cache_dir,
+                                  pack_file=args.pack_file,
+                                  stream_output=args.stream,
+                                  shard_dir=args.shard_dir,
+                                  page_size=args.page_size,
+                                  search_index_file=args.search_index,
+                                  assets_dir=args.assets_dir,
+                                  minify_assets=args.minify,
+                                  backup_dir=args.backup_dir,
+                                  retention=RetentionPolicy(args.keep_last, args.keep_daily, args.keep_weekly),
+                                  profile_file=profile_file,
+                                  profile_top=args.profile_top,
+                                  profile_allocations=not args.profile_no_allocations,
+                                  pstats_file=args.profile_pstats,
+                                  key_index_file=args.key_index)
     
-    if args.dry_run:
+    if args.list_backups:
+        history = builder.backup_store().history(builder.output_file.name)
+        if not history:
+            print(f"No backups of {builder.output_file.name} in {args.backup_dir}")
+        for generation in history:
+            print(f"{generation['id']}  {generation['created_at']}  {generation['size']:>10} bytes  "
+                  f"sha256:{generation['sha256'][:12]}")
+        sys.exit(0)
+    elif args.restore_backup is not None:
+        generation = builder.backup_store().restore(builder.output_file, args.restore_backup or None)
+        if generation is None:
+            print(f"No backup generation '{args.restore_backup or 'latest'}' of {builder.output_file.name}")
+            sys.exit(1)
+        print(f"Restored {builder.output_file} from backup generation {generation['id']}")
+        sys.exit(0)
+    elif args.watch:
+        # Build once, then rebuild on every change until interrupted
+        success = builder.watch(
+            include_metadata=args.include_metadata,
+            verbose=args.verbose,
+            jobs=jobs,
+            interval=args.watch_interval
+        )
+        sys.exit(0 if success else 1)
+    elif args.dry_run:
         # Just validate, don't write output
         builder.validate_directories()
-        builder.process_inventory()
+        builder.process_inventory(jobs)
         builder.print_summary(args.verbose)
         
         # Exit with error code if validation failed
@@ -701,7 +1178,8 @@ def main():
         success = builder.build(
             backup=not args.no_backup,
             include_metadata=args.include_metadata,
-            verbose=args.verbose
+            verbose=args.verbose,
+            jobs=jobs
         )
         
         # Exit with appropriate code for CI/CD
@@ -0,0 +1,22 @@
+"""
+Key Inventory Library
+
+Shared helpers for build-data.py and the scripts under scripts/.
+"""
+
+from keyinventory.yaml_loader import LIBYAML_AVAILABLE, Loader, check_parity, load_yaml_file, safe_load
+from keyinventory.pack import DEFAULT_PACK_FILE, PackError
+from keyinventory.snapshot import InventorySnapshot, load_snapshot, normalize_path
+
+__all__ = [
+    'DEFAULT_PACK_FILE',
+    'LIBYAML_AVAILABLE',
+    'Loader',
+    'PackError',
+    'InventorySnapshot',
+    'check_parity',
+    'load_snapshot',
+    'load_yaml_file',
+    'normalize_path',
+    'safe_load',
+]
@@ -0,0 +1,114 @@
+"""
+Static Assets
+
+Publishes the generated JSON files (keys.json, shards, search index) as
+content-hashed copies with precompressed gzip and brotli variants, described
+by an asset-manifest.json. Hashed names never change content, so a static
+host can serve them with long-lived cache headers; only the small manifest
+has to be revalidated.
+
+Brotli output requires the optional ``brotli`` package and is skipped when it
+is not installed.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Union
+
+from keyinventory.output import atomic_write
+from keyinventory.serializer import dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PathLike = Union[str, Path]
+
+ASSET_MANIFEST = 'asset-manifest.json'
+FORMAT_VERSION = 1
+HASH_LENGTH = 12
+
+BROTLI_AVAILABLE = brotli is not None
+
+# Files created by publish_assets(): name.<hash>.json plus compressed variants
+HASHED_FILE = re.compile(r'\.[0-9a-f]{%d}\.json(\.gz|\.br)?$' % HASH_LENGTH)
+
+
+def minify_json(data: bytes) -> bytes:
+    """Re-encode a JSON document without insignificant whitespace."""
+    value = json.loads(data.decode('utf-8'))
+    return dumps(value).encode('utf-8')
+
+
+def hashed_name(relative_path: Path, digest: str) -> Path:
+    """Insert a content hash before the suffix: keys.json -> keys.<hash>.json."""
+    return relative_path.with_name(f"{relative_path.stem}.{digest[:HASH_LENGTH]}{relative_path.suffix}")
+
+
+def _write_if_missing(path: Path, data: bytes):
+    # Content-hashed files are immutable: an existing file already has this content
+    if not path.exists():
+        with atomic_write(path, 'wb') as f:
+            f.write(data)
+
+
+def publish_assets(assets_dir: PathLike, root_dir: PathLike, sources: Iterable[PathLike],
+                   minify: bool = False) -> Dict[str, Any]:
+    """Write hashed, precompressed copies of ``sources`` and the asset manifest.
+    
+    Manifest entries are keyed by the source path relative to ``root_dir``
+    (e.g. ``keys/page-0001.json``); file names in entries are relative to
+    ``root_dir`` as well, so the dashboard can fetch them directly. Hashed
+    files no longer referenced by the manifest are removed.
+    """
+    assets_dir = Path(assets_dir).resolve()
+    root_dir = Path(root_dir).resolve()
+    if root_dir not in assets_dir.parents:
+        raise ValueError(f"Assets directory {assets_dir} must be inside {root_dir}")
+    
+    entries = {}
+    written = set()
+    for source in sources:
+        source = Path(source).resolve()
+        relative = source.relative_to(root_dir)
+        data = source.read_bytes()
+        if minify:
+            data = minify_json(data)
+        
+        digest = hashlib.sha256(data).hexdigest()
+        target = assets_dir / hashed_name(relative, digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        
+        variants = {"identity": (target, data)}
+        variants["gzip"] = (target.with_name(target.name + '.gz'), gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            variants["br"] = (target.with_name(target.name + '.br'), brotli.compress(data, quality=11))
+        
+        entry = {"sha256": digest}
+        for encoding, (path, content) in variants.items():
+            _write_if_missing(path, content)
+            written.add(path)
+            entry[encoding] = {
+                "file": path.relative_to(root_dir).as_posix(),
+                "size": len(content)
+            }
+        entries[relative.as_posix()] = entry
+    
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "minified": minify,
+        "assets": dict(sorted(entries.items()))
+    }
+    with atomic_write(assets_dir / ASSET_MANIFEST) as f:
+        f.write(dumps(manifest, indent=True))
+    
+    for path in assets_dir.rglob('*'):
+        if path.is_file() and HASHED_FILE.search(path.name) and path not in written:
+            path.unlink()
+    
+    return manifest
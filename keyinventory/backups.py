@@ -0,0 +1,246 @@
+"""
+Backup Store
+
+Generations of a build output (docs/keys.json), deduplicated by content.
+Each distinct content is stored once under ``objects/<sha256>``; a generation
+is an entry in ``index.json`` pointing at an object. Objects are created by
+hardlinking the output file into the store (build outputs are always
+replaced by a rename, never rewritten in place, so the linked content stays
+as it was), falling back to a reflink and then to a plain copy when the
+store is on another filesystem.
+
+A backup is skipped when the output has the same content as the latest
+generation. Old generations are pruned by a retention policy that keeps the
+last N generations plus the newest generation of each of the last D days
+and W ISO weeks; objects no longer referenced are removed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from keyinventory.output import atomic_write
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_BACKUP_DIR = '.build-backups'
+INDEX_FILE = 'index.json'
+FORMAT_VERSION = 1
+
+# Linux ioctl that shares the extents of another file (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Backups written next to the output by earlier versions: keys.20240101_120000.backup
+LEGACY_BACKUP = re.compile(r'\.(\d{8}_\d{6})\.backup$')
+
+
+def file_digest(path: PathLike) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def link_or_copy(source: PathLike, target: PathLike) -> str:
+    """Make ``target`` a hardlink, reflink or copy of ``source``; return which one."""
+    try:
+        os.link(source, target)
+        return 'hardlink'
+    except OSError:
+        pass
+    
+    if fcntl is not None:
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return 'reflink'
+        except OSError:
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+    
+    shutil.copy2(source, target)
+    return 'copy'
+
+
+class RetentionPolicy:
+    """Which generations to keep: the last N, plus the newest per day and per week."""
+    
+    def __init__(self, last: int = 10, daily: int = 7, weekly: int = 4):
+        self.last = last
+        self.daily = daily
+        self.weekly = weekly
+    
+    def keep(self, generations: List[Dict[str, Any]]) -> Set[str]:
+        """IDs of the generations to keep; ``generations`` are ordered oldest first."""
+        newest_first = list(reversed(generations))
+        keep = {generation['id'] for generation in newest_first[:max(self.last, 1)]}
+        
+        for limit, period in ((self.daily, lambda created: created.date()),
+                              (self.weekly, lambda created: created.isocalendar()[:2])):
+            seen = set()
+            for generation in newest_first:
+                if len(seen) >= limit:
+                    break
+                bucket = period(datetime.fromisoformat(generation['created_at']))
+                if bucket not in seen:
+                    seen.add(bucket)
+                    keep.add(generation['id'])
+        return keep
+
+
+class BackupStore:
+    """Content-addressed generations of build outputs."""
+    
+    def __init__(self, root: PathLike = DEFAULT_BACKUP_DIR, policy: Optional[RetentionPolicy] = None):
+        self.root = Path(root)
+        self.policy = policy or RetentionPolicy()
+        self.generations: List[Dict[str, Any]] = []
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.root / INDEX_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('format_version') == FORMAT_VERSION:
+            self.generations = data.get('generations', [])
+    
+    def _save(self):
+        with atomic_write(self.root / INDEX_FILE) as f:
+            json.dump({"format_version": FORMAT_VERSION, "generations": self.generations}, f, indent=2)
+    
+    def object_path(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / digest
+    
+    def history(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Generations, oldest first, optionally only those of one output file name."""
+        return [generation for generation in self.generations if name is None or generation['name'] == name]
+    
+    def find(self, name: str, generation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A generation of ``name`` by ID (or ID prefix), or the latest one."""
+        history = self.history(name)
+        if generation_id is None:
+            return history[-1] if history else None
+        matches = [generation for generation in history if generation['id'].startswith(generation_id)]
+        return matches[-1] if matches else None
+    
+    def backup(self, path: PathLike, created_at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Record the current content of ``path`` as a new generation.
+        
+        Returns the new generation, or None when the file does not exist or
+        has the same content as the latest generation.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        
+        digest = file_digest(path)
+        latest = self.find(path.name)
+        if latest is not None and latest['sha256'] == digest:
+            return None
+        
+        created_at = created_at or datetime.now()
+        generation = self._add(path, digest, created_at)
+        self.prune(path.name)
+        self._save()
+        return generation
+    
+    def _add(self, path: Path, digest: str, created_at: datetime, name: Optional[str] = None) -> Dict[str, Any]:
+        target = self.object_path(digest)
+        method = 'existing'
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            method = link_or_copy(path, target)
+        
+        generation_id = created_at.strftime('%Y%m%d_%H%M%S')
+        taken = {generation['id'] for generation in self.generations}
+        suffix = 1
+        while generation_id in taken:
+            suffix += 1
+            generation_id = f"{created_at.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+        
+        generation = {
+            "id": generation_id,
+            "name": name or path.name,
+            "created_at": created_at.isoformat(),
+            "sha256": digest,
+            "size": target.stat().st_size,
+            "stored_by": method
+        }
+        self.generations.append(generation)
+        self.generations.sort(key=lambda entry: entry['created_at'])
+        return generation
+    
+    def adopt_legacy(self, path: PathLike) -> int:
+        """Move ``<stem>.<timestamp>.backup`` files next to ``path`` into the store."""
+        path = Path(path)
+        adopted = 0
+        for legacy in sorted(path.parent.glob(f"{path.stem}.*.backup")):
+            match = LEGACY_BACKUP.search(legacy.name)
+            if not match or not legacy.is_file():
+                continue
+            created_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+            digest = file_digest(legacy)
+            if not any(generation['sha256'] == digest for generation in self.history(path.name)):
+                self._add(legacy, digest, created_at, name=path.name)
+            legacy.unlink()
+            adopted += 1
+        if adopted:
+            self.prune(path.name)
+            self._save()
+        return adopted
+    
+    def prune(self, name: str) -> List[Dict[str, Any]]:
+        """Apply the retention policy to the generations of ``name``; return the removed ones."""
+        keep = self.policy.keep(self.history(name))
+        removed = [generation for generation in self.history(name) if generation['id'] not in keep]
+        if not removed:
+            return []
+        
+        self.generations = [generation for generation in self.generations
+                            if generation['name'] != name or generation['id'] in keep]
+        referenced = {generation['sha256'] for generation in self.generations}
+        for generation in removed:
+            if generation['sha256'] not in referenced:
+                try:
+                    self.object_path(generation['sha256']).unlink()
+                except FileNotFoundError:
+                    pass
+                referenced.add(generation['sha256'])
+        return removed
+    
+    def restore(self, path: PathLike, generation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Replace ``path`` with a stored generation (the latest by default).
+        
+        The object is linked into place and renamed over ``path``, so a
+        restore takes constant time whatever the file size.
+        """
+        path = Path(path)
+        generation = self.find(path.name, generation_id)
+        if generation is None:
+            return None
+        
+        source = self.object_path(generation['sha256'])
+        temporary = path.with_name(f".{path.name}.restore")
+        if temporary.exists():
+            temporary.unlink()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(source, temporary)
+        os.replace(temporary, path)
+        return generation
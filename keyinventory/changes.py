@@ -0,0 +1,101 @@
+"""
+Git Change Detection
+
+Computes which inventory files a branch adds, modifies, renames or deletes
+relative to a base revision, from ``git diff --name-status base...head``,
+and the commits the generated indexes describe.
+"""
+
+import subprocess
+from typing import List, Optional, Sequence
+
+
+class GitError(Exception):
+    """Raised when git is unavailable or the diff cannot be computed."""
+    pass
+
+
+class ChangeSet:
+    """Inventory files touched between a base revision and head.
+    
+    ``changed`` holds the current paths of added, modified, copied and renamed
+    files (the files to validate); ``removed`` holds the paths that no longer
+    exist at head: deleted files and the old side of renames. ``base`` is the
+    merge base the changes were computed from, when known.
+    """
+    
+    def __init__(self, changed: Optional[List[str]] = None, removed: Optional[List[str]] = None,
+                 base: Optional[str] = None):
+        self.changed: List[str] = changed or []
+        self.removed: List[str] = removed or []
+        self.base = base
+    
+    def __repr__(self) -> str:
+        return f"ChangeSet(changed={self.changed!r}, removed={self.removed!r}, base={self.base!r})"
+
+
+def _git(*args: str) -> str:
+    """Run a git command and return its output, raising GitError when it fails."""
+    try:
+        result = subprocess.run(['git', *args], capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise GitError(f"git {args[0]} failed: {e.stderr.strip()}")
+    return result.stdout
+
+
+def parse_name_status(output: str) -> ChangeSet:
+    """Parse the NUL-separated output of ``git diff --name-status -z``."""
+    changes = ChangeSet()
+    fields = output.split('\0')
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        kind = status[0]
+        if kind in ('R', 'C'):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if kind == 'R':
+                changes.removed.append(old_path)
+            changes.changed.append(new_path)
+            i += 3
+        else:
+            path = fields[i + 1]
+            if kind == 'D':
+                changes.removed.append(path)
+            else:
+                changes.changed.append(path)
+            i += 2
+    return changes
+
+
+def git_changes(base: str, head: str = 'HEAD', paths: Sequence[str] = ('inventory',),
+                suffixes: Sequence[str] = ('.yaml', '.yml')) -> ChangeSet:
+    """Return the files under ``paths`` changed on head since its merge base with ``base``."""
+    changes = parse_name_status(_git('diff', '--name-status', '-M', '-z', f"{base}...{head}", '--', *paths))
+    changes.changed = [path for path in changes.changed if path.endswith(tuple(suffixes))]
+    changes.removed = [path for path in changes.removed if path.endswith(tuple(suffixes))]
+    try:
+        changes.base = _git('merge-base', base, head).strip() or None
+    except GitError:
+        pass
+    return changes
+
+
+def changed_paths(old: str, new: str, paths: Sequence[str] = ('inventory',)) -> List[str]:
+    """Files under ``paths`` that differ between two revisions."""
+    return [path for path in _git('diff', '--name-only', '-z', old, new, '--', *paths).split('\0') if path]
+
+
+def last_commit(paths: Sequence[str] = ('inventory',)) -> Optional[str]:
+    """The last commit that changed ``paths``.
+    
+    None when git or its history is unavailable, or when ``paths`` have
+    uncommitted changes, as the working tree then matches no commit.
+    """
+    try:
+        if _git('status', '--porcelain', '--', *paths):
+            return None
+        return _git('log', '-1', '--format=%H', '--', *paths).strip() or None
+    except GitError:
+        return None
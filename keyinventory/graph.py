@@ -0,0 +1,234 @@
+"""
+Key Relationship Graph
+
+A directed graph over the relationships sections of the inventory: each key
+ID is a node, ``depends_on`` gives its outgoing edges, ``related_keys`` links
+it both ways and ``used_by`` attaches the services using it. Adjacency and
+reverse adjacency are built once as lists of node numbers, so that
+
+- dependency cycles are found with one iterative Tarjan pass over the
+  strongly connected components, linear in keys plus edges, and
+- the blast radius of a key (every key depending on it, directly or through
+  other keys, and every service using any of them) is one breadth-first
+  walk over the reverse adjacency, touching only the affected part.
+
+Several files claiming the same key ID share one node; references to key IDs
+no file defines are kept as missing references.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from keyinventory.snapshot import InventorySnapshot
+
+
+def _strings(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [item for item in value if isinstance(item, str)]
+
+
+class KeyGraph:
+    """Keys, their dependencies, related keys and consuming services."""
+    
+    def __init__(self):
+        self.key_ids: List[str] = []
+        self.nodes: Dict[str, int] = {}
+        # Node -> details of the (first) file defining it, None for keys only referenced
+        self.keys: List[Optional[Dict[str, Any]]] = []
+        # Node -> nodes it depends on / nodes depending on it / related nodes (both ways)
+        self.depends_on: List[List[int]] = []
+        self.dependents: List[List[int]] = []
+        self.related: List[List[int]] = []
+        # Node -> services using it, and service -> nodes it uses
+        self.services: List[List[str]] = []
+        self.service_keys: Dict[str, List[int]] = {}
+    
+    def _node(self, key_id: str) -> int:
+        node = self.nodes.get(key_id)
+        if node is None:
+            node = self.nodes[key_id] = len(self.key_ids)
+            self.key_ids.append(key_id)
+            self.keys.append(None)
+            self.depends_on.append([])
+            self.dependents.append([])
+            self.related.append([])
+            self.services.append([])
+        return node
+    
+    def add(self, document: Dict[str, Any], file_name: Optional[str] = None):
+        """Add the key defined by one inventory document."""
+        key_id = document.get('key_id')
+        if not isinstance(key_id, str):
+            return
+        node = self._node(key_id)
+        if self.keys[node] is None:
+            lifecycle = document.get('lifecycle')
+            self.keys[node] = {
+                "key_id": key_id,
+                "alias": document.get('alias'),
+                "environment": document.get('environment'),
+                "owner": document.get('owner'),
+                "status": lifecycle.get('status') if isinstance(lifecycle, dict) else None,
+                "file": file_name,
+            }
+        
+        relationships = document.get('relationships')
+        if not isinstance(relationships, dict):
+            return
+        for dependency in _strings(relationships.get('depends_on')):
+            other = self._node(dependency)
+            if other not in self.depends_on[node]:
+                self.depends_on[node].append(other)
+                self.dependents[other].append(node)
+        for related_key in _strings(relationships.get('related_keys')):
+            other = self._node(related_key)
+            if other != node and other not in self.related[node]:
+                self.related[node].append(other)
+                self.related[other].append(node)
+        for service in _strings(relationships.get('used_by')):
+            if service not in self.services[node]:
+                self.services[node].append(service)
+                self.service_keys.setdefault(service, []).append(node)
+    
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[Optional[str], Dict[str, Any]]]) -> 'KeyGraph':
+        """Build the graph from ``(file name, document)`` pairs."""
+        graph = cls()
+        for file_name, document in documents:
+            graph.add(document, file_name)
+        return graph
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: InventorySnapshot) -> 'KeyGraph':
+        """Build the graph from every file of an inventory snapshot."""
+        return cls.from_documents((file_path.name, data) for file_path, data in snapshot.records())
+    
+    def missing_references(self) -> List[Tuple[str, str]]:
+        """``(key ID, referenced key ID)`` for every depends_on or related_keys reference to an undefined key."""
+        missing = []
+        for node, details in enumerate(self.keys):
+            if details is None:
+                continue
+            for other in self.depends_on[node] + self.related[node]:
+                if self.keys[other] is None:
+                    missing.append((self.key_ids[node], self.key_ids[other]))
+        return missing
+    
+    def cycles(self) -> List[List[str]]:
+        """Dependency cycles, as the key IDs of each strongly connected component.
+        
+        A key depending on itself is a cycle of one. Tarjan's algorithm with an
+        explicit stack, so deep dependency chains do not hit the recursion limit.
+        """
+        count = len(self.key_ids)
+        index = [-1] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        components: List[List[str]] = []
+        counter = 0
+        
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            # (node, position of the next dependency to visit)
+            work = [(root, 0)]
+            while work:
+                node, position = work[-1]
+                if position == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                
+                dependencies = self.depends_on[node]
+                descended = False
+                while position < len(dependencies):
+                    other = dependencies[position]
+                    position += 1
+                    if index[other] == -1:
+                        work[-1] = (node, position)
+                        work.append((other, 0))
+                        descended = True
+                        break
+                    if on_stack[other] and index[other] < lowlink[node]:
+                        lowlink[node] = index[other]
+                if descended:
+                    continue
+                
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.depends_on[node]:
+                        components.append(sorted(self.key_ids[member] for member in component))
+        
+        return sorted(components)
+    
+    def blast_radius(self, key_id: str, follow_related: bool = False,
+                     max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Keys and services affected if ``key_id`` is revoked, or None for an unknown key.
+        
+        Affected keys are those depending on it, directly or through other
+        affected keys, with their distance and the key they were reached
+        from; affected services use the key or any affected key. The related
+        keys of all of them are listed without being followed, unless
+        ``follow_related`` is set.
+        """
+        start = self.nodes.get(key_id)
+        if start is None:
+            return None
+        
+        depth = {start: 0}
+        via: Dict[int, int] = {}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if max_depth is not None and depth[node] >= max_depth:
+                continue
+            neighbours = self.dependents[node] + self.related[node] if follow_related else self.dependents[node]
+            for other in neighbours:
+                if other not in depth:
+                    depth[other] = depth[node] + 1
+                    via[other] = node
+                    queue.append(other)
+        
+        services: Dict[str, List[str]] = {}
+        related: Set[int] = set()
+        for node in depth:
+            for service in self.services[node]:
+                services.setdefault(service, []).append(self.key_ids[node])
+            related.update(other for other in self.related[node] if other not in depth)
+        
+        return {
+            "key": self.describe(start),
+            "affected_keys": [dict(self.describe(node), depth=depth[node], via=self.key_ids[via[node]])
+                              for node in sorted(via, key=lambda node: (depth[node], self.key_ids[node]))],
+            "affected_services": [{"service": service, "through": sorted(key_ids)}
+                                  for service, key_ids in sorted(services.items())],
+            "related_keys": [self.describe(node) for node in sorted(related, key=self.key_ids.__getitem__)],
+        }
+    
+    def describe(self, node: int) -> Dict[str, Any]:
+        """Details of a node's key; keys only referenced have just their ID and ``missing``."""
+        return self.keys[node] or {"key_id": self.key_ids[node], "missing": True}
+    
+    def statistics(self) -> Dict[str, int]:
+        """Sizes of the graph."""
+        return {
+            "keys": sum(1 for details in self.keys if details is not None),
+            "referenced_only": sum(1 for details in self.keys if details is None),
+            "dependencies": sum(len(dependencies) for dependencies in self.depends_on),
+            "related_links": sum(len(related) for related in self.related) // 2,
+            "services": len(self.service_keys),
+        }
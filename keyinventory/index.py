@@ -0,0 +1,413 @@
+"""
+Key Index
+
+The set of key IDs and aliases already present in the inventory, used by the
+duplicate checks. It can be built from a full snapshot or, for checks that
+only look at changed files, from what the last main-branch build wrote
+without parsing the inventory: a SQLite key index database, queried one
+value at a time, or the binary pack, whose indexes are loaded whole.
+
+Both record which file each key ID and alias comes from, so the entries of
+files a branch modifies, renames or deletes are left out of the lookups and a
+changed key is never reported as a duplicate of its own base version. Both
+record the commit the inventory was last changed in, and are trusted when git
+shows no inventory change between that commit and the merge base of the
+branch other than the branch's own. Without that history they fall back to
+the size and SHA-256 they record for every file, which the unchanged
+inventory files must still match. The database also keeps the main values of
+each file (FILE_FIELDS), among them the purpose and location used by the
+near-duplicate check (see base_texts()).
+
+For emergency response, the database has two reverse indexes: from each
+consuming service (``relationships.used_by``) to the files of the keys it
+uses, and from each key location to its file, which answers location prefix
+queries such as ``hashicorp://payments-kv`` with a range scan (see
+InventoryLookup).
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from keyinventory.changes import ChangeSet, GitError, changed_paths
+from keyinventory.pack import PackError, file_digest, read_pack
+from keyinventory.snapshot import InventorySnapshot, normalize_path
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_INDEX_FILE = 'docs/keys.index.db'
+INDEX_FORMAT_VERSION = 4
+
+# Values of each file kept in the files table, in column order
+FILE_FIELDS = ('key_id', 'alias', 'environment', 'owner', 'status', 'purpose', 'location')
+
+# (file name, values of FILE_FIELDS, consuming services) of one inventory file; any value may be None
+IndexEntry = Tuple[str, Tuple[Optional[str], ...], Tuple[str, ...]]
+
+# Characters ending a location prefix: a prefix matches at path and ARN boundaries only
+LOCATION_SEPARATORS = ('/', ':')
+
+
+def _string(document: Dict[str, Any], field: str) -> Optional[str]:
+    value = document.get(field)
+    return value if isinstance(value, str) else None
+
+
+def index_entry(file_name: str, document: Any) -> IndexEntry:
+    """The indexed values of a parsed document."""
+    if not isinstance(document, dict):
+        return file_name, (None,) * len(FILE_FIELDS), ()
+    values = [_string(document, field) for field in FILE_FIELDS]
+    # The status is the only value outside the top level
+    lifecycle = document.get('lifecycle')
+    values[FILE_FIELDS.index('status')] = _string(lifecycle, 'status') if isinstance(lifecycle, dict) else None
+    relationships = document.get('relationships')
+    used_by = relationships.get('used_by') if isinstance(relationships, dict) else None
+    services = tuple(service for service in used_by if isinstance(service, str)) if isinstance(used_by, list) else ()
+    return file_name, tuple(values), services
+
+
+def location_prefix(prefix: str) -> str:
+    """A location prefix as matched: without trailing separators (``hashicorp://`` is ``hashicorp``)."""
+    return prefix.strip().rstrip(''.join(LOCATION_SEPARATORS))
+
+
+def location_matches(location: Any, prefix: str) -> bool:
+    """Whether a location is ``prefix`` or starts with it followed by a separator."""
+    if not isinstance(location, str):
+        return False
+    prefix = location_prefix(prefix)
+    return location == prefix or location.startswith(tuple(prefix + separator for separator in LOCATION_SEPARATORS))
+
+
+def _fill_database(connection: sqlite3.Connection, entries: Iterable[IndexEntry], inventory_dir: Path,
+                   commit: Optional[str]):
+    connection.executescript("""
+        CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE files (name TEXT PRIMARY KEY, size INTEGER NOT NULL, sha256 TEXT NOT NULL, %s);
+        CREATE TABLE key_ids (key_id TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (key_id, name)) WITHOUT ROWID;
+        CREATE TABLE aliases (alias TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (alias, name)) WITHOUT ROWID;
+        CREATE TABLE services (service TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (service, name)) WITHOUT ROWID;
+        CREATE TABLE locations (location TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (location, name)) WITHOUT ROWID;
+    """ % ', '.join(f"{field} TEXT" for field in FILE_FIELDS))
+    connection.execute("INSERT INTO meta VALUES ('format_version', ?)", (str(INDEX_FORMAT_VERSION),))
+    if commit is not None:
+        connection.execute("INSERT INTO meta VALUES ('inventory_commit', ?)", (commit,))
+    insert_file = f"INSERT OR REPLACE INTO files VALUES (?, ?, ?{', ?' * len(FILE_FIELDS)})"
+    for name, values, services in entries:
+        file_path = inventory_dir / name
+        connection.execute(insert_file, (name, file_path.stat().st_size, file_digest(file_path), *values))
+        key_id, alias, location = values[0], values[1], values[FILE_FIELDS.index('location')]
+        if key_id is not None:
+            connection.execute("INSERT OR IGNORE INTO key_ids VALUES (?, ?)", (key_id, name))
+        if alias is not None:
+            # Lowercased, as InventorySnapshot indexes aliases
+            connection.execute("INSERT OR IGNORE INTO aliases VALUES (?, ?)", (alias.lower(), name))
+        for service in services:
+            connection.execute("INSERT OR IGNORE INTO services VALUES (?, ?)", (service.lower(), name))
+        if location is not None:
+            connection.execute("INSERT OR IGNORE INTO locations VALUES (?, ?)", (location, name))
+    connection.commit()
+
+
+def write_index_database(path: PathLike, entries: Iterable[IndexEntry], inventory_dir: PathLike,
+                         commit: Optional[str] = None):
+    """Write the key index database of the files in ``entries``.
+    
+    ``commit`` is the commit the inventory was last changed in (see
+    keyinventory.changes.last_commit()), if known. The database is written to
+    a temporary file and renamed over ``path``, so readers never see a
+    partial index.
+    """
+    path = Path(path)
+    inventory_dir = Path(inventory_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    if temporary.exists():
+        temporary.unlink()
+    
+    connection = sqlite3.connect(temporary)
+    try:
+        _fill_database(connection, entries, inventory_dir, commit)
+    finally:
+        connection.close()
+    os.replace(temporary, path)
+
+
+class IndexedValues:
+    """Set-like view of the key IDs or aliases of a key index database.
+    
+    Membership tests are single indexed lookups; values found only in
+    ``excluded`` files are not members.
+    """
+    
+    def __init__(self, connection: sqlite3.Connection, table: str, column: str, excluded: Set[str]):
+        self.connection = connection
+        self.excluded = excluded
+        self._lookup = f"SELECT name FROM {table} WHERE {column} = ?"
+        self._scan = f"SELECT {column}, name FROM {table} ORDER BY {column}"
+    
+    def __contains__(self, value: Any) -> bool:
+        if not isinstance(value, str):
+            return False
+        return any(name not in self.excluded for (name,) in self.connection.execute(self._lookup, (value,)))
+    
+    def __iter__(self) -> Iterator[str]:
+        previous = None
+        for value, name in self.connection.execute(self._scan):
+            if value != previous and name not in self.excluded:
+                previous = value
+                yield value
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def _base_exclusions(manifest: Dict[str, Dict[str, Any]], inventory_dir: Path,
+                     changes: ChangeSet, commit: Optional[str] = None) -> Optional[Set[str]]:
+    """Names of the changed and removed files, or None when the inventory does not match the base.
+    
+    ``manifest`` describes the base files as the pack manifest does, by size
+    and SHA-256, and ``commit`` is the commit they were indexed at. Apart from
+    the changed and removed files, the inventory directory must contain
+    exactly the files of the manifest. When git can compare ``commit`` with the
+    merge base of ``changes``, the index matches if no other inventory file
+    differs between the two; otherwise the files must have the same content:
+    sizes are compared first and the files are only hashed when every size
+    matches, so an edit that keeps the size is still caught.
+    """
+    changed = {Path(path).name for path in changes.changed
+               if Path(path).parent.resolve() == inventory_dir.resolve()}
+    removed = {Path(path).name for path in changes.removed
+               if Path(path).parent.resolve() == inventory_dir.resolve()}
+    
+    try:
+        current = {entry.name: entry for entry in os.scandir(inventory_dir)
+                   if entry.name.endswith(('.yaml', '.yml')) and entry.is_file()}
+    except OSError:
+        return None
+    
+    expected = (set(manifest) - removed) | changed
+    if set(current) != expected:
+        return None
+    
+    if commit is not None and changes.base is not None:
+        try:
+            touched = changed_paths(commit, changes.base, [str(inventory_dir)])
+        except GitError:
+            touched = None
+        if touched is not None:
+            touched_names = {Path(path).name for path in touched
+                             if Path(path).parent.resolve() == inventory_dir.resolve()
+                             and path.endswith(('.yaml', '.yml'))}
+            return changed | removed if touched_names <= changed | removed else None
+    
+    unchanged = set(manifest) - removed - changed
+    try:
+        if any(current[name].stat().st_size != manifest[name]['size'] for name in unchanged):
+            return None
+        if any(file_digest(current[name].path) != manifest[name].get('sha256') for name in unchanged):
+            return None
+    except OSError:
+        return None
+    
+    return changed | removed
+
+
+def open_index_database(index_file: PathLike, inventory_dir: PathLike,
+                        changes: ChangeSet) -> Optional[Tuple[sqlite3.Connection, Set[str]]]:
+    """Open a key index database of the base inventory read-only.
+    
+    Returns the connection and the names of the files to leave out (the
+    changed and removed ones), or None when the database is missing,
+    unreadable or does not match the base inventory.
+    """
+    index_file = Path(index_file)
+    if not index_file.is_file():
+        return None
+    
+    try:
+        connection = sqlite3.connect(f"{index_file.resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        version = connection.execute("SELECT value FROM meta WHERE name = 'format_version'").fetchone()
+        if version is not None and version[0] == str(INDEX_FORMAT_VERSION):
+            manifest = {name: {'size': size, 'sha256': digest}
+                        for name, size, digest in connection.execute("SELECT name, size, sha256 FROM files")}
+            commit = connection.execute("SELECT value FROM meta WHERE name = 'inventory_commit'").fetchone()
+            excluded = _base_exclusions(manifest, Path(inventory_dir), changes, commit[0] if commit else None)
+            if excluded is not None:
+                return connection, excluded
+    except sqlite3.Error:
+        pass
+    connection.close()
+    return None
+
+
+def base_texts(index_file: PathLike, inventory_dir: PathLike,
+               changes: ChangeSet) -> Optional[Dict[str, Dict[str, str]]]:
+    """Alias, purpose and location of each base inventory file, from a key index database.
+    
+    Files in ``changes`` are left out; returns None under the same conditions
+    as open_index_database().
+    """
+    opened = open_index_database(index_file, inventory_dir, changes)
+    if opened is None:
+        return None
+    connection, excluded = opened
+    try:
+        texts: Dict[str, Dict[str, str]] = {}
+        for name, alias, purpose, location in connection.execute("SELECT name, alias, purpose, location FROM files"):
+            if name not in excluded:
+                texts[name] = {field: value for field, value in
+                               (('alias', alias), ('purpose', purpose), ('location', location)) if value is not None}
+        return texts
+    finally:
+        connection.close()
+
+
+class KeyIndex:
+    """Key IDs and lowercased aliases of the inventory, minus excluded files."""
+    
+    def __init__(self, key_ids: Optional[Collection[str]] = None, aliases: Optional[Collection[str]] = None):
+        self.key_ids: Collection[str] = key_ids if key_ids is not None else set()
+        self.aliases: Collection[str] = aliases if aliases is not None else set()
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: InventorySnapshot, exclude: Iterable[PathLike] = ()) -> 'KeyIndex':
+        """Index every loaded inventory file except ``exclude``."""
+        index = cls()
+        excluded = {normalize_path(path) for path in exclude}
+        for _, data in snapshot.records(exclude=excluded):
+            if 'key_id' in data:
+                index.key_ids.add(data['key_id'])
+            if 'alias' in data:
+                index.aliases.add(data['alias'].lower())
+        return index
+    
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], exclude_names: Iterable[str] = ()) -> 'KeyIndex':
+        """Index a pack payload, ignoring entries that only come from ``exclude_names``."""
+        excluded = set(exclude_names)
+        indexes = payload['indexes']
+        
+        def values(index_name: str) -> Set[str]:
+            return {value for value, names in indexes[index_name].items()
+                    if any(name not in excluded for name in names)}
+        
+        return cls(values('key_id'), values('alias'))
+    
+    @classmethod
+    def for_changes(cls, pack_file: PathLike, inventory_dir: PathLike,
+                    changes: ChangeSet) -> Optional['KeyIndex']:
+        """Index the base inventory from a pack, without the files in ``changes``.
+        
+        The pack must describe the base revision: apart from the changed and
+        removed files, the inventory directory must contain exactly the files of
+        the pack manifest, unchanged since the commit the pack records (or with
+        the same SHA-256 when git cannot tell). Returns None when the pack is
+        missing or does not match, in which case callers fall back to a full
+        snapshot.
+        """
+        try:
+            payload = read_pack(pack_file)
+        except PackError:
+            return None
+        
+        excluded = _base_exclusions(payload.get('manifest', {}), Path(inventory_dir), changes,
+                                    payload.get('inventory_commit'))
+        if excluded is None:
+            return None
+        return cls.from_payload(payload, exclude_names=excluded)
+    
+    @classmethod
+    def from_database(cls, index_file: PathLike, inventory_dir: PathLike,
+                      changes: ChangeSet) -> Optional['KeyIndex']:
+        """Index the base inventory from a key index database, without the files in ``changes``.
+        
+        Same as for_changes(), but key IDs and aliases stay in the database and
+        are looked up one at a time. Returns None when the database is missing,
+        unreadable or does not match the base inventory.
+        """
+        opened = open_index_database(index_file, inventory_dir, changes)
+        if opened is None:
+            return None
+        connection, excluded = opened
+        return cls(IndexedValues(connection, 'key_ids', 'key_id', excluded),
+                   IndexedValues(connection, 'aliases', 'alias', excluded))
+
+
+class InventoryLookup:
+    """Keys by consuming service and by location prefix, from a key index database.
+    
+    Every lookup is an indexed query: an equality lookup in the services
+    table, or range scans of the locations table for a location prefix.
+    """
+    
+    def __init__(self, connection: sqlite3.Connection, excluded: Optional[Set[str]] = None):
+        self.connection = connection
+        self.excluded = excluded or set()
+        self._file_query = f"SELECT {', '.join(FILE_FIELDS)} FROM files WHERE name = ?"
+    
+    @classmethod
+    def from_database(cls, index_file: PathLike, inventory_dir: PathLike = 'inventory') -> Optional['InventoryLookup']:
+        """Open a key index database, or return None when it does not match the current inventory."""
+        opened = open_index_database(index_file, inventory_dir, ChangeSet())
+        if opened is None:
+            return None
+        return cls(*opened)
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: InventorySnapshot) -> 'InventoryLookup':
+        """Index a snapshot in an in-memory database, for when no fresh key index database exists."""
+        connection = sqlite3.connect(':memory:')
+        entries = (index_entry(file_path.name, data) for file_path, data in snapshot.records())
+        _fill_database(connection, entries, snapshot.inventory_dir)
+        return cls(connection)
+    
+    def _keys(self, names: Iterable[str]) -> List[Dict[str, Any]]:
+        keys = []
+        for name in sorted(set(names) - self.excluded):
+            row = self.connection.execute(self._file_query, (name,)).fetchone()
+            if row is not None:
+                keys.append({"file": name, **dict(zip(FILE_FIELDS, row))})
+        return keys
+    
+    def by_service(self, service: str) -> List[Dict[str, Any]]:
+        """The keys a service uses (case-insensitive)."""
+        rows = self.connection.execute("SELECT name FROM services WHERE service = ?", (service.strip().lower(),))
+        return self._keys(name for (name,) in rows)
+    
+    def by_location(self, prefix: str) -> List[Dict[str, Any]]:
+        """The keys whose location is ``prefix`` or lies under it (see location_matches())."""
+        prefix = location_prefix(prefix)
+        if not prefix:
+            return []
+        names = [name for (name,) in self.connection.execute("SELECT name FROM locations WHERE location = ?",
+                                                             (prefix,))]
+        for separator in LOCATION_SEPARATORS:
+            # Every location starting with prefix + separator sorts in [prefix + separator, prefix + next character)
+            rows = self.connection.execute("SELECT name FROM locations WHERE location >= ? AND location < ?",
+                                           (prefix + separator, prefix + chr(ord(separator) + 1)))
+            names.extend(name for (name,) in rows)
+        return self._keys(names)
+    
+    def by_key_id(self, key_id: str) -> List[Dict[str, Any]]:
+        """The files defining a key ID."""
+        rows = self.connection.execute("SELECT name FROM key_ids WHERE key_id = ?", (key_id,))
+        return self._keys(name for (name,) in rows)
+    
+    def services(self) -> List[Tuple[str, int]]:
+        """Every consuming service and the number of keys it uses."""
+        counts: Dict[str, int] = {}
+        for service, name in self.connection.execute("SELECT service, name FROM services"):
+            if name not in self.excluded:
+                counts[service] = counts.get(service, 0) + 1
+        return sorted(counts.items())
+    
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
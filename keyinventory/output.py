@@ -0,0 +1,203 @@
+"""
+Output Writers
+
+Atomic file replacement and an incremental writer for docs/keys.json that
+produces exactly the bytes of ``json.dump(..., indent=2, ensure_ascii=False)``
+(with datetimes in ISO 8601 form) without building the whole document in
+memory, and a spool that sorts rendered records externally for streaming
+builds. The bytes are the same with either backend of keyinventory.serializer,
+which writes the floats orjson would render differently through ``json``.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import pickle
+import struct
+import tempfile
+from contextlib import contextmanager
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from keyinventory.serializer import dumps
+
+
+PathLike = Union[str, Path]
+
+INDENT = '  '
+
+
+@contextmanager
+def atomic_write(path: PathLike, mode: str = 'w') -> Iterator[IO]:
+    """Open a temporary file next to ``path`` and rename it over ``path`` on success.
+    
+    Readers never see a partially written file; if the block raises, the
+    temporary file is removed and the existing file is left untouched.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    permissions = path.stat().st_mode & 0o777 if path.exists() else 0o644
+    
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+            yield f
+        os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def render_json(value: Any, level: int = 0) -> str:
+    """Render a value as json.dump(indent=2) would when nested ``level`` levels deep."""
+    text = dumps(value, indent=True)
+    if level:
+        # Newlines inside strings are escaped, so every newline is structural
+        text = text.replace('\n', '\n' + INDENT * level)
+    return text
+
+
+def write_keys_document(f: IO[str], records: Iterable[str], metadata: Optional[Dict[str, Any]] = None):
+    """Write the keys output from records rendered by render_json(record).
+    
+    Without metadata the document is the bare ``[...]`` list; with metadata it
+    is ``{"metadata": ..., "keys": [...]}``. Records are written one at a time.
+    """
+    if metadata is None:
+        _write_array(f, records, 1)
+    else:
+        write_json_object(f, {"metadata": metadata}, "keys", records)
+
+
+def write_json_object(f: IO[str], values: Dict[str, Any], name: str, records: Iterable[str]):
+    """Write ``{**values, name: [...]}`` from records rendered by render_json(record).
+    
+    The bytes are those of json.dump(indent=2) of the whole object with either
+    serializer backend, but the records are written one at a time.
+    """
+    f.write('{\n')
+    for key, value in values.items():
+        f.write(INDENT + render_json(key) + ': ' + render_json(value, 1) + ',\n')
+    f.write(INDENT + render_json(name) + ': ')
+    _write_array(f, records, 2)
+    f.write('\n}')
+
+
+def _write_array(f: IO[str], records: Iterable[str], level: int):
+    pad = INDENT * level
+    written = False
+    for text in records:
+        f.write(',\n' if written else '[\n')
+        f.write(pad + text.replace('\n', '\n' + pad))
+        written = True
+    f.write('\n' + INDENT * (level - 1) + ']' if written else '[]')
+
+
+class _SpillRun:
+    """A sorted run of ``(sort value, rendered record)`` entries in a spill file."""
+    
+    def __init__(self, path: Path, entries: Iterable[Tuple[Any, str]]):
+        self.path = path
+        self.count = 0
+        with open(path, 'wb') as f:
+            for value, text in entries:
+                key = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                data = text.encode('utf-8')
+                f.write(_RUN_HEADER.pack(len(key), len(data)))
+                f.write(key)
+                f.write(data)
+                self.count += 1
+    
+    def __iter__(self) -> Iterator[Tuple[Any, str]]:
+        # Each pass opens its own handle, so several passes can run at once
+        with open(self.path, 'rb') as f:
+            for _ in range(self.count):
+                key_length, data_length = _RUN_HEADER.unpack(f.read(_RUN_HEADER.size))
+                value = pickle.loads(f.read(key_length))
+                yield value, f.read(data_length).decode('utf-8')
+
+
+_RUN_HEADER = struct.Struct('<II')
+
+# Records buffered in memory before a sorted run is spilled to disk
+DEFAULT_RUN_SIZE = 5000
+
+# Runs merged at once; more runs are first merged into larger ones
+MAX_OPEN_RUNS = 64
+
+
+class RecordSpool:
+    """Renders JSON records and replays them sorted, with bounded memory.
+    
+    Records are rendered on append and buffered ``run_size`` at a time; each
+    full buffer is sorted and spilled to a run file, and the runs are merged
+    with heapq.merge when the spool is read (an external merge sort). Records
+    are replayed in the order ``sorted(records, key=sort_key, reverse=reverse)``
+    would give, ties keeping their insertion order. Without a sort key they
+    are replayed in insertion order.
+    """
+    
+    def __init__(self, sort_key: Optional[Callable[[Dict[str, Any]], Any]] = None, reverse: bool = False,
+                 run_size: int = DEFAULT_RUN_SIZE):
+        self.sort_key = sort_key
+        self.reverse = reverse
+        self.run_size = max(1, run_size)
+        self._dir = tempfile.TemporaryDirectory(prefix='record-spool-')
+        self._runs: List[_SpillRun] = []
+        self._buffer: List[Tuple[Any, str]] = []
+        self._count = 0
+        self._spilled = 0
+    
+    def append(self, record: Dict[str, Any]):
+        """Render a record and add it to the spool."""
+        self._buffer.append((self.sort_key(record) if self.sort_key else None, render_json(record)))
+        self._count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+    
+    def _spill(self):
+        if self.sort_key is not None:
+            # sort() is stable, so ties keep their insertion order within a run
+            self._buffer.sort(key=itemgetter(0), reverse=self.reverse)
+        self._runs.append(self._new_run(self._buffer))
+        self._buffer = []
+        if len(self._runs) > MAX_OPEN_RUNS:
+            # Merging consecutive runs keeps insertion order between ties
+            merged = self._new_run(self._merge(self._runs))
+            for run in self._runs:
+                run.path.unlink()
+            self._runs = [merged]
+    
+    def _new_run(self, entries: Iterable[Tuple[Any, str]]) -> _SpillRun:
+        self._spilled += 1
+        return _SpillRun(Path(self._dir.name) / f"run-{self._spilled:06d}.bin", entries)
+    
+    def _merge(self, runs: List[Iterable[Tuple[Any, str]]]) -> Iterator[Tuple[Any, str]]:
+        if self.sort_key is None:
+            return itertools.chain.from_iterable(runs)
+        # heapq.merge yields ties from earlier runs first, like a stable sort
+        return heapq.merge(*runs, key=itemgetter(0), reverse=self.reverse)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def rendered(self) -> Iterator[str]:
+        """Yield the rendered records in sorted order."""
+        buffer = self._buffer if self.sort_key is None else sorted(self._buffer, key=itemgetter(0), reverse=self.reverse)
+        for _, text in self._merge(self._runs + [buffer]):
+            yield text
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the records, decoded again from JSON, in sorted order."""
+        for text in self.rendered():
+            yield json.loads(text)
+    
+    def close(self):
+        """Remove the spill files."""
+        self._dir.cleanup()
@@ -0,0 +1,177 @@
+"""
+Binary Inventory Pack
+
+File format for the pre-parsed inventory snapshot written by build-data.py
+(docs/keys.pack by default). A pack holds the parsed documents, validated
+records, lookup indexes and a manifest of source file hashes so scripts can
+skip YAML parsing entirely while the inventory is unchanged.
+
+The payload is a pickle read through a restricted unpickler that only accepts
+plain containers and date/time values, so a tampered pack cannot execute code.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from keyinventory.output import atomic_write
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_PACK_FILE = 'docs/keys.pack'
+
+MAGIC = b'KINVPACK'
+FORMAT_VERSION = 1
+
+# Globals a pack may reference: YAML timestamps load as date/datetime values
+ALLOWED_GLOBALS = {
+    ('datetime', 'date'),
+    ('datetime', 'datetime'),
+    ('datetime', 'timedelta'),
+    ('datetime', 'timezone'),
+}
+
+
+class PackError(Exception):
+    """Raised when a pack file is missing, corrupt or of an unknown format."""
+    pass
+
+
+class RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler that refuses to load anything but plain data."""
+    
+    def find_class(self, module: str, name: str):
+        if (module, name) not in ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"Pack references forbidden global {module}.{name}")
+        return super().find_class(module, name)
+
+
+def file_digest(file_path: PathLike) -> str:
+    """Return the SHA-256 of a file's content."""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_manifest(files: Iterable[PathLike]) -> Dict[str, Dict[str, Any]]:
+    """Describe source files by name, size and content hash.
+    
+    Modification times are deliberately left out so that the same inventory
+    content always produces the same pack, whatever the checkout.
+    """
+    manifest = {}
+    for file_path in files:
+        manifest[Path(file_path).name] = {
+            "size": os.stat(file_path).st_size,
+            "sha256": file_digest(file_path)
+        }
+    return manifest
+
+
+def is_fresh(manifest: Dict[str, Dict[str, Any]], inventory_dir: PathLike) -> bool:
+    """Check whether the inventory directory still matches a pack manifest.
+    
+    Sizes are compared first; files are only hashed when every size matches.
+    """
+    inventory_dir = Path(inventory_dir)
+    if not inventory_dir.is_dir():
+        return False
+    
+    current = list(inventory_dir.glob('*.yaml')) + list(inventory_dir.glob('*.yml'))
+    if {file_path.name for file_path in current} != set(manifest):
+        return False
+    
+    if any(file_path.stat().st_size != manifest[file_path.name]['size'] for file_path in current):
+        return False
+    
+    return all(file_digest(file_path) == manifest[file_path.name]['sha256'] for file_path in current)
+
+
+def normalize_payload(payload: Any) -> Any:
+    """Rebuild a payload so that its pickle depends only on its values.
+    
+    Pickle writes an object seen before as a reference to it, so the bytes
+    depend on which parts of the payload are the same object, e.g. documents
+    shared with the validated keys on a cold build but not when the keys come
+    from the build cache. Every container is rebuilt as a new object and equal
+    strings and date/time values are replaced by one instance of each.
+    """
+    shared: Dict[Any, Any] = {}
+    active = set()
+    intern = shared.setdefault
+    
+    def rebuild(value: Any) -> Any:
+        kind = type(value)
+        if kind is str:
+            return intern(value, value)
+        if value is None or kind in (bool, int, float):
+            return value
+        if not isinstance(value, (dict, list, tuple)):
+            return intern((kind, repr(value)), value)
+        
+        marker = id(value)
+        if marker in active:
+            raise PackError("Cannot pack a recursive document")
+        active.add(marker)
+        if isinstance(value, dict):
+            result: Any = {}
+            for key, item in value.items():
+                result[intern(key, key) if type(key) is str else rebuild(key)] = (
+                    intern(item, item) if type(item) is str else rebuild(item))
+        elif isinstance(value, list):
+            result = [intern(item, item) if type(item) is str else rebuild(item) for item in value]
+        else:
+            result = tuple([rebuild(item) for item in value])
+        active.discard(marker)
+        return result
+    
+    return rebuild(payload)
+
+
+def write_pack(pack_file: PathLike, payload: Dict[str, Any]):
+    """Atomically write a pack file; the same payload values always give the same bytes."""
+    data = normalize_payload(dict(payload, format_version=FORMAT_VERSION))
+    with atomic_write(pack_file, 'wb') as f:
+        f.write(MAGIC)
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_pack(pack_file: PathLike) -> Dict[str, Any]:
+    """Memory-map a pack file and return its payload."""
+    try:
+        with open(pack_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= len(MAGIC):
+                raise PackError(f"{pack_file} is not a key inventory pack")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(MAGIC)] != MAGIC:
+                    raise PackError(f"{pack_file} is not a key inventory pack")
+                mm.seek(len(MAGIC))
+                payload = RestrictedUnpickler(mm).load()
+    except OSError as e:
+        raise PackError(f"Could not read {pack_file}: {e}")
+    except (pickle.UnpicklingError, EOFError, ValueError) as e:
+        raise PackError(f"Corrupt pack {pack_file}: {e}")
+    
+    if not isinstance(payload, dict) or payload.get('format_version') != FORMAT_VERSION:
+        raise PackError(f"{pack_file} has an unsupported pack format")
+    
+    return payload
+
+
+def load_fresh_payload(pack_file: Optional[PathLike], inventory_dir: PathLike) -> Optional[Dict[str, Any]]:
+    """Return the pack payload if it exists and matches the inventory, else None."""
+    if not pack_file or not Path(pack_file).exists():
+        return None
+    
+    try:
+        payload = read_pack(pack_file)
+    except PackError:
+        return None
+    
+    if not is_fresh(payload.get('manifest', {}), inventory_dir):
+        return None
+    
+    return payload
@@ -0,0 +1,217 @@
+"""
+Build Profiler
+
+Wall time and memory allocations of the phases of a build. A phase is timed
+by a phase() block, which may run many times (read, parse and validate run
+once per file) and may be nested in another phase; the time and memory of a
+phase exclude those of the phases nested in it, so the phases add up to the
+profiled total. Allocations are measured with tracemalloc: ``net_bytes`` is
+the memory still allocated when the blocks end, ``peak_bytes`` the highest
+traced memory reached while the phase ran.
+
+The profiler also keeps the slowest files and a sample of the parsed
+documents, on which validator_costs() times each schema rule on its own.
+"""
+
+import heapq
+import itertools
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from keyinventory.output import atomic_write
+from keyinventory.schema import KEY_SCHEMA, FieldRule, compile_schema
+from keyinventory.serializer import dumps
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_TOP_FILES = 20
+
+# Parsed documents kept to time the validator rules on
+VALIDATOR_SAMPLE = 1000
+
+# Passes over the sample per rule; the fastest one is reported
+VALIDATOR_ROUNDS = 5
+
+
+class _Frame:
+    """An open phase() block."""
+    
+    __slots__ = ('name', 'started', 'memory', 'peak', 'child_seconds', 'child_bytes')
+    
+    def __init__(self, name: str, started: float, memory: int, peak: int):
+        self.name = name
+        self.started = started
+        self.memory = memory
+        self.peak = peak
+        self.child_seconds = 0.0
+        self.child_bytes = 0
+
+
+class BuildProfiler:
+    """Collects the timing report of one build."""
+    
+    def __init__(self, top_files: int = DEFAULT_TOP_FILES, track_allocations: bool = True,
+                 sample_size: int = VALIDATOR_SAMPLE):
+        self.top_files = top_files
+        self.track_allocations = track_allocations
+        self.sample_size = sample_size
+        # Phase name -> totals, in the order the phases first ran
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self.files = 0
+        self._slowest: List[Any] = []
+        self._order = itertools.count()
+        self._stack: List[_Frame] = []
+        self._started: Optional[float] = None
+        self._stopped: Optional[float] = None
+    
+    def start(self):
+        """Start the profiled total, and tracemalloc when allocations are tracked."""
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._started = time.perf_counter()
+    
+    def stop(self):
+        """Stop the profiled total and tracemalloc."""
+        self._stopped = time.perf_counter()
+        if self.track_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def _memory(self) -> Any:
+        if self.track_allocations and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()
+        return 0, 0
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block (and its allocations) as part of phase ``name``."""
+        memory, peak = self._memory()
+        if self._stack:
+            # The enclosing phase keeps the peak it reached before this block
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, peak)
+        if self.track_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        
+        frame = _Frame(name, time.perf_counter(), memory, memory)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - frame.started
+            memory, peak = self._memory()
+            self._stack.pop()
+            net = memory - frame.memory
+            peak = max(frame.peak, peak)
+            if self._stack:
+                parent = self._stack[-1]
+                parent.child_seconds += seconds
+                parent.child_bytes += net
+                parent.peak = max(parent.peak, peak)
+            
+            totals = self.phases.get(name)
+            if totals is None:
+                totals = self.phases[name] = {"seconds": 0.0, "calls": 0, "net_bytes": 0, "peak_bytes": 0}
+            totals["seconds"] += seconds - frame.child_seconds
+            totals["calls"] += 1
+            totals["net_bytes"] += net - frame.child_bytes
+            totals["peak_bytes"] = max(totals["peak_bytes"], peak)
+    
+    def record_file(self, name: str, seconds: float, phases: Dict[str, float]):
+        """Record the time spent on one file; only the slowest ``top_files`` are kept."""
+        self.files += 1
+        if self.top_files <= 0:
+            return
+        entry = (seconds, next(self._order), name, phases)
+        if len(self._slowest) < self.top_files:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+    
+    def sample(self, document: Any):
+        """Keep a parsed document for validator_costs(), up to ``sample_size`` of them."""
+        if isinstance(document, dict) and len(self.samples) < self.sample_size:
+            self.samples.append(document)
+    
+    def slowest_files(self) -> List[Dict[str, Any]]:
+        """The slowest files, slowest first."""
+        return [{"file": name, "seconds": round(seconds, 6),
+                 **{phase: round(value, 6) for phase, value in phases.items()}}
+                for seconds, _, name, phases in sorted(self._slowest, key=lambda entry: (-entry[0], entry[1]))]
+    
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        """The timing report; ``extra`` values are added at the top level."""
+        stopped = self._stopped if self._stopped is not None else time.perf_counter()
+        total = stopped - self._started if self._started is not None else 0.0
+        phases = {name: {"seconds": round(totals["seconds"], 6),
+                         "share": round(totals["seconds"] / total, 4) if total else 0.0,
+                         "calls": totals["calls"],
+                         "net_bytes": totals["net_bytes"],
+                         "peak_bytes": totals["peak_bytes"]}
+                  for name, totals in self.phases.items()}
+        accounted = sum(totals["seconds"] for totals in self.phases.values())
+        return {
+            "generated_at": datetime.now().isoformat(),
+            **extra,
+            "total_seconds": round(total, 6),
+            "unaccounted_seconds": round(max(total - accounted, 0.0), 6),
+            "allocations_tracked": self.track_allocations,
+            "files_profiled": self.files,
+            "phases": phases,
+            "slowest_files": self.slowest_files(),
+            "validators": validator_costs(self.samples),
+        }
+    
+    def write_report(self, path: PathLike, **extra: Any) -> Dict[str, Any]:
+        """Write the timing report as JSON and return it."""
+        report = self.report(**extra)
+        with atomic_write(path) as f:
+            f.write(dumps(report, indent=True))
+        return report
+
+
+def _best_of(func, documents: Sequence[Any], rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for document in documents:
+            func(document)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def validator_costs(documents: Sequence[Dict[str, Any]], schema: Sequence[FieldRule] = KEY_SCHEMA,
+                    rounds: int = VALIDATOR_ROUNDS) -> List[Dict[str, Any]]:
+    """Time each validator on ``documents``, most expensive first.
+    
+    Every rule is compiled into a validator of its own (rules of a section
+    together with the section rule, so their cost includes the section
+    check); the required-field check and the normalizers are timed as well.
+    Costs are reported in microseconds per document.
+    """
+    if not documents:
+        return []
+    
+    sections = {rule.path: rule for rule in schema if rule.kind == 'object'}
+    validators = [('required_fields', 'required', compile_schema(()).missing)]
+    for rule in schema:
+        section = rule.path.rpartition('.')[0]
+        rules = (sections[section], rule) if section in sections else (rule,)
+        validators.append((rule.path, rule.kind, compile_schema(rules).check))
+        if rule.normalize is not None:
+            validators.append((f"{rule.path} (normalize)", 'normalize',
+                               lambda document, path=rule.path, normalize=rule.normalize:
+                               normalize(document[path]) if path in document else None))
+    
+    costs = []
+    for name, kind, func in validators:
+        seconds = _best_of(func, documents, rounds)
+        costs.append({"validator": name, "kind": kind,
+                      "microseconds_per_document": round(seconds / len(documents) * 1e6, 3)})
+    costs.sort(key=lambda cost: -cost["microseconds_per_document"])
+    return costs
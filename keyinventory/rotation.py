@@ -0,0 +1,308 @@
+"""
+Rotation Schedule
+
+Rotation due dates of many keys computed column by column. The creation
+dates, last rotation dates and rotation intervals of the keys are collected
+first; ``compute`` then parses each date column into a ``datetime64`` array,
+picks the reference date (the last rotation, else the creation), and
+derives the due dates, days remaining and status buckets of every key in one
+pass. Without NumPy the same columns are computed with a plain loop. The
+status dict of a key, with its message and ISO dates, is only built for the
+keys asked for.
+
+Dates are compared in UTC; dates without a UTC offset are taken as UTC.
+"""
+
+import re
+from array import array
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+NUMPY_AVAILABLE = np is not None
+
+DEFAULT_INTERVAL_DAYS = 365
+DEFAULT_WARNING_DAYS = 30
+DEFAULT_CRITICAL_DAYS = 7
+
+# Status buckets, by code
+STATUSES = ('error', 'overdue', 'critical', 'warning', 'ok')
+ERROR, OVERDUE, CRITICAL, WARNING, OK = range(len(STATUSES))
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_DAY = 86_400_000_000
+
+# UTC timestamps NumPy reads exactly as datetime.fromisoformat does, once the 'Z' is cut off
+# (year 0 is valid for NumPy only)
+_UTC_TIMESTAMP = re.compile(r'(?!0000)[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\.[0-9]{1,6})?Z')
+
+
+def _microseconds(moment: datetime) -> int:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def parse_date(value: Any) -> Tuple[int, Optional[tzinfo]]:
+    """Microseconds since the epoch (UTC) of an ISO 8601 date, and its time zone.
+    
+    Accepts strings ('Z' suffix allowed) and the date and datetime objects
+    YAML loads unquoted timestamps as; raises ValueError for anything else.
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, date):
+        moment = datetime.combine(value, time())
+    elif isinstance(value, str):
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    else:
+        raise ValueError(f"not a date: {value!r}")
+    return _microseconds(moment), moment.tzinfo
+
+
+def _interval(value: Any) -> Optional[int]:
+    """A rotation interval in microseconds, None if it is not a number of days."""
+    if value is None:
+        value = DEFAULT_INTERVAL_DAYS
+    # Booleans count as 0 or 1 day, as timedelta(days=value) takes them
+    if type(value) is int or type(value) is bool:
+        return int(value) * _DAY
+    if type(value) is float:
+        return timedelta(days=value) // _MICROSECOND
+    return None
+
+
+class RotationSchedule:
+    """Rotation due dates and status buckets of many keys."""
+    
+    def __init__(self, warning_days: int = DEFAULT_WARNING_DAYS, critical_days: int = DEFAULT_CRITICAL_DAYS,
+                 now: Optional[datetime] = None):
+        self.warning_days = warning_days
+        self.critical_days = critical_days
+        self.now = now or datetime.now(timezone.utc)
+        self.created_at: List[Any] = []
+        self.last_rotated_at: List[Any] = []
+        self.rotation_interval_days: List[Any] = []
+        # Intervals in microseconds; None where rotation_interval_days is not a number
+        self.intervals: List[Optional[int]] = []
+        # Filled by compute(): status code, days remaining and due date (microseconds) per row
+        self.codes: Any = None
+        self.days_remaining: Any = None
+        self.due: Any = None
+        self._errors: Dict[int, str] = {}
+        self._rotated: Any = None
+        self._created_zones: List[Optional[tzinfo]] = []
+        self._rotated_zones: List[Optional[tzinfo]] = []
+    
+    def __len__(self) -> int:
+        return len(self.created_at)
+    
+    def add(self, data: Dict[str, Any]) -> int:
+        """Add a key definition as a new row, returning the row number."""
+        lifecycle = data.get('lifecycle')
+        interval = data.get('rotation_interval_days', DEFAULT_INTERVAL_DAYS)
+        self.created_at.append(data.get('created_at'))
+        self.last_rotated_at.append(lifecycle.get('last_rotated_at') if isinstance(lifecycle, dict) else None)
+        self.rotation_interval_days.append(interval)
+        self.intervals.append(_interval(interval))
+        self.codes = None
+        return len(self.created_at) - 1
+    
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """Add several key definitions."""
+        for data in records:
+            self.add(data)
+    
+    def compute(self) -> 'RotationSchedule':
+        """Compute the due dates, days remaining and status of every row."""
+        self._errors = {}
+        if np is not None:
+            self._compute_arrays()
+        else:
+            self._compute_rows()
+        return self
+    
+    def _error(self, row: int, created_error: Optional[str]) -> str:
+        if not self.created_at[row]:
+            return "No created_at date found"
+        if created_error is not None:
+            return f"Date parsing error: {created_error}"
+        return f"Invalid rotation_interval_days: {self.rotation_interval_days[row]!r}"
+    
+    def _parse_column(self, values: List[Any]) -> Tuple[Any, List[Optional[tzinfo]], Dict[int, str]]:
+        """A datetime64 array of a date column (NaT where missing or invalid), its zones and parse errors."""
+        # Plain UTC timestamps are read by NumPy with the 'Z' cut off; everything else (other offsets,
+        # naive strings, dates, malformed text) is parsed one by one with datetime.fromisoformat
+        match = _UTC_TIMESTAMP.fullmatch
+        texts = [value[:-1] if type(value) is str and match(value) else None for value in values]
+        zones: List[Optional[tzinfo]] = [None if text is None else timezone.utc for text in texts]
+        slow = [row for row, text in enumerate(texts) if text is None and values[row]]
+        
+        dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[us]')
+        # A text NumPy cannot read fails the whole range: halve failing ranges down to single values,
+        # which are left to the one-by-one parsing
+        ranges = [(0, len(texts))]
+        while ranges:
+            start, stop = ranges.pop()
+            try:
+                dates[start:stop] = np.array(texts[start:stop], dtype='datetime64[us]')
+            except ValueError:
+                if stop - start == 1:
+                    slow.append(start)
+                else:
+                    middle = (start + stop) // 2
+                    ranges.extend(((start, middle), (middle, stop)))
+        
+        errors = {}
+        for row in slow:
+            try:
+                microseconds, zones[row] = parse_date(values[row])
+                dates[row] = np.datetime64(microseconds, 'us')
+            except (ValueError, OverflowError) as e:
+                errors[row] = str(e)
+        return dates, zones, errors
+    
+    def _compute_arrays(self):
+        created, self._created_zones, created_errors = self._parse_column(self.created_at)
+        rotated, self._rotated_zones, _ = self._parse_column(self.last_rotated_at)
+        self._rotated = ~np.isnat(rotated)
+        
+        valid_interval = np.array([interval is not None for interval in self.intervals], dtype=bool)
+        intervals = np.array([interval or 0 for interval in self.intervals], dtype=np.int64)
+        failed = np.isnat(created) | ~valid_interval
+        
+        reference = np.where(self._rotated, rotated, created).astype(np.int64)
+        due = np.where(failed, 0, reference + intervals)
+        now = _microseconds(self.now)
+        # Floor division, so the days remaining match timedelta.days
+        days = (due - now) // _DAY
+        codes = np.select([failed, days < 0, days <= self.critical_days, days <= self.warning_days],
+                          [ERROR, OVERDUE, CRITICAL, WARNING], OK).astype(np.int8)
+        
+        self.due = due
+        self.days_remaining = days
+        self.codes = codes
+        for row in np.flatnonzero(failed).tolist():
+            self._errors[row] = self._error(row, created_errors.get(row))
+    
+    def _compute_rows(self):
+        count = len(self)
+        self.codes = array('b', [ERROR]) * count
+        self.days_remaining = array('q', [0]) * count
+        self.due = array('q', [0]) * count
+        self._rotated = array('b', [0]) * count
+        self._created_zones = [None] * count
+        self._rotated_zones = [None] * count
+        now = _microseconds(self.now)
+        
+        for row in range(count):
+            reference = None
+            created_error = None
+            if self.created_at[row]:
+                try:
+                    reference, self._created_zones[row] = parse_date(self.created_at[row])
+                except (ValueError, OverflowError) as e:
+                    created_error = str(e)
+            if self.last_rotated_at[row]:
+                try:
+                    rotated, self._rotated_zones[row] = parse_date(self.last_rotated_at[row])
+                    self._rotated[row] = 1
+                except (ValueError, OverflowError):
+                    pass
+                else:
+                    if reference is not None:
+                        reference = rotated
+            
+            interval = self.intervals[row]
+            if reference is None or interval is None:
+                self._errors[row] = self._error(row, created_error)
+                continue
+            due = reference + interval
+            days = (due - now) // _DAY
+            self.due[row] = due
+            self.days_remaining[row] = days
+            if days < 0:
+                self.codes[row] = OVERDUE
+            elif days <= self.critical_days:
+                self.codes[row] = CRITICAL
+            elif days <= self.warning_days:
+                self.codes[row] = WARNING
+            else:
+                self.codes[row] = OK
+    
+    def status_code(self, row: int) -> int:
+        """Status bucket code of ``row``."""
+        if self.codes is None:
+            self.compute()
+        return int(self.codes[row])
+    
+    def rows(self, *statuses: str) -> List[int]:
+        """Row numbers in any of the given status buckets, in order."""
+        if self.codes is None:
+            self.compute()
+        wanted = [STATUSES.index(status) for status in statuses]
+        if np is not None:
+            return np.flatnonzero(np.isin(self.codes, wanted)).tolist()
+        return [row for row, code in enumerate(self.codes) if code in wanted]
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of rows in each status bucket."""
+        if self.codes is None:
+            self.compute()
+        if np is not None:
+            totals = np.bincount(self.codes, minlength=len(STATUSES)).tolist()
+        else:
+            totals = [0] * len(STATUSES)
+            for code in self.codes:
+                totals[code] += 1
+        return dict(zip(STATUSES, totals))
+    
+    def _datetime(self, microseconds: int, zone: Optional[tzinfo]) -> datetime:
+        moment = _EPOCH + timedelta(microseconds=microseconds)
+        if zone is None:
+            return moment
+        return moment.replace(tzinfo=timezone.utc).astimezone(zone)
+    
+    def due_date(self, row: int) -> Optional[datetime]:
+        """Due date of ``row`` in the time zone of its reference date, None if it cannot be computed."""
+        if self.status_code(row) == ERROR:
+            return None
+        zone = self._rotated_zones[row] if self._rotated[row] else self._created_zones[row]
+        return self._datetime(int(self.due[row]), zone)
+    
+    def status(self, row: int) -> Dict[str, Any]:
+        """Rotation status of ``row``: status, message, days remaining and ISO dates."""
+        code = self.status_code(row)
+        if code == ERROR:
+            return {
+                "status": "error",
+                "message": self._errors[row],
+                "days_remaining": None,
+                "next_rotation_due": None
+            }
+        
+        days_remaining = int(self.days_remaining[row])
+        if code == OVERDUE:
+            message = f"{abs(days_remaining)} days overdue"
+        elif code == CRITICAL:
+            message = f"{days_remaining} days remaining (critical)"
+        elif code == WARNING:
+            message = f"{days_remaining} days remaining (warning)"
+        else:
+            message = f"{days_remaining} days remaining"
+        
+        zone = self._rotated_zones[row] if self._rotated[row] else self._created_zones[row]
+        due = int(self.due[row])
+        return {
+            "status": STATUSES[code],
+            "message": message,
+            "days_remaining": days_remaining,
+            "next_rotation_due": self._datetime(due, zone).isoformat(),
+            "reference_date": self._datetime(due - self.intervals[row], zone).isoformat()
+        }
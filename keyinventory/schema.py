@@ -0,0 +1,399 @@
+"""
+Key Schema
+
+The rules of the enhanced key schema v2.0 as one declarative table, compiled
+once into a validator shared by build-data.py and validate-key-creation.py.
+Compilation generates a single Python function with every rule inlined:
+regexes are precompiled, enums are frozensets and error messages are
+formatted up front, so validating a record makes no per-rule calls.
+
+The table follows .ai-context/schema-reference.yml where the build enforces
+it. Emails only require a domain, since internal domains have no TLD.
+"""
+
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+
+class ValidationError(Exception):
+    """Custom validation error."""
+    pass
+
+
+REQUIRED_FIELDS = ('key_id', 'alias', 'environment', 'owner', 'purpose',
+                   'created_at', 'rotation_interval_days', 'location', 'compliance', 'tags')
+
+ENVIRONMENTS = ('dev', 'stage', 'staging', 'prod', 'production')
+PCI_SCOPES = ('none', 'cardholder-data', 'out-of-scope')
+NIST_CLASSIFICATIONS = ('internal', 'confidential', 'secret', 'top-secret')
+LIFECYCLE_STATUSES = ('active', 'deprecated', 'revoked', 'emergency-replaced')
+KEY_TYPES = ('rsa', 'ec', 'symmetric', 'api-key', 'jwt')
+KEY_STORE_TYPES = ('aws-kms', 'azure-kv', 'hashicorp-vault', 'custom')
+COMPLIANCE_STATUSES = ('compliant', 'non-compliant', 'needs-review')
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+NAME_PATTERN = r'^[a-zA-Z0-9\-_]+$'
+USERNAME_PATTERN = r'^[a-zA-Z0-9\-_.]+$'
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+$'
+
+# Canonical lowercase/uppercase hyphenated form; anything else goes through uuid.UUID
+UUID_PATTERN = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+class FieldRule:
+    """One row of the schema table.
+    
+    ``path`` is a top-level field or ``section.field``. ``kind`` is one of
+    object, uuid, pattern, email, datetime, enum, integer, boolean, string_list
+    and tags. A rule only applies when its field is present, unless
+    ``required`` is set. ``normalize`` is applied to the value of a valid
+    record.
+    
+    An object that is not a mapping is always an error when ``strict`` is
+    set. Otherwise it is only one when it contains one of the section's
+    field names (as a list item or substring), as with the original
+    per-section validators; a value like ``lifecycle: prod`` passes.
+    """
+    
+    def __init__(self, path: str, kind: str, values: Sequence[str] = (), pattern: Optional[str] = None,
+                 minimum: Optional[int] = None, maximum: Optional[int] = None, message: Optional[str] = None,
+                 required: bool = False, normalize: Optional[Callable[[Any], Any]] = None,
+                 strict: bool = False):
+        self.path = path
+        self.kind = kind
+        self.values = tuple(values)
+        self.pattern = pattern
+        self.minimum = minimum
+        self.maximum = maximum
+        self.message = message
+        self.required = required
+        self.normalize = normalize
+        self.strict = strict
+    
+    def __repr__(self) -> str:
+        return f"FieldRule({self.path!r}, {self.kind!r})"
+
+
+def _lower_tags(tags: List[str]) -> List[str]:
+    return [tag.lower() for tag in tags]
+
+
+# Rules in the order their errors are reported
+KEY_SCHEMA: Tuple[FieldRule, ...] = (
+    FieldRule('key_id', 'uuid'),
+    FieldRule('alias', 'pattern', pattern=NAME_PATTERN,
+              message="alias can only contain alphanumeric characters, dashes, and underscores"),
+    FieldRule('environment', 'enum', ENVIRONMENTS, normalize=str.lower),
+    FieldRule('owner', 'email', normalize=str.lower),
+    FieldRule('created_at', 'datetime'),
+    FieldRule('rotation_interval_days', 'integer', minimum=1, maximum=3650),
+    
+    FieldRule('compliance', 'object', strict=True),
+    FieldRule('compliance.pci_scope', 'enum', PCI_SCOPES, required=True,
+              message="compliance.pci_scope must be 'none', 'cardholder-data', or 'out-of-scope'"),
+    FieldRule('compliance.nist_classification', 'enum', NIST_CLASSIFICATIONS, required=True,
+              message="compliance.nist_classification must be 'internal', 'confidential', 'secret', or 'top-secret'"),
+    FieldRule('compliance.retention_period_days', 'integer', minimum=1),
+    
+    FieldRule('lifecycle', 'object'),
+    FieldRule('lifecycle.status', 'enum', LIFECYCLE_STATUSES),
+    FieldRule('lifecycle.created_by', 'pattern', pattern=USERNAME_PATTERN,
+              message="lifecycle.created_by must be a valid GitHub username"),
+    FieldRule('lifecycle.approved_by', 'pattern', pattern=USERNAME_PATTERN,
+              message="lifecycle.approved_by must be a valid GitHub username"),
+    FieldRule('lifecycle.approved_at', 'datetime'),
+    FieldRule('lifecycle.last_rotated_at', 'datetime'),
+    FieldRule('lifecycle.next_rotation_due', 'datetime'),
+    FieldRule('lifecycle.rotation_count', 'integer', minimum=0),
+    FieldRule('lifecycle.emergency_contact', 'email'),
+    
+    FieldRule('technical', 'object'),
+    FieldRule('technical.key_type', 'enum', KEY_TYPES),
+    FieldRule('technical.key_size', 'integer', minimum=1),
+    FieldRule('technical.key_store_type', 'enum', KEY_STORE_TYPES),
+    
+    FieldRule('relationships', 'object'),
+    FieldRule('relationships.depends_on', 'string_list'),
+    FieldRule('relationships.used_by', 'string_list'),
+    FieldRule('relationships.related_keys', 'string_list'),
+    FieldRule('relationships.environments', 'string_list'),
+    
+    FieldRule('operational', 'object'),
+    FieldRule('operational.monitoring_enabled', 'boolean'),
+    FieldRule('operational.alerting_enabled', 'boolean'),
+    FieldRule('operational.auto_rotation_enabled', 'boolean'),
+    FieldRule('operational.emergency_revocation_enabled', 'boolean'),
+    
+    FieldRule('audit', 'object'),
+    FieldRule('audit.access_logs_enabled', 'boolean'),
+    FieldRule('audit.usage_tracking_enabled', 'boolean'),
+    FieldRule('audit.compliance_scan_enabled', 'boolean'),
+    FieldRule('audit.last_compliance_check', 'datetime'),
+    FieldRule('audit.compliance_status', 'enum', COMPLIANCE_STATUSES),
+    
+    FieldRule('metadata', 'object'),
+    FieldRule('metadata.risk_assessment', 'enum', RISK_LEVELS),
+    
+    FieldRule('tags', 'tags', pattern=NAME_PATTERN, normalize=_lower_tags),
+)
+
+
+def is_uuid(value: Any) -> bool:
+    """Whether ``value`` is a string uuid.UUID accepts."""
+    if not isinstance(value, str):
+        return False
+    if UUID_PATTERN.match(value):
+        return True
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def is_iso_datetime(value: Any) -> bool:
+    """Whether ``value`` is an ISO 8601 datetime string ('Z' suffix allowed)."""
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return True
+    except ValueError:
+        return False
+
+
+def tags_error(value: Any, pattern: Pattern[str] = re.compile(NAME_PATTERN)) -> Optional[str]:
+    """Return the first problem with a tags list, or None if it is valid."""
+    if not isinstance(value, list):
+        return "tags must be a list"
+    match = pattern.match
+    for tag in value:
+        if not isinstance(tag, str):
+            return f"Tag must be a string, got {type(tag)}"
+        if not match(tag):
+            return f"Tag '{tag}' contains invalid characters"
+    if len(set(tag.lower() for tag in value)) != len(value):
+        return "Duplicate tags are not allowed"
+    return None
+
+
+def _range_message(path: str, minimum: Optional[int], maximum: Optional[int]) -> str:
+    if minimum is not None and maximum is not None:
+        return f"{path} must be between {minimum} and {maximum}"
+    if minimum == 1:
+        return f"{path} must be positive"
+    if minimum == 0:
+        return f"{path} must be non-negative"
+    return f"{path} must be at most {maximum}"
+
+
+class _Compiler:
+    """Generates the source of the check function for a schema table.
+    
+    Regexes, enums and messages are bound as module-level constants of the
+    generated code, so the function body is nothing but inline tests.
+    """
+    
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {
+            'is_uuid': is_uuid,
+            'fromisoformat': datetime.fromisoformat,
+            'tags_error': tags_error,
+        }
+    
+    def constant(self, value: Any) -> str:
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+    
+    def emit(self, indent: int, line: str):
+        self.lines.append('    ' * indent + line)
+    
+    def rule(self, rule: FieldRule, container: str, field: str, indent: int):
+        """Emit the test of one field of ``container``."""
+        path, kind = rule.path, rule.kind
+        self.emit(indent, f"if {field!r} in {container}:")
+        self.emit(indent + 1, f"value = {container}[{field!r}]")
+        body = indent + 1
+        
+        if kind == 'uuid':
+            match = self.constant(UUID_PATTERN.match)
+            message = self.constant(rule.message or f"{path} must be a valid UUID")
+            self.emit(body, f"if not ((value.__class__ is str and {match}(value)) or is_uuid(value)):")
+            self.emit(body + 1, f"append({message})")
+        elif kind in ('pattern', 'email'):
+            if kind == 'email':
+                match = self.constant(re.compile(EMAIL_PATTERN).match)
+                message = self.constant(rule.message or f"{path} must be a valid email address")
+            else:
+                match = self.constant(re.compile(rule.pattern).match)
+                message = self.constant(rule.message or f"{path} does not match {rule.pattern}")
+            self.emit(body, f"if not (isinstance(value, str) and {match}(value)):")
+            self.emit(body + 1, f"append({message})")
+        elif kind == 'datetime':
+            message = self.constant(rule.message or f"{path} must be a valid ISO 8601 datetime")
+            self.emit(body, "if isinstance(value, str):")
+            self.emit(body + 1, "try:")
+            self.emit(body + 2, "fromisoformat(value.replace('Z', '+00:00'))")
+            self.emit(body + 1, "except ValueError:")
+            self.emit(body + 2, f"append({message})")
+            self.emit(body, "else:")
+            self.emit(body + 1, f"append({message})")
+        elif kind == 'enum':
+            # Enum members are strings, so anything that is not a string cannot match
+            values = self.constant(frozenset(rule.values))
+            message = self.constant(rule.message or f"{path} must be one of: {', '.join(rule.values)}")
+            self.emit(body, f"if not (isinstance(value, str) and value in {values}):")
+            self.emit(body + 1, f"append({message})")
+        elif kind == 'integer':
+            type_message = self.constant(f"{path} must be an integer")
+            range_message = self.constant(rule.message or _range_message(path, rule.minimum, rule.maximum))
+            bounds = []
+            if rule.minimum is not None:
+                bounds.append(f"number < {rule.minimum!r}")
+            if rule.maximum is not None:
+                bounds.append(f"number > {rule.maximum!r}")
+            self.emit(body, "try:")
+            self.emit(body + 1, "number = int(value)")
+            self.emit(body, "except (ValueError, TypeError):")
+            self.emit(body + 1, f"append({type_message})")
+            if bounds:
+                self.emit(body, "else:")
+                self.emit(body + 1, f"if {' or '.join(bounds)}:")
+                self.emit(body + 2, f"append({range_message})")
+        elif kind == 'boolean':
+            message = self.constant(rule.message or f"{path} must be a boolean")
+            self.emit(body, "if value is not True and value is not False:")
+            self.emit(body + 1, f"append({message})")
+        elif kind == 'string_list':
+            type_message = self.constant(f"{path} must be an array")
+            item_message = self.constant(f"All items in {path} must be strings")
+            self.emit(body, "if not isinstance(value, list):")
+            self.emit(body + 1, f"append({type_message})")
+            self.emit(body, "else:")
+            self.emit(body + 1, "for item in value:")
+            self.emit(body + 2, "if not isinstance(item, str):")
+            self.emit(body + 3, f"append({item_message})")
+        elif kind == 'tags':
+            pattern = self.constant(re.compile(rule.pattern or NAME_PATTERN))
+            self.emit(body, f"message = tags_error(value, {pattern})")
+            self.emit(body, "if message is not None:")
+            self.emit(body + 1, "append(message)")
+        else:
+            raise ValueError(f"Unknown rule kind {kind!r} for {path}")
+        
+        if rule.required:
+            self.emit(indent, "else:")
+            self.emit(indent + 1, f"append({self.constant(f'{path} is required')})")
+    
+    def compile(self, schema: Sequence[FieldRule]) -> Tuple[Callable[[Dict[str, Any]], List[str]], str]:
+        """Return the check function for ``schema`` and its source."""
+        sections: Dict[str, List[FieldRule]] = {}
+        order: List[FieldRule] = []
+        for rule in schema:
+            section, _, _ = rule.path.rpartition('.')
+            if rule.kind == 'object':
+                sections[rule.path] = []
+                order.append(rule)
+            elif section:
+                if section not in sections:
+                    raise ValueError(f"Rule {rule.path} precedes its section rule")
+                sections[section].append(rule)
+            else:
+                order.append(rule)
+        
+        self.emit(0, "def check(data):")
+        self.emit(1, "errors = []")
+        self.emit(1, "append = errors.append")
+        for rule in order:
+            if rule.kind != 'object':
+                self.rule(rule, 'data', rule.path, 1)
+                continue
+            
+            # A section's fields are only checked when the section is a mapping
+            message = self.constant(rule.message or f"{rule.path} must be an object")
+            fields = [field_rule.path.rpartition('.')[2] for field_rule in sections[rule.path]]
+            self.emit(1, f"if {rule.path!r} in data:")
+            self.emit(2, f"section = data[{rule.path!r}]")
+            self.emit(2, "if not isinstance(section, dict):")
+            if rule.strict:
+                self.emit(3, f"append({message})")
+            elif fields:
+                # Values that cannot hold a field name (None, numbers, dates) count as containing one
+                self.emit(3, "try:")
+                self.emit(4, f"if {' or '.join(f'{field!r} in section' for field in fields)}:")
+                self.emit(5, f"append({message})")
+                self.emit(3, "except TypeError:")
+                self.emit(4, f"append({message})")
+            else:
+                self.emit(3, "pass")
+            if sections[rule.path]:
+                self.emit(2, "else:")
+                for field_rule in sections[rule.path]:
+                    self.rule(field_rule, 'section', field_rule.path.rpartition('.')[2], 3)
+        self.emit(1, "return errors")
+        
+        source = '\n'.join(self.lines) + '\n'
+        exec(compile(source, '<key-schema>', 'exec'), self.namespace)
+        return self.namespace['check'], source
+
+
+class KeySchemaValidator:
+    """Validator compiled from a schema table.
+    
+    ``source`` holds the generated code of the check function, for debugging.
+    """
+    
+    def __init__(self, schema: Sequence[FieldRule] = KEY_SCHEMA, required: Sequence[str] = REQUIRED_FIELDS):
+        self.required = tuple(required)
+        self.missing_messages = {field: f"Missing required field: {field}" for field in self.required}
+        self._check, self.source = _Compiler().compile(schema)
+        self.normalizers: List[Tuple[str, Callable[[Any], Any]]] = []
+        for rule in schema:
+            if rule.normalize is not None:
+                if '.' in rule.path:
+                    raise ValueError(f"Normalization is only supported for top-level fields: {rule.path}")
+                self.normalizers.append((rule.path, rule.normalize))
+    
+    def missing(self, data: Dict[str, Any]) -> List[str]:
+        """Return the missing-field messages for ``data``."""
+        return [self.missing_messages[field] for field in self.required if field not in data]
+    
+    def check(self, data: Dict[str, Any]) -> List[str]:
+        """Return the rule violations of the fields present in ``data``."""
+        return self._check(data)
+    
+    def errors(self, data: Dict[str, Any]) -> List[str]:
+        """Return every error of ``data``: missing fields first, then rule violations."""
+        if not isinstance(data, dict):
+            return ["Key definition must be a mapping"]
+        return self.missing(data) + self._check(data)
+    
+    def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and normalize ``data`` in place, raising ValidationError on failure.
+        
+        Missing required fields are reported on their own, before any other
+        rule runs.
+        """
+        if not isinstance(data, dict):
+            raise ValidationError("Key definition must be a mapping")
+        
+        errors = self.missing(data)
+        if errors:
+            raise ValidationError("; ".join(errors))
+        
+        errors = self._check(data)
+        if errors:
+            raise ValidationError("; ".join(errors))
+        
+        for field, normalize in self.normalizers:
+            data[field] = normalize(data[field])
+        return data
+
+
+def compile_schema(schema: Sequence[FieldRule] = KEY_SCHEMA) -> KeySchemaValidator:
+    """Compile a schema table into a validator."""
+    return KeySchemaValidator(schema)
@@ -0,0 +1,117 @@
+"""
+Search Index
+
+Builds docs/search-index.json, a trigram index over the fields the dashboard
+searches (alias, owner, purpose, tags, key type and consuming services).
+
+Each key is identified by its position in docs/keys.json. Its searchable
+fields are lowercased and joined with NUL separators into one text, so a
+substring match on that text is exactly a substring match on any one field.
+A query is answered by intersecting the posting lists of its trigrams and
+confirming the few candidates against their texts.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from keyinventory.output import atomic_write
+from keyinventory.serializer import dumps
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_SEARCH_INDEX = 'docs/search-index.json'
+FORMAT_VERSION = 1
+
+# Searched fields, matching the dashboard's filterKeys()
+SEARCH_FIELDS = ('alias', 'owner', 'purpose', 'tags', 'technical.key_type', 'relationships.used_by')
+
+FIELD_SEPARATOR = '\0'
+
+
+def _field_values(record: Dict[str, Any], field: str) -> List[str]:
+    value: Any = record
+    for part in field.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    if value is None or value == '':
+        return []
+    return [str(value)]
+
+
+def search_text(record: Dict[str, Any]) -> str:
+    """Return the lowercased, NUL-separated searchable text of a key record."""
+    values = []
+    for field in SEARCH_FIELDS:
+        values.extend(_field_values(record, field))
+    return FIELD_SEPARATOR.join(value.lower() for value in values)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the trigrams of a text that do not span a field separator."""
+    grams = set()
+    for part in text.split(FIELD_SEPARATOR):
+        grams.update(part[i:i + 3] for i in range(len(part) - 2))
+    return grams
+
+
+class SearchIndex:
+    """In-memory trigram index over key records, in output order."""
+    
+    def __init__(self):
+        self.key_ids: List[str] = []
+        self.texts: List[str] = []
+        self.postings: Dict[str, List[int]] = {}
+    
+    def add(self, record: Dict[str, Any], text: Optional[str] = None, grams: Optional[Set[str]] = None):
+        """Index the next record; ``text`` and ``grams`` may be precomputed."""
+        position = len(self.texts)
+        text = search_text(record) if text is None else text
+        grams = trigrams(text) if grams is None else grams
+        self.key_ids.append(str(record.get('key_id', '')))
+        self.texts.append(text)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(position)
+    
+    def search(self, term: str) -> List[int]:
+        """Return the positions of records containing ``term`` in a searched field."""
+        term = term.lower()
+        if len(term) < 3:
+            candidates: Iterable[int] = range(len(self.texts))
+        else:
+            candidate_set = None
+            for gram in trigrams(term):
+                posting = self.postings.get(gram)
+                if not posting:
+                    return []
+                candidate_set = set(posting) if candidate_set is None else candidate_set & set(posting)
+            candidates = sorted(candidate_set)
+        return [position for position in candidates if term in self.texts[position]]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON document written to the search index file."""
+        return {
+            "format_version": FORMAT_VERSION,
+            "fields": list(SEARCH_FIELDS),
+            "key_ids": self.key_ids,
+            "texts": self.texts,
+            "trigrams": dict(sorted(self.postings.items()))
+        }
+
+
+def write_search_index(path: PathLike, index: SearchIndex) -> bool:
+    """Write the index as compact JSON; return False if the file was already current."""
+    path = Path(path)
+    data = dumps(index.to_dict())
+    
+    if path.exists():
+        try:
+            if path.read_text(encoding='utf-8') == data:
+                return False
+        except (OSError, UnicodeDecodeError):
+            pass
+    
+    with atomic_write(path) as f:
+        f.write(data)
+    return True
@@ -0,0 +1,106 @@
+"""
+JSON Serializer
+
+Encodes the generated JSON files through the fastest available backend.
+orjson is used when it is installed and falls back to the standard library
+``json`` module otherwise, or for values orjson cannot encode (integers
+wider than 64 bits, very deep nesting) or would write differently: NaN and
+infinite floats (``null`` instead of ``NaN`` and ``Infinity``) and floats
+the standard library writes with an exponent (``1e16`` and ``0.00005``
+instead of ``1e+16`` and ``5e-05``).
+
+Both backends produce the same text: two-space indented or compact output,
+non-ASCII characters written as-is, datetimes and dates in ISO 8601 form and
+any other unsupported value through ``str()``. The backend can be chosen
+with set_backend() or the KEYINVENTORY_JSON_BACKEND environment variable
+(``auto``, ``orjson`` or ``stdlib``).
+"""
+
+import datetime
+import json
+import logging
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+ORJSON_AVAILABLE = orjson is not None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+
+_backend = 'stdlib'
+
+
+def encode_default(value: Any) -> Any:
+    """Fallback encoder: ISO 8601 for dates and times, ``str()`` for anything else."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def set_backend(name: str = 'auto') -> str:
+    """Select the encoder backend and return the one actually in use."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}' (expected one of: {', '.join(BACKENDS)})")
+    if name == 'orjson' and not ORJSON_AVAILABLE:
+        logger.warning("orjson is not installed, using the standard library JSON encoder")
+    _backend = 'orjson' if name != 'stdlib' and ORJSON_AVAILABLE else 'stdlib'
+    return _backend
+
+
+def get_backend() -> str:
+    """Name of the encoder backend in use."""
+    return _backend
+
+
+_SCALARS = frozenset((str, int, bool, type(None)))
+
+
+def _needs_stdlib(value: Any) -> bool:
+    """Whether ``value`` holds a float orjson writes differently, as a value or a key.
+    
+    Those are NaN, the infinities and the floats whose repr() uses an
+    exponent (below 1e-4 or from 1e16 on, in absolute value). Strings, integers
+    and None are skipped by class so the walk stays cheap next to the encoding.
+    """
+    cls = value.__class__
+    if cls is float or isinstance(value, float):
+        return value != 0 and not 1e-4 <= abs(value) < 1e16
+    if cls is dict or isinstance(value, dict):
+        for key, item in value.items():
+            if key.__class__ is not str and _needs_stdlib(key):
+                return True
+            if item.__class__ not in _SCALARS and _needs_stdlib(item):
+                return True
+    elif cls is list or isinstance(value, (list, tuple)):
+        for item in value:
+            if item.__class__ not in _SCALARS and _needs_stdlib(item):
+                return True
+    return False
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    """Encode ``value`` as two-space indented or compact JSON text."""
+    if _backend == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            encoded = orjson.dumps(value, default=encode_default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if not _needs_stdlib(value):
+                return encoded.decode('utf-8')
+    if indent:
+        return json.dumps(value, indent=2, ensure_ascii=False, default=encode_default)
+    return json.dumps(value, ensure_ascii=False, default=encode_default, separators=(',', ':'))
+
+
+_requested = os.environ.get('KEYINVENTORY_JSON_BACKEND', 'auto')
+set_backend(_requested if _requested in BACKENDS else 'auto')
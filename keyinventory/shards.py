@@ -0,0 +1,211 @@
+"""
+Sharded Output
+
+Splits the validated keys into fixed-size pages and per-environment shards
+under docs/keys/, with a small manifest.json holding counts, statistics and
+a rotation summary. The dashboard renders its summary from the manifest and
+fetches key pages only as it needs them.
+
+Shards are compact JSON arrays in the same order as docs/keys.json.
+"""
+
+import heapq
+import re
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, List, Optional, Union
+
+from keyinventory.output import atomic_write
+from keyinventory.rotation import STATUSES, RotationSchedule
+from keyinventory.serializer import dumps
+
+
+PathLike = Union[str, Path]
+
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 1
+DEFAULT_PAGE_SIZE = 500
+
+# Number of earliest-due keys listed in the manifest for the dashboard
+UPCOMING_ROTATIONS = 50
+
+SHARD_PATTERNS = ('page-*.json', 'env-*.json')
+
+
+def _dumps(value: Any) -> str:
+    return dumps(value)
+
+
+def page_file_name(number: int) -> str:
+    """File name of a 1-based page."""
+    return f"page-{number:04d}.json"
+
+
+def environment_file_name(environment: str) -> str:
+    """File name of an environment shard."""
+    return f"env-{re.sub(r'[^A-Za-z0-9_-]', '_', environment)}.json"
+
+
+class _ArrayWriter:
+    """Writes one JSON array shard record by record."""
+    
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self.count = 0
+    
+    def write(self, text: str):
+        """Append one record already encoded with _dumps()."""
+        self.f.write(('[' if self.count == 0 else ',') + text)
+        self.count += 1
+    
+    def finish(self):
+        self.f.write(']' if self.count else '[]')
+
+
+class ShardWriter:
+    """Writes pages and environment shards as records arrive and collects the manifest data."""
+    
+    def __init__(self, shard_dir: PathLike, page_size: int = DEFAULT_PAGE_SIZE):
+        if page_size <= 0:
+            raise ValueError("page_size must be positive")
+        
+        self.shard_dir = Path(shard_dir)
+        self.page_size = page_size
+        self.total = 0
+        self.pages: List[Dict[str, Any]] = []
+        self.environments: Dict[str, Dict[str, Any]] = {}
+        self.classifications = set()
+        # Rotation rows hold created_at and the interval only: the dashboard counts
+        # rotations from created_at, so the manifest ignores last_rotated_at on purpose
+        self._rotation = RotationSchedule()
+        self._rotation_keys: List[tuple] = []
+        
+        self._stack = ExitStack()
+        self._page: Optional[_ArrayWriter] = None
+        self._page_stack: Optional[ExitStack] = None
+        self._env_writers: Dict[str, _ArrayWriter] = {}
+    
+    def __enter__(self) -> 'ShardWriter':
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self._stack.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._close_page()
+            for writer in self._env_writers.values():
+                writer.finish()
+        elif self._page_stack is not None:
+            self._page_stack.__exit__(exc_type, exc, tb)
+        return self._stack.__exit__(exc_type, exc, tb)
+    
+    def _open(self, stack: ExitStack, name: str) -> _ArrayWriter:
+        return _ArrayWriter(stack.enter_context(atomic_write(self.shard_dir / name)))
+    
+    def _close_page(self):
+        if self._page is None:
+            return
+        self._page.finish()
+        self._page_stack.close()
+        self.pages[-1]["count"] = self._page.count
+        self._page = self._page_stack = None
+    
+    def add(self, record: Dict[str, Any]):
+        """Append a record to the current page and its environment shard."""
+        if self._page is None or self._page.count >= self.page_size:
+            self._close_page()
+            name = page_file_name(len(self.pages) + 1)
+            self._page_stack = ExitStack()
+            self._page = self._open(self._page_stack, name)
+            self.pages.append({"file": name, "count": 0})
+        # Every record goes to a page and an environment shard; encode it once
+        text = _dumps(record)
+        self._page.write(text)
+        
+        environment = str(record.get('environment', 'unknown'))
+        if environment not in self._env_writers:
+            name = environment_file_name(environment)
+            self._env_writers[environment] = self._open(self._stack, name)
+            self.environments[environment] = {"file": name, "count": 0}
+        self._env_writers[environment].write(text)
+        self.environments[environment]["count"] += 1
+        
+        compliance = record.get('compliance')
+        if isinstance(compliance, dict) and compliance.get('nist_classification'):
+            self.classifications.add(str(compliance['nist_classification']))
+        
+        self._rotation.add({
+            "created_at": record.get('created_at'),
+            "rotation_interval_days": record.get('rotation_interval_days'),
+        })
+        self._rotation_keys.append((record.get('key_id'), record.get('alias'), record.get('environment')))
+        
+        self.total += 1
+    
+    def _rotation_summary(self) -> tuple:
+        """Keys due per day and the earliest-due keys, from the created_at-based schedule."""
+        schedule = self._rotation.compute()
+        rows = schedule.rows(*(status for status in STATUSES if status != 'error'))
+        due_by_day: Dict[str, int] = {}
+        for row in rows:
+            day = schedule.due_date(row).date().isoformat()
+            due_by_day[day] = due_by_day.get(day, 0) + 1
+        # Earliest due first (in UTC); ties go to the earlier record
+        upcoming = []
+        for row in heapq.nsmallest(UPCOMING_ROTATIONS, rows, key=lambda row: int(schedule.due[row])):
+            key_id, alias, environment = self._rotation_keys[row]
+            upcoming.append({
+                "key_id": key_id,
+                "alias": alias,
+                "environment": environment,
+                "created_at": schedule.created_at[row],
+                "rotation_interval_days": schedule.rotation_interval_days[row],
+            })
+        return dict(sorted(due_by_day.items())), upcoming
+    
+    def manifest(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return the manifest describing the shards written so far."""
+        metadata = metadata or {}
+        due_by_day, upcoming = self._rotation_summary()
+        manifest = {"format_version": FORMAT_VERSION}
+        # Only with --include-metadata, so unchanged inventories rebuild the same manifest
+        if "build_timestamp" in metadata:
+            manifest["build_timestamp"] = metadata["build_timestamp"]
+        manifest.update({
+            "schema_version": metadata.get("schema_version"),
+            "total_keys": self.total,
+            "page_size": self.page_size,
+            "pages": self.pages,
+            "environments": dict(sorted(self.environments.items())),
+            "nist_classifications": sorted(self.classifications),
+            "rotation_due_by_day": due_by_day,
+            "upcoming_rotations": upcoming,
+            "statistics": metadata.get("statistics", {})
+        })
+        return manifest
+
+
+def write_shards(shard_dir: PathLike, records: Iterable[Dict[str, Any]],
+                 page_size: int = DEFAULT_PAGE_SIZE, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Write pages, environment shards and manifest.json; return the manifest.
+    
+    The manifest is written once every shard is in place; shards left over
+    from a previous, larger build are removed only after that.
+    """
+    shard_dir = Path(shard_dir)
+    with ShardWriter(shard_dir, page_size) as writer:
+        for record in records:
+            writer.add(record)
+    
+    manifest = writer.manifest(metadata)
+    with atomic_write(shard_dir / MANIFEST_FILE) as f:
+        f.write(dumps(manifest, indent=True))
+    
+    current = {page["file"] for page in manifest["pages"]}
+    current.update(shard["file"] for shard in manifest["environments"].values())
+    for pattern in SHARD_PATTERNS:
+        for stale in shard_dir.glob(pattern):
+            if stale.name not in current:
+                stale.unlink()
+    
+    return manifest
@@ -0,0 +1,233 @@
+"""
+Near-Duplicate Detection
+
+Finds keys whose alias, purpose or location is nearly the same as another
+key's, such as ``visa-tokenization`` and ``visa_tokenisation-prod``. Values
+are normalized (lowercased, separators collapsed, environment words dropped
+from aliases and purposes) and compared by the Jaccard similarity of their
+trigram sets, the same trigrams the dashboard search index uses.
+
+Candidate pairs come from prefix filtering instead of comparing every pair:
+the trigrams of each value are ordered from rarest to most common, and two
+values can only reach the threshold if their first few trigrams overlap, so
+only values sharing one of those rare trigrams are ever compared. Candidates
+whose remaining trigrams could not make up the overlap the threshold needs
+are dropped early (positional filtering, as in PPJoin), and the rest are
+verified exactly; no pair above the threshold is missed.
+"""
+
+import math
+import re
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from keyinventory.schema import ENVIRONMENTS
+from keyinventory.search import trigrams
+
+
+NEAR_DUPLICATE_FIELDS = ('alias', 'purpose', 'location')
+
+# Minimum Jaccard similarity of the trigram sets for a pair to be reported
+DEFAULT_THRESHOLDS = {'alias': 0.7, 'purpose': 0.8, 'location': 0.85}
+
+# Words that do not tell keys apart: a prod and a dev clone are still clones
+IGNORED_WORDS = frozenset(ENVIRONMENTS) | {'prd', 'stg', 'key', 'keys'}
+
+_SEPARATORS = re.compile(r'[\s\-_.]+')
+
+
+def normalize(field: str, value: Any) -> str:
+    """The text of a field value that similarity is computed on."""
+    if not isinstance(value, str):
+        return ''
+    text = value.lower().strip()
+    if field == 'location':
+        return text
+    words = [word for word in _SEPARATORS.split(text) if word and word not in IGNORED_WORDS]
+    return ' '.join(words)
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    """Trigrams of a normalized text, padded so that short words still share some."""
+    return frozenset(trigrams(f" {text} ")) if text else frozenset()
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two sets."""
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+def _ceil(value: float) -> int:
+    # Thresholds are decimal fractions: 0.2 * 35 must round to 7, not 8
+    return math.ceil(value - 1e-9)
+
+
+class SimilarityIndex:
+    """Values of one field, searchable for those above a Jaccard threshold.
+    
+    Items with the same normalized text share one entry, so repeated values
+    are compared once. Call build() once every value has been added; query()
+    and pairs() then use the trigram frequencies of the indexed texts to
+    order trigrams.
+    """
+    
+    def __init__(self, threshold: float):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.texts: List[str] = []
+        self.sets: List[FrozenSet[str]] = []
+        # Position -> (item id, original value) of every item with that text
+        self.members: List[List[Tuple[Hashable, Any]]] = []
+        self._positions: Dict[str, int] = {}
+        self._frequency: Dict[str, int] = {}
+        self._prefixes: List[List[str]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._built = False
+    
+    def add(self, item_id: Hashable, text: str, value: Optional[Any] = None):
+        """Add the normalized ``text`` of an item; ``value`` is the original value, for reports."""
+        member = (item_id, text if value is None else value)
+        position = self._positions.get(text)
+        if position is not None:
+            self.members[position].append(member)
+            return
+        grams = shingles(text)
+        if not grams:
+            return
+        self._positions[text] = len(self.texts)
+        self.texts.append(text)
+        self.sets.append(grams)
+        self.members.append([member])
+        for gram in grams:
+            self._frequency[gram] = self._frequency.get(gram, 0) + 1
+        self._built = False
+    
+    def _prefix(self, grams: FrozenSet[str]) -> List[str]:
+        # Rarest first; trigrams never indexed sort before all others
+        frequency = self._frequency
+        ordered = sorted(grams, key=lambda gram: (frequency.get(gram, 0), gram))
+        return ordered[:len(grams) - _ceil(self.threshold * len(grams)) + 1]
+    
+    def build(self):
+        """Index the prefix trigrams of every text."""
+        self._prefixes = [self._prefix(grams) for grams in self.sets]
+        self._postings = {}
+        for position, prefix in enumerate(self._prefixes):
+            for rank, gram in enumerate(prefix):
+                self._postings.setdefault(gram, []).append((position, rank))
+        self._built = True
+    
+    def _verified(self, grams: FrozenSet[str], prefix: List[str],
+                  postings: Dict[str, List[Tuple[int, int]]]) -> Iterator[Tuple[int, float]]:
+        threshold = self.threshold
+        size = len(grams)
+        sets = self.sets
+        # Sets of very different sizes cannot reach the threshold
+        smallest = threshold * size - 1e-9
+        largest = size / threshold + 1e-9
+        # Overlap |A & B| >= t / (1 + t) * (|A| + |B|) is needed
+        factor = threshold / (1 + threshold)
+        # One more than the prefix trigrams shared with each candidate; 0 once it cannot reach the threshold
+        shared: Dict[int, int] = {}
+        for rank, gram in enumerate(prefix):
+            remaining = size - rank - 1
+            for position, other_rank in postings.get(gram, ()):
+                count = shared.get(position, 1)
+                if not count:
+                    continue
+                other_size = len(sets[position])
+                if other_size < smallest or other_size > largest:
+                    shared[position] = 0
+                    continue
+                # Nor can sets whose trigrams after these two can no longer overlap enough
+                other_remaining = other_size - other_rank - 1
+                bound = count + (remaining if remaining < other_remaining else other_remaining)
+                shared[position] = count + 1 if bound >= factor * (size + other_size) - 1e-9 else 0
+        
+        for position, count in shared.items():
+            if count:
+                other = sets[position]
+                overlap = len(grams & other)
+                similarity = overlap / (size + len(other) - overlap)
+                if similarity >= threshold:
+                    yield position, similarity
+    
+    def query(self, text: str) -> List[Tuple[int, float]]:
+        """Positions and similarities of the indexed texts similar to ``text``, most similar first."""
+        if not self._built:
+            self.build()
+        grams = shingles(text)
+        matches = list(self._verified(grams, self._prefix(grams), self._postings))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+    
+    def pairs(self) -> Iterator[Tuple[int, int, float]]:
+        """Every pair of distinct indexed texts above the threshold, as ``(position, position, similarity)``.
+        
+        Texts are probed, smallest first, against the texts before them only,
+        so each candidate pair is looked at once. Those earlier texts are no
+        larger, which lets them be indexed by a shorter prefix.
+        """
+        if not self._built:
+            self.build()
+        ratio = 2 * self.threshold / (1 + self.threshold)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position in sorted(range(len(self.sets)), key=lambda position: len(self.sets[position])):
+            grams = self.sets[position]
+            prefix = self._prefixes[position]
+            for other, similarity in self._verified(grams, prefix, postings):
+                yield other, position, similarity
+            for rank, gram in enumerate(prefix[:len(grams) - _ceil(ratio * len(grams)) + 1]):
+                postings.setdefault(gram, []).append((position, rank))
+
+
+class NearDuplicateFinder:
+    """Near-duplicate detection over several fields of key records."""
+    
+    def __init__(self, fields: Iterable[str] = NEAR_DUPLICATE_FIELDS,
+                 thresholds: Optional[Dict[str, float]] = None):
+        thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.indexes = {field: SimilarityIndex(thresholds[field]) for field in fields}
+    
+    def add(self, item_id: Hashable, record: Dict[str, Any]):
+        """Add a key record (any mapping with the compared fields) under ``item_id``."""
+        for field, index in self.indexes.items():
+            index.add(item_id, normalize(field, record.get(field)), record.get(field))
+    
+    def _report(self, field: str, first: Tuple[Hashable, Any], second: Tuple[Hashable, Any],
+                similarity: float) -> Dict[str, Any]:
+        return {"field": field, "similarity": round(similarity, 3),
+                "first": first[0], "first_value": first[1],
+                "second": second[0], "second_value": second[1]}
+    
+    def pairs(self) -> List[Dict[str, Any]]:
+        """Every near-duplicate pair among the added records, most similar first."""
+        found = []
+        for field, index in self.indexes.items():
+            for members in index.members:
+                for number, first in enumerate(members):
+                    for second in members[number + 1:]:
+                        found.append(self._report(field, first, second, 1.0))
+            for first, second, similarity in index.pairs():
+                for first_member in index.members[first]:
+                    for second_member in index.members[second]:
+                        found.append(self._report(field, first_member, second_member, similarity))
+        return _sorted(found)
+    
+    def matches(self, item_id: Hashable, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Near duplicates of one record among the added records, most similar first."""
+        found = []
+        for field, index in self.indexes.items():
+            value = record.get(field)
+            for position, similarity in index.query(normalize(field, value)):
+                for member in index.members[position]:
+                    if member[0] != item_id:
+                        found.append(self._report(field, (item_id, value), member, similarity))
+        return _sorted(found)
+
+
+def _sorted(found: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(found, key=lambda pair: (-pair["similarity"], pair["field"], str(pair["first"]), str(pair["second"])))
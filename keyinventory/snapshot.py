@@ -0,0 +1,253 @@
+"""
+Inventory Snapshot
+
+Loads every inventory file once and keeps the parsed documents together with
+lookup indexes, so several checks running in the same process can share a
+single parse of the inventory.
+"""
+
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import yaml
+
+from keyinventory.pack import DEFAULT_PACK_FILE, build_manifest, load_fresh_payload, write_pack
+from keyinventory.yaml_loader import safe_load
+
+
+PathLike = Union[str, Path]
+
+# Indexes maintained for every loaded document, mapping a field value to the
+# paths of the files that contain it. Aliases and owners are case-insensitive.
+INDEX_NAMES = ('key_id', 'alias', 'owner', 'environment', 'tag')
+
+
+def normalize_path(file_path: PathLike) -> str:
+    """Return the canonical string used to identify a file in the snapshot."""
+    return os.path.abspath(file_path)
+
+
+def _error_to_pack(error: Exception) -> Tuple[str, str]:
+    """Reduce a load error to plain data for storage in a pack."""
+    if isinstance(error, yaml.YAMLError):
+        return 'yaml', str(error)
+    if isinstance(error, FileNotFoundError):
+        return 'missing', str(error)
+    return 'error', str(error)
+
+
+def _error_from_pack(kind: str, message: str) -> Exception:
+    """Rebuild a load error of the same category from pack data."""
+    if kind == 'yaml':
+        return yaml.YAMLError(message)
+    if kind == 'missing':
+        return FileNotFoundError(message)
+    return Exception(message)
+
+
+class InventorySnapshot:
+    """Parsed view of the inventory, loaded once and indexed for lookups."""
+    
+    def __init__(self, inventory_dir: PathLike = 'inventory'):
+        self.inventory_dir = Path(inventory_dir)
+        self.documents: Dict[str, Any] = {}
+        self.load_errors: Dict[str, Exception] = {}
+        self.inventory_files: List[Path] = []
+        self.indexes: Dict[str, Dict[str, List[str]]] = {name: defaultdict(list) for name in INDEX_NAMES}
+        # Validated records in output order; only available when loaded from a pack
+        self.validated_keys: Optional[List[Dict[str, Any]]] = None
+        self.loaded = False
+    
+    @classmethod
+    def load(cls, inventory_dir: PathLike = 'inventory') -> 'InventorySnapshot':
+        """Create a snapshot with every file of the inventory directory loaded."""
+        snapshot = cls(inventory_dir)
+        snapshot.load_all()
+        return snapshot
+    
+    @classmethod
+    def from_pack(cls, pack_file: PathLike, inventory_dir: PathLike = 'inventory') -> Optional['InventorySnapshot']:
+        """Create a snapshot from a binary pack, or return None if it is missing or stale."""
+        payload = load_fresh_payload(pack_file, inventory_dir)
+        if payload is None:
+            return None
+        
+        snapshot = cls(inventory_dir)
+        base = normalize_path(inventory_dir)
+        
+        for name, document in payload['documents'].items():
+            snapshot.inventory_files.append(snapshot.inventory_dir / name)
+            snapshot.documents[os.path.join(base, name)] = document
+        
+        for name, (kind, message) in payload['load_errors'].items():
+            snapshot.load_errors[os.path.join(base, name)] = _error_from_pack(kind, message)
+        
+        for index_name, index in payload['indexes'].items():
+            snapshot.indexes[index_name] = defaultdict(list, {
+                value: [os.path.join(base, name) for name in names]
+                for value, names in index.items()
+            })
+        
+        snapshot.validated_keys = payload.get('keys')
+        snapshot.loaded = True
+        return snapshot
+    
+    def write_pack(self, pack_file: PathLike, validated_keys: Optional[List[Dict[str, Any]]] = None,
+                   **metadata: Any):
+        """Write the snapshot, validated records and a source manifest as a binary pack."""
+        self.load_all()
+        names = {normalize_path(file_path): file_path.name for file_path in self.inventory_files}
+        
+        payload = dict(metadata)
+        payload.update({
+            "manifest": build_manifest(self.inventory_files),
+            "documents": {name: self.documents.get(key) for key, name in names.items()},
+            "load_errors": {names[key]: _error_to_pack(error)
+                            for key, error in self.load_errors.items() if key in names},
+            "indexes": {index_name: {value: [names[key] for key in keys] for value, keys in index.items()}
+                        for index_name, index in self.indexes.items()},
+            "keys": validated_keys if validated_keys is not None else self.validated_keys
+        })
+        write_pack(pack_file, payload)
+    
+    def load_all(self):
+        """Parse every YAML file in the inventory directory and build the indexes."""
+        if self.loaded:
+            return
+        
+        if self.inventory_dir.is_dir():
+            yaml_files = list(self.inventory_dir.glob('*.yaml')) + list(self.inventory_dir.glob('*.yml'))
+            for file_path in sorted(yaml_files):
+                key = normalize_path(file_path)
+                self.inventory_files.append(file_path)
+                self._load_file(key)
+                self._index(key)
+        
+        self.loaded = True
+    
+    def add_document(self, file_path: PathLike, document: Any, error: Optional[Exception] = None):
+        """Add an inventory file that was parsed elsewhere (e.g. by the builder)."""
+        key = normalize_path(file_path)
+        self.inventory_files.append(Path(file_path))
+        self.documents[key] = document
+        if error is not None:
+            self.load_errors[key] = error
+        self._index(key)
+        self.loaded = True
+    
+    def _load_file(self, key: str):
+        """Parse a single file into the snapshot, recording any load error."""
+        if key in self.documents:
+            return
+        
+        try:
+            with open(key, 'r', encoding='utf-8') as f:
+                self.documents[key] = safe_load(f)
+        except Exception as e:
+            self.documents[key] = None
+            self.load_errors[key] = e
+    
+    def _index(self, key: str):
+        """Add a loaded document to the lookup indexes."""
+        data = self.documents.get(key)
+        if not isinstance(data, dict):
+            return
+        
+        if isinstance(data.get('key_id'), str):
+            self.indexes['key_id'][data['key_id']].append(key)
+        if isinstance(data.get('alias'), str):
+            self.indexes['alias'][data['alias'].lower()].append(key)
+        if isinstance(data.get('owner'), str):
+            self.indexes['owner'][data['owner'].lower()].append(key)
+        if isinstance(data.get('environment'), str):
+            self.indexes['environment'][data['environment']].append(key)
+        if isinstance(data.get('tags'), list):
+            for tag in data['tags']:
+                if isinstance(tag, str):
+                    self.indexes['tag'][tag.lower()].append(key)
+    
+    def get(self, file_path: PathLike) -> Any:
+        """Return the parsed document for a file, loading it on first access.
+        
+        Returns None when the file is empty or could not be loaded; see error().
+        """
+        key = normalize_path(file_path)
+        self._load_file(key)
+        return self.documents[key]
+    
+    def error(self, file_path: PathLike) -> Optional[Exception]:
+        """Return the exception raised while loading a file, if any."""
+        return self.load_errors.get(normalize_path(file_path))
+    
+    def records(self, exclude: Optional[Set[str]] = None) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        """Iterate over ``(path, document)`` for every loaded inventory file.
+        
+        ``exclude`` holds normalized paths (see normalize_path) to skip.
+        Documents that are empty or not mappings are skipped.
+        """
+        self.load_all()
+        for file_path in self.inventory_files:
+            key = normalize_path(file_path)
+            if exclude and key in exclude:
+                continue
+            data = self.documents.get(key)
+            if isinstance(data, dict) and data:
+                yield file_path, data
+    
+    def lookup(self, index_name: str, value: str) -> List[Dict[str, Any]]:
+        """Return the documents whose indexed field matches ``value``."""
+        self.load_all()
+        if index_name in ('alias', 'owner', 'tag'):
+            value = value.lower()
+        return [self.documents[key] for key in self.indexes[index_name].get(value, [])]
+    
+    def paths_for(self, index_name: str, value: str) -> List[str]:
+        """Return the paths of the files whose indexed field matches ``value``."""
+        self.load_all()
+        if index_name in ('alias', 'owner', 'tag'):
+            value = value.lower()
+        return list(self.indexes[index_name].get(value, []))
+    
+    def by_key_id(self, key_id: str) -> List[Dict[str, Any]]:
+        """Documents with the given key_id (more than one means a duplicate)."""
+        return self.lookup('key_id', key_id)
+    
+    def by_alias(self, alias: str) -> List[Dict[str, Any]]:
+        """Documents with the given alias, compared case-insensitively."""
+        return self.lookup('alias', alias)
+    
+    def by_owner(self, owner: str) -> List[Dict[str, Any]]:
+        """Documents owned by the given email address."""
+        return self.lookup('owner', owner)
+    
+    def by_environment(self, environment: str) -> List[Dict[str, Any]]:
+        """Documents deployed to the given environment."""
+        return self.lookup('environment', environment)
+    
+    def by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Documents carrying the given tag."""
+        return self.lookup('tag', tag)
+    
+    def key_ids(self) -> Set[str]:
+        """All key IDs present in the inventory."""
+        self.load_all()
+        return set(self.indexes['key_id'])
+
+
+_snapshots: Dict[str, InventorySnapshot] = {}
+
+
+def load_snapshot(inventory_dir: PathLike = 'inventory',
+                  pack_file: Optional[PathLike] = DEFAULT_PACK_FILE) -> InventorySnapshot:
+    """Return the process-wide snapshot for an inventory directory, loading it once.
+    
+    A fresh binary pack written by build-data.py is used when available;
+    otherwise the YAML files are parsed.
+    """
+    key = normalize_path(inventory_dir)
+    if key not in _snapshots:
+        snapshot = InventorySnapshot.from_pack(pack_file, inventory_dir) if pack_file else None
+        _snapshots[key] = snapshot or InventorySnapshot.load(inventory_dir)
+    return _snapshots[key]
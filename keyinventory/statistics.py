@@ -0,0 +1,171 @@
+"""
+Inventory Statistics
+
+One-pass group-by counts over key records. A StatisticsEngine is configured
+with named dimensions (functions returning the group of a record), cross-tabs
+between pairs of dimensions and summed measures; run() walks the records once
+and updates all of them together. The resulting Statistics can be merged, so
+partial results computed by parallel workers add up to the same totals.
+
+from_table() computes the same counts from a KeyTable with one bincount per
+column or column pair when the dimensions are KeyTable categorical fields.
+"""
+
+from collections import Counter
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from keyinventory.table import KeyRecord, KeyTable, np
+
+
+Extractor = Callable[[Any], Any]
+
+# Group-by dimensions of the build statistics, as KeyRecord / KeyTable fields
+KEY_DIMENSIONS = ('environment', 'nist_classification', 'key_type', 'key_store_type', 'status', 'risk',
+                  'compliance_status')
+
+# Cross-tabs published in metadata.statistics.cross_tabs
+KEY_CROSSTABS = (('environment', 'risk'), ('environment', 'nist_classification'))
+
+
+def _add_counts(target: Dict[Any, int], source: Dict[Any, int]):
+    for value, count in source.items():
+        target[value] = target.get(value, 0) + count
+
+
+class Statistics:
+    """Counts, cross-tabs and sums produced by a StatisticsEngine."""
+    
+    def __init__(self, dimensions: Sequence[str] = (), crosstabs: Sequence[Tuple[str, str]] = (),
+                 measures: Sequence[str] = ()):
+        self.total = 0
+        self.counts: Dict[str, Dict[Any, int]] = {name: {} for name in dimensions}
+        self.crosstabs: Dict[Tuple[str, str], Dict[Any, Dict[Any, int]]] = {pair: {} for pair in crosstabs}
+        self.sums: Dict[str, Dict[Any, float]] = {name: {} for name in measures}
+    
+    def merge(self, other: 'Statistics') -> 'Statistics':
+        """Add another partial result into this one and return self."""
+        self.total += other.total
+        for name, counts in other.counts.items():
+            _add_counts(self.counts.setdefault(name, {}), counts)
+        for pair, table in other.crosstabs.items():
+            target = self.crosstabs.setdefault(pair, {})
+            for value, counts in table.items():
+                _add_counts(target.setdefault(value, {}), counts)
+        for name, sums in other.sums.items():
+            _add_counts(self.sums.setdefault(name, {}), sums)
+        return self
+    
+    def crosstab(self, row: str, column: str) -> Dict[Any, Dict[Any, int]]:
+        """Counts of ``column`` values for each value of ``row``."""
+        return self.crosstabs[(row, column)]
+    
+    def crosstabs_dict(self) -> Dict[str, Dict[Any, Dict[Any, int]]]:
+        """Cross-tabs keyed ``<row>_by_<column>``, for JSON output."""
+        return {f"{row}_by_{column}": {value: dict(counts) for value, counts in table.items()}
+                for (row, column), table in self.crosstabs.items()}
+
+
+class StatisticsEngine:
+    """Computes every configured statistic in a single pass over the records."""
+    
+    def __init__(self, dimensions: Dict[str, Extractor], crosstabs: Sequence[Tuple[str, str]] = (),
+                 measures: Optional[Dict[str, Tuple[str, Extractor]]] = None,
+                 prepare: Optional[Extractor] = None):
+        self.dimensions = dict(dimensions)
+        self.crosstab_pairs = tuple(crosstabs)
+        # Measure name -> (dimension it is grouped by, value extractor)
+        self.measures = dict(measures or {})
+        # Applied once to each record before the extractors run
+        self.prepare = prepare
+        for pair in self.crosstab_pairs:
+            for name in pair:
+                if name not in self.dimensions:
+                    raise ValueError(f"Cross-tab uses unknown dimension '{name}'")
+        for name, (dimension, _) in self.measures.items():
+            if dimension not in self.dimensions:
+                raise ValueError(f"Measure '{name}' uses unknown dimension '{dimension}'")
+    
+    @classmethod
+    def for_keys(cls, dimensions: Sequence[str] = KEY_DIMENSIONS,
+                 crosstabs: Sequence[Tuple[str, str]] = KEY_CROSSTABS) -> 'StatisticsEngine':
+        """Engine over KeyRecord fields; run() also accepts key definition dicts."""
+        return cls({name: attrgetter(name) for name in dimensions}, crosstabs, prepare=_as_record)
+    
+    def new(self) -> Statistics:
+        """An empty result to add records to or merge partial results into."""
+        return Statistics(self.dimensions, self.crosstab_pairs, self.measures)
+    
+    def add(self, stats: Statistics, record: Any):
+        """Count one record into ``stats``; records without a group are not counted there."""
+        stats.total += 1
+        if self.prepare is not None:
+            record = self.prepare(record)
+        groups = {}
+        for name, extract in self.dimensions.items():
+            value = groups[name] = extract(record)
+            if value is not None:
+                counts = stats.counts[name]
+                counts[value] = counts.get(value, 0) + 1
+        for row, column in self.crosstab_pairs:
+            row_value, column_value = groups[row], groups[column]
+            if row_value is not None and column_value is not None:
+                counts = stats.crosstabs[(row, column)].setdefault(row_value, {})
+                counts[column_value] = counts.get(column_value, 0) + 1
+        for name, (dimension, extract) in self.measures.items():
+            value = groups[dimension]
+            if value is not None:
+                sums = stats.sums[name]
+                sums[value] = sums.get(value, 0) + extract(record)
+    
+    def run(self, records: Iterable[Any]) -> Statistics:
+        """Compute the statistics of ``records`` in one pass."""
+        stats = self.new()
+        for record in records:
+            self.add(stats, record)
+        return stats
+    
+    def from_table(self, table: KeyTable) -> Statistics:
+        """Compute the statistics of a KeyTable column by column.
+        
+        Every dimension must be a categorical KeyTable field and the engine
+        must not have measures; otherwise the table rows are walked instead.
+        """
+        if self.measures or any(name not in table.codes for name in self.dimensions):
+            return self.run(table)
+        
+        stats = self.new()
+        stats.total = len(table)
+        for name in self.dimensions:
+            stats.counts[name] = table.counts(name)
+        for row, column in self.crosstab_pairs:
+            stats.crosstabs[(row, column)] = _crosstab(table, row, column)
+        return stats
+
+
+def _as_record(record: Any) -> KeyRecord:
+    return record if isinstance(record, KeyRecord) else KeyRecord.from_dict(record)
+
+
+def _crosstab(table: KeyTable, row: str, column: str) -> Dict[Any, Dict[Any, int]]:
+    """Count value pairs of two categorical columns from their combined codes."""
+    rows, columns = table.categories[row], table.categories[column]
+    width = len(columns) + 1
+    # Shift codes by one so that MISSING maps to 0 in both columns
+    if np is not None and len(table):
+        combined = ((np.frombuffer(table.codes[row], dtype=np.int32) + 1) * width
+                    + np.frombuffer(table.codes[column], dtype=np.int32) + 1)
+        totals = dict(enumerate(np.bincount(combined, minlength=(len(rows) + 1) * width).tolist()))
+    else:
+        totals = Counter((row_code + 1) * width + column_code + 1
+                         for row_code, column_code in zip(table.codes[row], table.codes[column]))
+    
+    result: Dict[Any, Dict[Any, int]] = {}
+    for row_code, row_value in enumerate(rows):
+        base = (row_code + 1) * width
+        counts = {column_value: totals.get(base + column_code + 1, 0)
+                  for column_code, column_value in enumerate(columns)}
+        counts = {value: count for value, count in counts.items() if count}
+        if counts:
+            result[row_value] = counts
+    return result
@@ -0,0 +1,246 @@
+"""
+Synthetic Inventories
+
+Generates realistic key inventories of any size for scale testing. Each key
+starts from a template definition (templates/enhanced-key-example.yaml by
+default) and gets its own id, alias, owner, dates, location and
+relationships to earlier keys and to a pool of consuming services. A share
+of the files use the minimal legacy layout, and some are deliberately
+broken: duplicated key ids or aliases and invalid definitions of several
+kinds (bad YAML, missing fields, out-of-range values).
+
+Generation is deterministic for a given seed, so inventories can be
+regenerated identically instead of being committed.
+"""
+
+import copy
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import yaml
+
+from keyinventory.yaml_loader import load_yaml_file
+
+try:
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
+
+
+PathLike = Union[str, Path]
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent.parent / 'templates' / 'enhanced-key-example.yaml'
+
+# Written into the output directory; not a YAML file, so never read as a key
+MANIFEST_FILE = '.synthetic.json'
+
+# Fields kept in the minimal (legacy layout) definitions
+LEGACY_FIELDS = ('key_id', 'alias', 'environment', 'owner', 'purpose', 'created_at',
+                 'rotation_interval_days', 'location', 'compliance', 'tags')
+
+ENVIRONMENT_WEIGHTS = (('prod', 40), ('production', 5), ('staging', 20), ('stage', 5), ('dev', 30))
+TEAMS = ('payments', 'platform', 'identity', 'data', 'security', 'mobile', 'fraud', 'billing', 'search', 'infra')
+SYSTEMS = ('visa', 'mastercard', 'amex', 'checkout', 'ledger', 'session', 'webhook', 'backup', 'reporting',
+           'tokenization', 'customer', 'audit', 'logging', 'notification', 'pricing', 'catalog')
+USES = ('encryption', 'signing', 'tokenization', 'auth', 'hmac', 'api', 'database', 'storage')
+KEY_TYPES = ('symmetric', 'rsa', 'ec', 'api-key', 'jwt')
+STORES = ('aws-kms', 'azure-kv', 'hashicorp-vault', 'custom')
+CLASSIFICATIONS = ('internal', 'confidential', 'secret', 'top-secret')
+PCI_SCOPES = ('none', 'cardholder-data', 'out-of-scope')
+STATUSES = (('active', 85), ('deprecated', 8), ('revoked', 4), ('emergency-replaced', 3))
+RISKS = ('low', 'medium', 'high', 'critical')
+COMPLIANCE = (('compliant', 80), ('needs-review', 15), ('non-compliant', 5))
+INTERVALS = (30, 60, 90, 180, 365)
+
+# Defects of the invalid files, chosen in turn
+DEFECTS = ('yaml', 'missing_field', 'key_id', 'environment', 'owner', 'rotation_interval', 'created_at', 'tags')
+
+
+def parse_count(text: str) -> int:
+    """Parse a key count such as ``1500``, ``10k`` or ``1M``."""
+    text = text.strip().lower().replace('_', '')
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(text[:-1] if multiplier > 1 else text) * multiplier
+
+
+def format_count(count: int) -> str:
+    """Inverse of parse_count() for round numbers: ``10k``, ``1m``."""
+    for suffix, size in (('m', 1000000), ('k', 1000)):
+        if count >= size and count % size == 0:
+            return f"{count // size}{suffix}"
+    return str(count)
+
+
+def _weighted(rng: random.Random, choices: Tuple[Tuple[str, int], ...]) -> str:
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+class InventoryGenerator:
+    """Deterministic generator of synthetic key definitions."""
+    
+    def __init__(self, template: PathLike = DEFAULT_TEMPLATE, seed: int = 0, legacy_ratio: float = 0.2,
+                 duplicate_ratio: float = 0.01, invalid_ratio: float = 0.01,
+                 now: Optional[datetime] = None):
+        self.template = load_yaml_file(template)
+        self.seed = seed
+        self.legacy_ratio = legacy_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.invalid_ratio = invalid_ratio
+        self.now = now or datetime(2025, 1, 1, tzinfo=timezone.utc)
+    
+    def documents(self, count: int) -> Iterator[Tuple[str, str, str]]:
+        """Yield ``(file name, YAML text, kind)`` for ``count`` files.
+        
+        ``kind`` is one of ``enhanced``, ``legacy``, ``duplicate_key_id``,
+        ``duplicate_alias`` or ``invalid``.
+        """
+        rng = random.Random(self.seed)
+        # Consuming services grow with the inventory, a few dozen keys each
+        services = [f"{rng.choice(SYSTEMS)}-{rng.choice(('service', 'api', 'gateway', 'worker', 'processor'))}-{n}"
+                    for n in range(max(20, count // 25))]
+        key_ids: List[str] = []
+        aliases: List[str] = []
+        
+        for number in range(count):
+            key_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            data = self._definition(rng, number, key_id, key_ids, services)
+            file_name = f"{key_id}.yaml"
+            kind = 'legacy' if rng.random() < self.legacy_ratio else 'enhanced'
+            if kind == 'legacy':
+                data = {field: data[field] for field in LEGACY_FIELDS}
+            
+            roll = rng.random()
+            defect = None
+            if key_ids and roll < self.duplicate_ratio:
+                # Another file claiming an existing id, or reusing an existing alias
+                if rng.random() < 0.5:
+                    data['key_id'] = rng.choice(key_ids)
+                    kind = 'duplicate_key_id'
+                else:
+                    data['alias'] = rng.choice(aliases)
+                    kind = 'duplicate_alias'
+            elif roll < self.duplicate_ratio + self.invalid_ratio:
+                defect = DEFECTS[number % len(DEFECTS)]
+                self._break(data, defect)
+                kind = 'invalid'
+            
+            if kind in ('enhanced', 'legacy', 'duplicate_alias'):
+                key_ids.append(key_id)
+                aliases.append(data['alias'])
+            
+            text = yaml.dump(data, Dumper=Dumper, sort_keys=False, allow_unicode=True)
+            if defect == 'yaml':
+                text += "tags: [unclosed\n"
+            yield file_name, text, kind
+    
+    def _definition(self, rng: random.Random, number: int, key_id: str, key_ids: List[str],
+                    services: List[str]) -> Dict[str, Any]:
+        data = copy.deepcopy(self.template)
+        environment = _weighted(rng, ENVIRONMENT_WEIGHTS)
+        team = rng.choice(TEAMS)
+        system = rng.choice(SYSTEMS)
+        use = rng.choice(USES)
+        store = rng.choice(STORES)
+        created = self.now - timedelta(days=rng.randint(1, 1100), seconds=rng.randint(0, 86399))
+        interval = rng.choice(INTERVALS)
+        rotated = min(created + timedelta(days=interval * rng.randint(0, 4)), self.now)
+        alias = f"{system}-{use}-{environment}-{number}"
+        
+        data.update({
+            'key_id': key_id,
+            'alias': alias,
+            'environment': environment,
+            'owner': f"{team}-team@company.com",
+            'purpose': f"{use.capitalize()} key for the {system} {team} systems ({environment})",
+            'created_at': created.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'rotation_interval_days': interval,
+            'location': self._location(store, team, environment, system, use, key_id),
+            'tags': list(dict.fromkeys((use, system, team, environment))),
+        })
+        data['compliance'].update({
+            'pci_scope': rng.choice(PCI_SCOPES),
+            'nist_classification': rng.choice(CLASSIFICATIONS),
+        })
+        data['lifecycle'].update({
+            'status': _weighted(rng, STATUSES),
+            'approved_at': (created + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'last_rotated_at': rotated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'next_rotation_due': (rotated + timedelta(days=interval)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'rotation_count': (rotated - created).days // interval,
+            'emergency_contact': f"{team}-oncall@company.com",
+        })
+        data['technical'].update({
+            'key_type': rng.choice(KEY_TYPES),
+            'key_size': rng.choice((256, 2048, 4096)),
+            'key_store_type': store,
+        })
+        data['relationships'] = {
+            'depends_on': rng.sample(key_ids, min(len(key_ids), rng.choice((0, 0, 0, 1, 2)))),
+            'used_by': rng.sample(services, rng.randint(1, 3)),
+            'related_keys': rng.sample(key_ids, min(len(key_ids), rng.choice((0, 0, 1)))),
+            'environments': [environment],
+        }
+        data['audit']['compliance_status'] = _weighted(rng, COMPLIANCE)
+        data['metadata']['risk_assessment'] = rng.choice(RISKS)
+        return data
+    
+    @staticmethod
+    def _location(store: str, team: str, environment: str, system: str, use: str, key_id: str) -> str:
+        if store == 'aws-kms':
+            return f"aws-kms://arn:aws:kms:us-east-1:123456789012:key/{key_id}"
+        if store == 'azure-kv':
+            return f"azure-key-vault://{team}-{environment}-vault.vault.azure.net/keys/{system}-{use}"
+        if store == 'hashicorp-vault':
+            return f"hashicorp://{team}-kv/kv/data/{system}/{use}-{key_id[:8]}"
+        return f"gcp-kms://projects/{team}-{environment}/locations/us-central1/keyRings/{system}/cryptoKeys/{use}"
+    
+    @staticmethod
+    def _break(data: Dict[str, Any], defect: str):
+        if defect == 'missing_field':
+            del data['owner']
+        elif defect == 'key_id':
+            data['key_id'] = data['key_id'][:-4]
+        elif defect == 'environment':
+            data['environment'] = 'qa'
+        elif defect == 'owner':
+            data['owner'] = 'not-an-email'
+        elif defect == 'rotation_interval':
+            data['rotation_interval_days'] = 0
+        elif defect == 'created_at':
+            data['created_at'] = 'yesterday'
+        elif defect == 'tags':
+            data['tags'] = ['has space']
+    
+    def write(self, output_dir: PathLike, count: int) -> Dict[str, Any]:
+        """Write ``count`` files to ``output_dir`` and return the manifest of what was generated."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        kinds: Dict[str, int] = {}
+        for file_name, text, kind in self.documents(count):
+            (output_dir / file_name).write_text(text, encoding='utf-8')
+            kinds[kind] = kinds.get(kind, 0) + 1
+        
+        manifest = {
+            "count": count,
+            "seed": self.seed,
+            "legacy_ratio": self.legacy_ratio,
+            "duplicate_ratio": self.duplicate_ratio,
+            "invalid_ratio": self.invalid_ratio,
+            "files": kinds,
+        }
+        with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def read_manifest(output_dir: PathLike) -> Optional[Dict[str, Any]]:
+    """The manifest of a generated inventory, or None if it was not generated."""
+    try:
+        with open(Path(output_dir) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,183 @@
+"""
+Key Table
+
+Compact in-memory views of validated key records. KeyRecord holds the fields
+the aggregations use in ``__slots__`` instead of a nested dict, and KeyTable
+stores the same fields column by column, with categorical fields kept as
+integer codes into a list of interned values. Counting a categorical column
+is then a single pass over an integer array (a NumPy ``bincount`` when NumPy
+is installed).
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+NUMPY_AVAILABLE = np is not None
+
+# Code stored for records that do not have a categorical field
+MISSING = -1
+
+# Record fields and where they are read from in a key definition
+FIELD_PATHS = {
+    'key_id': ('key_id',),
+    'alias': ('alias',),
+    'environment': ('environment',),
+    'owner': ('owner',),
+    'created_at': ('created_at',),
+    'rotation_interval_days': ('rotation_interval_days',),
+    'status': ('lifecycle', 'status'),
+    'pci_scope': ('compliance', 'pci_scope'),
+    'nist_classification': ('compliance', 'nist_classification'),
+    'risk': ('metadata', 'risk_assessment'),
+    'key_type': ('technical', 'key_type'),
+    'key_store_type': ('technical', 'key_store_type'),
+    'compliance_status': ('audit', 'compliance_status'),
+}
+
+# Fields stored as interned codes in a KeyTable
+CATEGORICAL_FIELDS = ('environment', 'owner', 'status', 'pci_scope', 'nist_classification', 'risk',
+                      'key_type', 'key_store_type', 'compliance_status')
+
+# Sections whose presence marks a key definition as using the enhanced schema
+ENHANCED_SECTIONS = ('lifecycle', 'technical', 'relationships', 'operational', 'audit', 'metadata')
+
+
+def _field(data: Dict[str, Any], path) -> Any:
+    value: Any = data
+    for part in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class KeyRecord:
+    """The hot fields of one key definition."""
+    
+    __slots__ = tuple(FIELD_PATHS) + ('enhanced',)
+    
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KeyRecord':
+        """Extract the record fields from a (validated) key definition."""
+        record = cls.__new__(cls)
+        for name, path in FIELD_PATHS.items():
+            setattr(record, name, _field(data, path))
+        if record.status is None:
+            # Keys without a lifecycle status are treated as active
+            record.status = 'active'
+        record.enhanced = any(section in data for section in ENHANCED_SECTIONS)
+        return record
+    
+    def __repr__(self) -> str:
+        return f"KeyRecord(key_id={self.key_id!r}, alias={self.alias!r}, environment={self.environment!r})"
+
+
+class KeyTable:
+    """Key records stored column by column, with categorical fields as codes."""
+    
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self.key_ids: List[Any] = []
+        self.aliases: List[Any] = []
+        self.created_at: List[Any] = []
+        # Rotation intervals; MISSING where a record has none
+        self.rotation_interval_days = array('q')
+        self.enhanced = array('b')
+        self.codes: Dict[str, array] = {field: array('i') for field in CATEGORICAL_FIELDS}
+        # Distinct values of each categorical field, in order of first appearance
+        self.categories: Dict[str, List[Any]] = {field: [] for field in CATEGORICAL_FIELDS}
+        self._lookup: Dict[str, Dict[Any, int]] = {field: {} for field in CATEGORICAL_FIELDS}
+        self.extend(records)
+    
+    def __len__(self) -> int:
+        return len(self.key_ids)
+    
+    def __iter__(self) -> Iterator[KeyRecord]:
+        return (self.record(row) for row in range(len(self)))
+    
+    def _code(self, field: str, value: Any) -> int:
+        if value is None:
+            return MISSING
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(lookup)
+            self.categories[field].append(sys.intern(value) if type(value) is str else value)
+        return code
+    
+    def append(self, data: Dict[str, Any]):
+        """Add a key definition (or a KeyRecord) as a new row."""
+        record = data if isinstance(data, KeyRecord) else KeyRecord.from_dict(data)
+        self.key_ids.append(record.key_id)
+        self.aliases.append(record.alias)
+        self.created_at.append(record.created_at)
+        days = record.rotation_interval_days
+        self.rotation_interval_days.append(days if type(days) is int else MISSING)
+        self.enhanced.append(bool(record.enhanced))
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field].append(self._code(field, getattr(record, field)))
+    
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """Add several key definitions."""
+        for data in records:
+            self.append(data)
+    
+    def record(self, row: int) -> KeyRecord:
+        """Rebuild the KeyRecord stored at ``row``."""
+        fields = {field: self.value(field, row) for field in CATEGORICAL_FIELDS}
+        days = self.rotation_interval_days[row]
+        return KeyRecord(key_id=self.key_ids[row], alias=self.aliases[row], created_at=self.created_at[row],
+                         rotation_interval_days=None if days == MISSING else days,
+                         enhanced=bool(self.enhanced[row]), **fields)
+    
+    def value(self, field: str, row: int) -> Any:
+        """Decoded value of a categorical field at ``row``."""
+        code = self.codes[field][row]
+        return None if code == MISSING else self.categories[field][code]
+    
+    def column(self, field: str) -> List[Any]:
+        """Decoded values of a categorical field, one per row."""
+        categories = self.categories[field]
+        return [None if code == MISSING else categories[code] for code in self.codes[field]]
+    
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Count the rows per value of a categorical field, in order of first appearance.
+        
+        Rows without the field are not counted.
+        """
+        categories = self.categories[field]
+        codes = self.codes[field]
+        if np is not None and codes:
+            # Shift by one so MISSING lands in bin 0
+            totals = np.bincount(np.frombuffer(codes, dtype=np.int32) + 1,
+                                 minlength=len(categories) + 1)[1:].tolist()
+        else:
+            totals = [0] * (len(categories) + 1)
+            for code in codes:
+                totals[code + 1] += 1
+            totals = totals[1:]
+        return {value: total for value, total in zip(categories, totals) if total}
+    
+    def rows(self, field: str, value: Any) -> List[int]:
+        """Row numbers whose categorical ``field`` equals ``value``."""
+        code = self._lookup[field].get(value)
+        if code is None:
+            return []
+        codes = self.codes[field]
+        if np is not None:
+            return np.flatnonzero(np.frombuffer(codes, dtype=np.int32) == code).tolist()
+        return [row for row, row_code in enumerate(codes) if row_code == code]
+    
+    def enhanced_count(self) -> int:
+        """Number of rows using the enhanced schema."""
+        return sum(self.enhanced)
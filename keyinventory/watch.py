@@ -0,0 +1,125 @@
+"""
+Inventory Watcher
+
+Reports batches of changed inventory files for build-data.py --watch. Uses
+filesystem events through the optional ``watchdog`` package (inotify on
+Linux, FSEvents on macOS) and falls back to polling file sizes and
+modification times when it is not installed.
+"""
+
+import os
+import queue
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Set, Tuple, Union
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+PathLike = Union[str, Path]
+
+WATCHDOG_AVAILABLE = Observer is not None
+
+INVENTORY_SUFFIXES = ('.yaml', '.yml')
+
+
+class _QueueHandler(FileSystemEventHandler):
+    """Forwards the names of touched inventory files to a queue."""
+    
+    def __init__(self, events: 'queue.Queue[str]', suffixes: Tuple[str, ...]):
+        super().__init__()
+        self.events = events
+        self.suffixes = suffixes
+    
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Editors often save by writing a temporary file and renaming it
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            name = os.path.basename(os.fsdecode(path)) if path else ''
+            if name.endswith(self.suffixes):
+                self.events.put(name)
+
+
+class InventoryWatcher:
+    """Yields the names of inventory files changed since the previous batch."""
+    
+    def __init__(self, directory: PathLike, interval: float = 0.5, debounce: float = 0.05,
+                 suffixes: Tuple[str, ...] = INVENTORY_SUFFIXES, use_events: bool = True):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.debounce = debounce
+        self.suffixes = suffixes
+        self._events: 'queue.Queue[str]' = queue.Queue()
+        self._observer = None
+        self._state: Dict[str, Tuple[int, int]] = {}
+        
+        if use_events and WATCHDOG_AVAILABLE:
+            self._observer = Observer()
+            self._observer.schedule(_QueueHandler(self._events, suffixes), str(self.directory), recursive=False)
+            self._observer.start()
+        else:
+            self._state = self._scan()
+    
+    @property
+    def backend(self) -> str:
+        """Name of the change detection mechanism in use."""
+        return "filesystem events" if self._observer is not None else f"polling every {self.interval}s"
+    
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(self.suffixes) and entry.is_file():
+                        stat = entry.stat()
+                        state[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return state
+    
+    def _poll(self) -> Set[str]:
+        current = self._scan()
+        changed = {name for name in current.keys() | self._state.keys()
+                   if current.get(name) != self._state.get(name)}
+        self._state = current
+        return changed
+    
+    def _next_event_batch(self, timeout: float) -> Set[str]:
+        try:
+            names = {self._events.get(timeout=timeout)}
+        except queue.Empty:
+            return set()
+        # Collect the burst of events a single save usually produces
+        deadline = time.monotonic() + self.debounce
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                names.add(self._events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return names
+    
+    def changes(self) -> Iterator[Set[str]]:
+        """Block until files change and yield their names, forever."""
+        while True:
+            if self._observer is not None:
+                names = self._next_event_batch(timeout=1.0)
+            else:
+                time.sleep(self.interval)
+                names = self._poll()
+            if names:
+                yield names
+    
+    def stop(self):
+        """Stop the filesystem observer, if any."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
@@ -0,0 +1,57 @@
+"""
+Shared YAML Loader
+
+Single entry point for parsing inventory YAML. Uses the libyaml based
+CSafeLoader when PyYAML was built with it and falls back to the pure-Python
+SafeLoader otherwise.
+"""
+
+from pathlib import Path
+from typing import Any, Iterable, List, Union
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as Loader
+except ImportError:
+    from yaml import SafeLoader as Loader
+
+
+LIBYAML_AVAILABLE = Loader is not yaml.SafeLoader
+
+
+def safe_load(stream) -> Any:
+    """Drop-in replacement for yaml.safe_load using the fastest safe loader."""
+    return yaml.load(stream, Loader=Loader)
+
+
+def load_yaml_file(file_path: Union[str, Path]) -> Any:
+    """Load a single YAML file."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return safe_load(f)
+
+
+def check_parity(paths: Iterable[Union[str, Path]]) -> List[str]:
+    """Compare CSafeLoader and SafeLoader results for each file.
+    
+    Returns a list of mismatch descriptions; an empty list means both loaders
+    agree on every file (including files that fail to parse in both).
+    """
+    mismatches = []
+    
+    for file_path in paths:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        results = []
+        for loader in (yaml.SafeLoader, Loader):
+            try:
+                results.append(('ok', yaml.load(content, Loader=loader)))
+            except yaml.YAMLError as e:
+                results.append(('error', type(e).__name__))
+        
+        if results[0] != results[1]:
+            mismatches.append(f"{file_path}: SafeLoader={results[0]!r} {Loader.__name__}={results[1]!r}")
+    
+    return mismatches
+
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Scale Benchmark Suite
+Times build-data.py and the inventory scripts on synthetic inventories of
+increasing size and records wall time, throughput and peak RSS of each run
+in a JSON lines results file, so that runs can be compared across commits
+
+Inventories are generated by keyinventory.synthetic and kept in the work
+directory between runs. Each command runs in its own process, with the
+work directory of its size as the current directory.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory.synthetic import InventoryGenerator, format_count, parse_count, read_manifest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / 'scripts'
+
+DEFAULT_SIZES = '1k,10k,100k'
+DEFAULT_WORK_DIR = '.benchmark-inventories'
+DEFAULT_RESULTS = 'benchmark-results.jsonl'
+
+# Benchmark name -> command, given the PR-sized sample of files to check
+BENCHMARKS = {
+    'build-data': lambda sample: [ROOT / 'build-data.py', '--no-backup', '--no-cache',
+                                  '--input-dir', 'inventory', '--output-file', 'output/keys.json'],
+    'check-duplicates': lambda sample: [SCRIPTS_DIR / 'check-duplicates.py', *sample],
+    'check-rotation-due': lambda sample: [SCRIPTS_DIR / 'check-rotation-due.py', '--output-json'],
+    'compliance-check': lambda sample: [SCRIPTS_DIR / 'compliance-check.py', *sample],
+    'generate-compliance-report': lambda sample: [SCRIPTS_DIR / 'generate-compliance-report.py',
+                                                  '--inventory-dir', 'inventory', '--output-dir', 'output/reports'],
+}
+
+
+def git_commit() -> Optional[str]:
+    """The checked-out commit, with ``-dirty`` when there are local changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if status else commit
+
+
+def prepare_inventory(work_dir: Path, count: int, seed: int) -> Path:
+    """Generate the inventory of ``count`` keys unless an identical one exists."""
+    workspace = work_dir / format_count(count)
+    inventory = workspace / 'inventory'
+    manifest = read_manifest(inventory)
+    if manifest and manifest.get('count') == count and manifest.get('seed') == seed:
+        return workspace
+    
+    if inventory.exists():
+        for path in inventory.iterdir():
+            path.unlink()
+    print(f"Generating {count} keys in {inventory}...")
+    started = time.perf_counter()
+    InventoryGenerator(seed=seed).write(inventory, count)
+    print(f"  done in {time.perf_counter() - started:.1f}s")
+    return workspace
+
+
+def run_command(command: List[Any], workspace: Path, log_file: Path) -> Dict[str, Any]:
+    """Run a command to completion, returning its exit code, wall time and peak RSS."""
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_file, 'w', encoding='utf-8') as log:
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, *map(str, command)], cwd=workspace,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            # The resource usage of this child alone, not of all children so far
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            peak_rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        else:
+            process.wait()
+            peak_rss = None
+        seconds = time.perf_counter() - started
+    
+    return {
+        "exit_code": process.returncode,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1) if peak_rss is not None else None,
+    }
+
+
+def load_results(path: Path) -> List[Dict[str, Any]]:
+    """Previous results from the results file."""
+    results = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    results.append(json.loads(line))
+    except (OSError, ValueError):
+        pass
+    return results
+
+
+def previous_result(results: List[Dict[str, Any]], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The latest earlier result of the same benchmark and size from another commit."""
+    for previous in reversed(results):
+        if (previous.get('benchmark') == result['benchmark'] and previous.get('keys') == result['keys']
+                and previous.get('commit') != result['commit']):
+            return previous
+    return None
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the build and the scripts on synthetic inventories')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                      help=f'Comma-separated inventory sizes, e.g. 1k,10k,100k,1M (default: {DEFAULT_SIZES})')
+    parser.add_argument('--benchmark', choices=sorted(BENCHMARKS), action='append',
+                      help='Benchmark to run; may be repeated (default: all)')
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR,
+                      help=f'Directory for the generated inventories and outputs (default: {DEFAULT_WORK_DIR})')
+    parser.add_argument('--results', default=DEFAULT_RESULTS,
+                      help=f'JSON lines file the results are appended to (default: {DEFAULT_RESULTS})')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='Seed of the generated inventories (default: 0)')
+    parser.add_argument('--pr-files', type=int, default=10,
+                      help='Files passed to the PR check scripts (default: 10)')
+    parser.add_argument('--repeat', type=int, default=1,
+                      help='Runs per benchmark; the fastest one is recorded (default: 1)')
+    
+    args = parser.parse_args()
+    
+    sizes = [parse_count(size) for size in args.sizes.split(',') if size.strip()]
+    names = args.benchmark or list(BENCHMARKS)
+    work_dir = Path(args.work_dir).resolve()
+    results_path = Path(args.results)
+    previous = load_results(results_path)
+    
+    run_info = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    
+    print(f"{'benchmark':<28} {'keys':>8} {'seconds':>9} {'keys/s':>10} {'peak MB':>9} {'exit':>5}  change")
+    results = []
+    for count in sizes:
+        workspace = prepare_inventory(work_dir, count, args.seed)
+        sample = [f"inventory/{path.name}" for path in sorted((workspace / 'inventory').glob('*.yaml'))[:args.pr_files]]
+        
+        for name in names:
+            runs = [run_command(BENCHMARKS[name](sample), workspace, workspace / 'output' / f"{name}.log")
+                    for _ in range(max(1, args.repeat))]
+            best = min(runs, key=lambda run: run["seconds"])
+            result = {
+                **run_info,
+                "benchmark": name,
+                "keys": count,
+                **best,
+                "keys_per_second": round(count / best["seconds"], 1) if best["seconds"] else None,
+            }
+            results.append(result)
+            
+            change = ''
+            earlier = previous_result(previous, result)
+            if earlier and earlier.get('seconds'):
+                change = f"{(result['seconds'] / earlier['seconds'] - 1) * 100:+.1f}% vs {earlier.get('commit')}"
+            peak = f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else '-'
+            print(f"{name:<28} {count:>8} {result['seconds']:>9.2f} {result['keys_per_second'] or 0:>10.0f} "
+                  f"{peak:>9} {result['exit_code']:>5}  {change}")
+    
+    with open(results_path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    print(f"\nAppended {len(results)} results to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Schema Validator Benchmark
+Measures how many key records per second the compiled schema validator
+checks, using the inventory files as the workload
+"""
+
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot
+from keyinventory.schema import ValidationError, compile_schema
+
+
+def benchmark(records, rounds: int) -> float:
+    """Validate every record ``rounds`` times and return validations per second."""
+    validator = compile_schema()
+    # validate() normalizes in place, so each round gets fresh shallow copies
+    batches = [[dict(record) for record in records] for _ in range(rounds)]
+    
+    started = time.perf_counter()
+    for batch in batches:
+        for record in batch:
+            try:
+                validator.validate(record)
+            except ValidationError:
+                pass
+    elapsed = time.perf_counter() - started
+    
+    return len(records) * rounds / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the compiled key schema validator')
+    parser.add_argument('--input-dir', default='inventory',
+                      help='Directory of key files used as the workload (default: inventory)')
+    parser.add_argument('--rounds', type=int, default=2000,
+                      help='Number of passes over the workload (default: 2000)')
+    parser.add_argument('--compile', action='store_true',
+                      help='Also time compiling the schema table')
+    
+    args = parser.parse_args()
+    
+    snapshot = InventorySnapshot(args.input_dir)
+    records = [copy.deepcopy(data) for _, data in snapshot.records()]
+    if not records:
+        print(f"No key files found in {args.input_dir}")
+        sys.exit(1)
+    
+    if args.compile:
+        started = time.perf_counter()
+        compile_schema()
+        print(f"Schema compiled in {(time.perf_counter() - started) * 1000:.2f} ms")
+    
+    rate = benchmark(records, args.rounds)
+    print(f"Validated {len(records)} records x {args.rounds} rounds: {rate:,.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,40 @@
 """
 Duplicate Check Script
 Checks for duplicate key IDs and aliases in the inventory
+
+With --changed-since, only the files changed since a base revision are read;
+existing key IDs and aliases are looked up in the key index database of the
+last main-branch build (docs/keys.index.db), or taken from its binary pack
+(docs/keys.pack), instead of parsing the whole inventory.
 """
 
+import argparse
 import os
 import sys
-import yaml
 from pathlib import Path
-from typing import Set, Dict, List, Any
+from typing import Set, Dict, List, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import DEFAULT_PACK_FILE, InventorySnapshot, load_snapshot
+from keyinventory.changes import ChangeSet, GitError, git_changes
+from keyinventory.index import DEFAULT_INDEX_FILE, KeyIndex
 
 
-def load_key_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a key file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
-    except Exception as e:
-        print(f"Warning: Could not load {file_path}: {e}")
-        return {}
+def load_key_file(file_path: str, snapshot: Optional[InventorySnapshot] = None) -> Dict[str, Any]:
+    """Load and parse a key file through the shared inventory snapshot."""
+    snapshot = snapshot or load_snapshot()
+    data = snapshot.get(file_path)
+    return data if isinstance(data, dict) else {}
 
 
-def check_duplicates(new_files: List[str]) -> List[str]:
-    """Check for duplicate key IDs and aliases."""
+def check_duplicates(new_files: List[str], snapshot: Optional[InventorySnapshot] = None,
+                     index: Optional[KeyIndex] = None) -> List[str]:
+    """Check for duplicate key IDs and aliases.
+    
+    ``index`` holds the existing keys without the files being checked; when it
+    is not given it is built from the full inventory snapshot.
+    """
     errors = []
     
     # Get all existing inventory files
@@ -30,22 +43,15 @@ def check_duplicates(new_files: List[str]) -> List[str]:
     if not inventory_dir.exists():
         return ["Inventory directory not found"]
     
-    existing_files = list(inventory_dir.glob('*.yaml')) + list(inventory_dir.glob('*.yml'))
-    
-    # Load existing keys
-    existing_key_ids = set()
-    existing_aliases = set()
+    if index is None:
+        # Load existing keys, skipping files that are being added/modified in this PR
+        snapshot = snapshot or load_snapshot(inventory_dir)
+        index = KeyIndex.from_snapshot(snapshot, exclude=new_files)
+    else:
+        snapshot = snapshot or InventorySnapshot(inventory_dir)
     
-    for file_path in existing_files:
-        # Skip files that are being added/modified in this PR
-        if str(file_path) in new_files:
-            continue
-        
-        data = load_key_file(str(file_path))
-        if 'key_id' in data:
-            existing_key_ids.add(data['key_id'])
-        if 'alias' in data:
-            existing_aliases.add(data['alias'].lower())
+    existing_key_ids = index.key_ids
+    existing_aliases = index.aliases
     
     # Check new files for duplicates
     new_key_ids = set()
@@ -56,7 +62,7 @@ def check_duplicates(new_files: List[str]) -> List[str]:
             continue
         
         filename = os.path.basename(file_path)
-        data = load_key_file(file_path)
+        data = load_key_file(file_path, snapshot)
         
         if not data:
             continue
@@ -92,7 +98,8 @@ def check_duplicates(new_files: List[str]) -> List[str]:
     return errors
 
 
-def check_related_keys(new_files: List[str]) -> List[str]:
+def check_related_keys(new_files: List[str], snapshot: Optional[InventorySnapshot] = None,
+                       index: Optional[KeyIndex] = None) -> List[str]:
     """Check if related keys exist in inventory."""
     errors = []
     
@@ -101,22 +108,24 @@ def check_related_keys(new_files: List[str]) -> List[str]:
     if not inventory_dir.exists():
         return []
     
-    existing_files = list(inventory_dir.glob('*.yaml')) + list(inventory_dir.glob('*.yml'))
-    existing_key_ids = set()
-    
-    for file_path in existing_files:
-        data = load_key_file(str(file_path))
-        if 'key_id' in data:
-            existing_key_ids.add(data['key_id'])
+    if index is None:
+        snapshot = snapshot or load_snapshot(inventory_dir)
+        index = KeyIndex(key_ids={data['key_id'] for _, data in snapshot.records() if 'key_id' in data})
+    else:
+        snapshot = snapshot or InventorySnapshot(inventory_dir)
     
-    # Add new key IDs to the set
+    # Key IDs of the new files; the index is only queried, never copied
+    new_key_ids = set()
     for file_path in new_files:
         if not file_path.strip():
             continue
         
-        data = load_key_file(file_path)
+        data = load_key_file(file_path, snapshot)
         if 'key_id' in data:
-            existing_key_ids.add(data['key_id'])
+            new_key_ids.add(data['key_id'])
+    
+    def exists(key_id: Any) -> bool:
+        return key_id in new_key_ids or key_id in index.key_ids
     
     # Check relationships in new files
     for file_path in new_files:
@@ -124,7 +133,7 @@ def check_related_keys(new_files: List[str]) -> List[str]:
             continue
         
         filename = os.path.basename(file_path)
-        data = load_key_file(file_path)
+        data = load_key_file(file_path, snapshot)
         
         if not data:
             continue
@@ -136,40 +145,57 @@ def check_related_keys(new_files: List[str]) -> List[str]:
             # Check depends_on
             if 'depends_on' in relationships and isinstance(relationships['depends_on'], list):
                 for dep_key_id in relationships['depends_on']:
-                    if dep_key_id not in existing_key_ids:
+                    if not exists(dep_key_id):
                         errors.append(f"{filename}: Referenced key in depends_on '{dep_key_id}' does not exist")
             
             # Check related_keys
             if 'related_keys' in relationships and isinstance(relationships['related_keys'], list):
                 for related_key_id in relationships['related_keys']:
-                    if related_key_id not in existing_key_ids:
+                    if not exists(related_key_id):
                         errors.append(f"{filename}: Referenced key in related_keys '{related_key_id}' does not exist")
     
     return errors
 
 
-def main():
-    """Main function."""
-    if len(sys.argv) < 2:
-        print("Usage: check-duplicates.py <file1> [file2] ...")
-        sys.exit(1)
+def load_changed_index(changes: ChangeSet, pack_file: str = DEFAULT_PACK_FILE,
+                       index_file: str = DEFAULT_INDEX_FILE) -> Optional[KeyIndex]:
+    """Return the base-branch key index for a change set, or None to check the full inventory.
     
-    new_files = [f for f in sys.argv[1:] if f.strip()]
-    
-    if not new_files:
-        print("No files to check")
-        sys.exit(0)
+    The key index database is preferred; the pack is the fallback.
+    """
+    index = KeyIndex.from_database(index_file, 'inventory', changes)
+    if index is None:
+        index = KeyIndex.for_changes(pack_file, 'inventory', changes)
+    if index is None:
+        print(f"Note: neither {index_file} nor {pack_file} matches the base inventory, "
+              f"checking against the full inventory")
+    return index
+
+
+def run(new_files: List[str], snapshot: Optional[InventorySnapshot] = None,
+        index: Optional[KeyIndex] = None) -> int:
+    """Run duplicate and relationship checks, returning the exit code.
     
+    With an ``index`` of the existing keys only ``new_files`` are read.
+    """
     print(f"Checking {len(new_files)} files for duplicates...")
     
+    if index is None:
+        snapshot = snapshot or load_snapshot()
+    else:
+        snapshot = snapshot or InventorySnapshot()
+    
     # Check for duplicates
-    duplicate_errors = check_duplicates(new_files)
+    duplicate_errors = check_duplicates(new_files, snapshot, index)
     
     # Check related keys
-    relationship_errors = check_related_keys(new_files)
+    relationship_errors = check_related_keys(new_files, snapshot, index)
     
     all_errors = duplicate_errors + relationship_errors
     
+    for file_path, error in snapshot.load_errors.items():
+        print(f"Warning: Could not load {file_path}: {error}")
+    
     # Write results to file for GitHub Actions
     with open('duplicate-check-results.txt', 'w') as f:
         if all_errors:
@@ -188,10 +214,46 @@ def main():
         print("\nIssues:")
         for error in all_errors:
             print(f"  ❌ {error}")
-        sys.exit(1)
+        return 1
     else:
         print("✅ No duplicates found!")
+        return 0
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Check new or changed key files for duplicates')
+    parser.add_argument('files', nargs='*', help='Key files to check')
+    parser.add_argument('--changed-since', metavar='BASE',
+                        help='Check the inventory files changed since BASE (git diff BASE...HEAD)')
+    parser.add_argument('--pack-file', default=DEFAULT_PACK_FILE,
+                        help=f'Pack of the base inventory used with --changed-since (default: {DEFAULT_PACK_FILE})')
+    parser.add_argument('--index-file', default=DEFAULT_INDEX_FILE,
+                        help=f'Key index database of the base inventory used with --changed-since '
+                             f'(default: {DEFAULT_INDEX_FILE})')
+    args = parser.parse_args()
+    
+    if not args.files and not args.changed_since:
+        print("Usage: check-duplicates.py <file1> [file2] ... | --changed-since <base>")
+        sys.exit(1)
+    
+    new_files = [f for f in args.files if f.strip()]
+    index = None
+    
+    if args.changed_since:
+        try:
+            changes = git_changes(args.changed_since)
+        except GitError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        new_files = changes.changed
+        index = load_changed_index(changes, args.pack_file, args.index_file)
+    
+    if not new_files:
+        print("No files to check")
         sys.exit(0)
+    
+    sys.exit(run(new_files, index=index))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+JSON Serializer Parity Check
+Verifies that the orjson and standard library backends of
+keyinventory.serializer encode the inventory, a golden docs/keys.json and a
+set of edge-case values to the same bytes
+"""
+
+import argparse
+import datetime
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot
+from keyinventory.output import render_json, write_keys_document
+from keyinventory.serializer import ORJSON_AVAILABLE, dumps, set_backend
+
+
+UTC = datetime.timezone.utc
+
+# Values whose encoding differs most between JSON libraries
+EDGE_CASES = {
+    "datetime_utc": datetime.datetime(2024, 1, 15, 10, 30, tzinfo=UTC),
+    "datetime_offset": datetime.datetime(2024, 1, 15, 10, 30, 5, 123456,
+                                         tzinfo=datetime.timezone(datetime.timedelta(hours=-5))),
+    "datetime_naive": datetime.datetime(2024, 1, 15, 10, 30),
+    "date": datetime.date(2024, 1, 15),
+    "non_ascii": "clé – 鍵  ",
+    "control": "tab\tnewline\n\x1f",
+    "non_string_keys": {1: "one", 2.5: "float", None: "none"},
+    "big_int": 2 ** 70,
+    "floats": [0.1, 1e16, -0.0, 1.5e-7, 1e22, 1.2345678901234568e17, 5e-05, 0.0001],
+    "float_keys": {1e16: "big", 5e-05: "small", 0.5: "plain"},
+    "non_finite": [float('nan'), float('inf'), -float('inf')],
+    "non_finite_nested": {"custom": {"score": float('nan'), "limits": [1.0, float('inf')], "note": None}},
+    "non_finite_keys": {float('inf'): "inf", float('nan'): "nan"},
+    "empty": [[], {}, ""],
+    "nested": {"a": [{"b": [1, 2, {"c": None}]}]},
+}
+
+
+def render(value, backend: str, indent: bool) -> str:
+    set_backend(backend)
+    return dumps(value, indent=indent)
+
+
+def render_document(document, backend: str) -> str:
+    """Render a keys.json document through the streaming writer."""
+    set_backend(backend)
+    if isinstance(document, dict):
+        metadata, keys = document.get('metadata'), document.get('keys', [])
+    else:
+        metadata, keys = None, document
+    buffer = io.StringIO()
+    write_keys_document(buffer, (render_json(key) for key in keys), metadata)
+    return buffer.getvalue()
+
+
+def compare(label: str, fast: str, reference: str, mismatches: list):
+    """Record ``label`` when the texts differ, even if they decode to the same value."""
+    if fast == reference:
+        return
+    if json.loads(fast) == json.loads(reference):
+        label += " (same JSON value, different text)"
+    mismatches.append(label)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Compare the orjson and stdlib JSON backends')
+    parser.add_argument('--inventory-dir', default='inventory', help='Inventory directory')
+    parser.add_argument('--golden', default='docs/keys.json',
+                      help='Generated keys file re-rendered by both backends (default: docs/keys.json)')
+    
+    args = parser.parse_args()
+    
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+    if not ORJSON_AVAILABLE:
+        print("orjson is not installed, nothing to compare")
+        sys.exit(0)
+    
+    mismatches = []
+    compared = 0
+    
+    cases = [(f"edge case {name}", value) for name, value in EDGE_CASES.items()]
+    cases.extend((str(path), data) for path, data in InventorySnapshot(args.inventory_dir).records())
+    for label, value in cases:
+        for indent in (True, False):
+            compare(f"{label} ({'indented' if indent else 'compact'})",
+                    render(value, 'orjson', indent), render(value, 'stdlib', indent), mismatches)
+            compared += 1
+    
+    golden = Path(args.golden)
+    if golden.exists():
+        text = golden.read_text(encoding='utf-8')
+        document = json.loads(text)
+        compare(f"{golden} (stdlib)", render_document(document, 'stdlib'), text, mismatches)
+        compare(f"{golden} (orjson)", render_document(document, 'orjson'), text, mismatches)
+        compared += 2
+    else:
+        print(f"Warning: {golden} does not exist")
+    
+    print(f"\nParity Check Summary:")
+    print(f"Encodings compared: {compared}")
+    print(f"Mismatches: {len(mismatches)}")
+    
+    if mismatches:
+        print("\nMismatches:")
+        for label in mismatches:
+            print(f"  ❌ {label}")
+        sys.exit(1)
+    else:
+        print("✅ Both backends produce the same bytes!")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
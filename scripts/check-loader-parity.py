@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+YAML Loader Parity Check
+Verifies that the libyaml CSafeLoader and the pure-Python SafeLoader parse the
+inventory and template corpus identically
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import LIBYAML_AVAILABLE, Loader, check_parity
+
+
+DEFAULT_TARGETS = ['inventory', 'templates']
+
+
+def main():
+    """Main function."""
+    targets = [t for t in sys.argv[1:] if t.strip()] or DEFAULT_TARGETS
+    
+    files = []
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.yaml')) + sorted(path.glob('*.yml')))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"Warning: {target} does not exist")
+    
+    print(f"Loader: {Loader.__name__} (libyaml available: {LIBYAML_AVAILABLE})")
+    
+    if not LIBYAML_AVAILABLE:
+        print("libyaml is not available, nothing to compare")
+        sys.exit(0)
+    
+    mismatches = check_parity(files)
+    
+    print(f"\nParity Check Summary:")
+    print(f"Files compared: {len(files)}")
+    print(f"Mismatches: {len(mismatches)}")
+    
+    if mismatches:
+        print("\nMismatches:")
+        for mismatch in mismatches:
+            print(f"  ❌ {mismatch}")
+        sys.exit(1)
+    else:
+        print("✅ Both loaders produce identical results!")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
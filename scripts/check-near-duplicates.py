@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Check Script
+Reports new or changed keys whose alias, purpose or location nearly matches
+another key's (e.g. visa-tokenization vs visa_tokenisation-prod)
+
+With --changed-since, only the files changed since a base revision are read;
+the aliases, purposes and locations of the other keys come from the key index
+database of the last main-branch build (docs/keys.index.db). With --all, the
+whole inventory is checked against itself.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot, load_snapshot, normalize_path
+from keyinventory.changes import ChangeSet, GitError, git_changes
+from keyinventory.index import DEFAULT_INDEX_FILE, base_texts
+from keyinventory.similarity import DEFAULT_THRESHOLDS, NEAR_DUPLICATE_FIELDS, NearDuplicateFinder
+
+
+def find_near_duplicates(new_files: List[str], snapshot: InventorySnapshot,
+                         base: Optional[Dict[str, Dict[str, Any]]] = None,
+                         fields: Sequence[str] = NEAR_DUPLICATE_FIELDS,
+                         thresholds: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """Near duplicates of the new files among the other keys and among themselves.
+    
+    ``base`` maps the file names of the other keys to their records; when it
+    is not given it is taken from the full inventory snapshot.
+    """
+    if base is None:
+        excluded = {normalize_path(path) for path in new_files}
+        base = {file_path.name: data for file_path, data in snapshot.records(exclude=excluded)}
+    
+    finder = NearDuplicateFinder(fields, thresholds)
+    for name, record in base.items():
+        finder.add(name, record)
+    
+    new_finder = NearDuplicateFinder(fields, thresholds)
+    found = []
+    for file_path in new_files:
+        data = snapshot.get(file_path)
+        if not isinstance(data, dict):
+            continue
+        name = os.path.basename(file_path)
+        found.extend(finder.matches(name, data))
+        new_finder.add(name, data)
+    
+    found.extend(new_finder.pairs())
+    return found
+
+
+def run(new_files: List[str], snapshot: Optional[InventorySnapshot] = None,
+        base: Optional[Dict[str, Dict[str, Any]]] = None, fields: Sequence[str] = NEAR_DUPLICATE_FIELDS,
+        thresholds: Optional[Dict[str, float]] = None, max_report: int = 50, strict: bool = False) -> int:
+    """Run the near-duplicate check, returning the exit code.
+    
+    Near duplicates are warnings: the exit code is 1 only with ``strict``.
+    """
+    print(f"Checking {len(new_files)} files for near-duplicates...")
+    
+    if base is None:
+        snapshot = snapshot or load_snapshot()
+    else:
+        snapshot = snapshot or InventorySnapshot()
+    
+    found = find_near_duplicates(new_files, snapshot, base, fields, thresholds)
+    write_results(found)
+    print_pairs(found, max_report)
+    return 1 if found and strict else 0
+
+
+def write_results(found: List[Dict[str, Any]]):
+    """Write the results file for GitHub Actions."""
+    with open('near-duplicate-results.txt', 'w') as f:
+        if found:
+            f.write("⚠️ Possible near-duplicate keys:\n\n")
+            for pair in found:
+                f.write(f"• {describe(pair)}\n")
+        else:
+            f.write("✅ No near-duplicates found!\n")
+
+
+def describe(pair: Dict[str, Any]) -> str:
+    """One line describing a near-duplicate pair."""
+    return (f"{pair['first']} ~ {pair['second']}: {pair['field']} '{pair['first_value']}' vs "
+            f"'{pair['second_value']}' (similarity {pair['similarity']:.2f})")
+
+
+def print_pairs(found: List[Dict[str, Any]], max_report: int):
+    """Print the summary and the most similar pairs."""
+    print(f"\nNear-Duplicate Check Summary:")
+    print(f"Pairs found: {len(found)}")
+    if not found:
+        print("✅ No near-duplicates found!")
+        return
+    
+    print("\nPossible near-duplicates:")
+    for pair in found[:max_report]:
+        print(f"  ⚠️ {describe(pair)}")
+    if len(found) > max_report:
+        print(f"  ... and {len(found) - max_report} more pairs")
+
+
+def load_changed_texts(changes: ChangeSet, index_file: str = DEFAULT_INDEX_FILE) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Return the base-branch records for a change set, or None to read the full inventory."""
+    base = base_texts(index_file, 'inventory', changes)
+    if base is None:
+        print(f"Note: {index_file} does not match the base inventory, checking against the full inventory")
+    return base
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Check new or changed key files for near-duplicate keys')
+    parser.add_argument('files', nargs='*', help='Key files to check')
+    parser.add_argument('--changed-since', metavar='BASE',
+                        help='Check the inventory files changed since BASE (git diff BASE...HEAD)')
+    parser.add_argument('--all', action='store_true',
+                        help='Check every inventory file against all the others')
+    parser.add_argument('--index-file', default=DEFAULT_INDEX_FILE,
+                        help=f'Key index database of the base inventory used with --changed-since '
+                             f'(default: {DEFAULT_INDEX_FILE})')
+    parser.add_argument('--field', choices=NEAR_DUPLICATE_FIELDS, action='append',
+                        help='Field to compare; may be repeated (default: alias, purpose and location)')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='Minimum similarity for every field, 0-1 (default: ' +
+                             ', '.join(f"{field} {value}" for field, value in DEFAULT_THRESHOLDS.items()) + ')')
+    parser.add_argument('--max-report', type=int, default=50,
+                        help='Pairs printed at most (default: 50); the results file lists all of them')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the pairs as JSON instead of text')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 when near-duplicates are found')
+    args = parser.parse_args()
+    
+    fields = args.field or NEAR_DUPLICATE_FIELDS
+    thresholds = {field: args.threshold for field in fields} if args.threshold is not None else None
+    
+    if args.all:
+        finder = NearDuplicateFinder(fields, thresholds)
+        for file_path, data in load_snapshot().records():
+            finder.add(file_path.name, data)
+        found = finder.pairs()
+        if args.json:
+            print(json.dumps(found, indent=2))
+        else:
+            write_results(found)
+            print_pairs(found, args.max_report)
+        sys.exit(1 if found and args.strict else 0)
+    
+    if not args.files and not args.changed_since:
+        print("Usage: check-near-duplicates.py <file1> [file2] ... | --changed-since <base> | --all")
+        sys.exit(1)
+    
+    new_files = [f for f in args.files if f.strip()]
+    base = None
+    
+    if args.changed_since:
+        try:
+            changes = git_changes(args.changed_since)
+        except GitError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        new_files = changes.changed
+        base = load_changed_texts(changes, args.index_file)
+    
+    if not new_files:
+        print("No files to check")
+        sys.exit(0)
+    
+    if args.json:
+        snapshot = InventorySnapshot() if base is not None else load_snapshot()
+        print(json.dumps(find_near_duplicates(new_files, snapshot, base, fields, thresholds), indent=2))
+        sys.exit(0)
+    
+    sys.exit(run(new_files, base=base, fields=fields, thresholds=thresholds,
+                 max_report=args.max_report, strict=args.strict))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,98 +7,52 @@ Checks which keys are due for rotation and generates warnings
 import os
 import sys
 import json
-import yaml
 import argparse
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def load_key_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a key file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
-    except Exception as e:
-        print(f"Warning: Could not load {file_path}: {e}")
-        return {}
+from keyinventory import InventorySnapshot, load_snapshot
+from keyinventory.rotation import DEFAULT_CRITICAL_DAYS, DEFAULT_WARNING_DAYS, RotationSchedule
 
 
-def calculate_rotation_status(key_data: Dict[str, Any]) -> Dict[str, Any]:
+def load_key_file(file_path: str, snapshot: Optional[InventorySnapshot] = None) -> Dict[str, Any]:
+    """Load and parse a key file through the shared inventory snapshot."""
+    snapshot = snapshot or load_snapshot()
+    data = snapshot.get(file_path)
+    error = snapshot.error(file_path)
+    if error:
+        print(f"Warning: Could not load {file_path}: {error}")
+    return data or {}
+
+
+def calculate_rotation_status(key_data: Dict[str, Any], warning_days: int = DEFAULT_WARNING_DAYS,
+                              critical_days: int = DEFAULT_CRITICAL_DAYS) -> Dict[str, Any]:
     """Calculate rotation status for a key."""
-    created_at_str = key_data.get('created_at')
-    rotation_interval_days = key_data.get('rotation_interval_days', 365)
-    
-    if not created_at_str:
-        return {
-            "status": "error",
-            "message": "No created_at date found",
-            "days_remaining": None,
-            "next_rotation_due": None
-        }
-    
-    try:
-        # Parse creation date
-        created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-        
-        # Check for last rotation date
-        lifecycle = key_data.get('lifecycle', {})
-        last_rotated_str = lifecycle.get('last_rotated_at')
-        
-        if last_rotated_str:
-            try:
-                last_rotated = datetime.fromisoformat(last_rotated_str.replace('Z', '+00:00'))
-                reference_date = last_rotated
-            except ValueError:
-                reference_date = created_at
-        else:
-            reference_date = created_at
-        
-        # Calculate next rotation due date
-        next_rotation_due = reference_date + timedelta(days=rotation_interval_days)
-        
-        # Calculate days remaining
-        now = datetime.now(next_rotation_due.tzinfo)
-        days_remaining = (next_rotation_due - now).days
-        
-        # Determine status
-        if days_remaining < 0:
-            status = "overdue"
-            message = f"{abs(days_remaining)} days overdue"
-        elif days_remaining <= 7:
-            status = "critical"
-            message = f"{days_remaining} days remaining (critical)"
-        elif days_remaining <= 30:
-            status = "warning"
-            message = f"{days_remaining} days remaining (warning)"
-        else:
-            status = "ok"
-            message = f"{days_remaining} days remaining"
-        
-        return {
-            "status": status,
-            "message": message,
-            "days_remaining": days_remaining,
-            "next_rotation_due": next_rotation_due.isoformat(),
-            "reference_date": reference_date.isoformat()
-        }
-    
-    except ValueError as e:
-        return {
-            "status": "error",
-            "message": f"Date parsing error: {e}",
-            "days_remaining": None,
-            "next_rotation_due": None
-        }
+    schedule = RotationSchedule(warning_days, critical_days)
+    row = schedule.add(key_data)
+    return schedule.compute().status(row)
 
 
-def check_rotation_due(key_id: str = None, force: bool = False) -> Dict[str, List[Dict[str, Any]]]:
-    """Check which keys are due for rotation."""
+def check_rotation_due(key_id: str = None, force: bool = False,
+                       snapshot: Optional[InventorySnapshot] = None,
+                       warning_days: int = DEFAULT_WARNING_DAYS,
+                       critical_days: int = DEFAULT_CRITICAL_DAYS) -> Dict[str, List[Dict[str, Any]]]:
+    """Check which keys are due for rotation.
+    
+    The rotation status of all the candidate keys is computed in one pass;
+    details are only gathered for the keys that are reported.
+    """
     inventory_dir = Path('inventory')
     if not inventory_dir.exists():
         print("Error: Inventory directory not found")
         return {"keys_to_rotate": [], "warning_keys": [], "errors": []}
     
+    # A single key only needs its own file, so avoid loading the whole inventory
+    if snapshot is None:
+        snapshot = InventorySnapshot(inventory_dir) if key_id else load_snapshot(inventory_dir)
+    
     # Get all key files
     if key_id:
         key_files = [inventory_dir / f"{key_id}.yaml"]
@@ -111,14 +65,15 @@ def check_rotation_due(key_id: str = None, force: bool = False) -> Dict[str, Lis
                 "errors": [f"Key file not found for {key_id}"]
             }
     else:
-        key_files = list(inventory_dir.glob('*.yaml')) + list(inventory_dir.glob('*.yml'))
+        snapshot.load_all()
+        key_files = snapshot.inventory_files
     
-    keys_to_rotate = []
-    warning_keys = []
+    schedule = RotationSchedule(warning_days, critical_days)
+    candidates = []
     errors = []
     
     for file_path in key_files:
-        data = load_key_file(str(file_path))
+        data = load_key_file(str(file_path), snapshot)
         if not data:
             errors.append(f"Could not load {file_path}")
             continue
@@ -137,7 +92,18 @@ def check_rotation_due(key_id: str = None, force: bool = False) -> Dict[str, Lis
         if not auto_rotation and not force:
             continue
         
-        rotation_status = calculate_rotation_status(data)
+        schedule.add(data)
+        candidates.append((file_path, data, status, auto_rotation))
+    
+    schedule.compute()
+    rows = range(len(schedule)) if force else schedule.rows('overdue', 'critical', 'warning')
+    
+    keys_to_rotate = []
+    warning_keys = []
+    
+    for row in rows:
+        file_path, data, status, auto_rotation = candidates[row]
+        rotation_status = schedule.status(row)
         
         key_info = {
             "key_id": data.get('key_id'),
@@ -169,18 +135,26 @@ def main():
     parser.add_argument('--key-id', help='Check specific key ID')
     parser.add_argument('--force', action='store_true', help='Force rotation check even for non-active keys')
     parser.add_argument('--output-json', action='store_true', help='Output results as JSON for GitHub Actions')
-    parser.add_argument('--warning-days', type=int, default=30, help='Days before rotation to start warnings')
-    parser.add_argument('--critical-days', type=int, default=7, help='Days before rotation for critical warnings')
+    parser.add_argument('--warning-days', type=int, default=DEFAULT_WARNING_DAYS,
+                        help=f'Days before rotation to start warnings (default: {DEFAULT_WARNING_DAYS})')
+    parser.add_argument('--critical-days', type=int, default=DEFAULT_CRITICAL_DAYS,
+                        help=f'Days before rotation for critical warnings (default: {DEFAULT_CRITICAL_DAYS})')
     
     args = parser.parse_args()
     
+    if args.critical_days > args.warning_days:
+        parser.error('--critical-days must not be greater than --warning-days')
+    
     print(f"Checking rotation status...")
     if args.key_id:
         print(f"Specific key: {args.key_id}")
     if args.force:
         print("Force mode: checking all keys regardless of status")
     
-    results = check_rotation_due(args.key_id, args.force)
+    print(f"Thresholds: critical within {args.critical_days} days, warning within {args.warning_days} days")
+    
+    results = check_rotation_due(args.key_id, args.force, warning_days=args.warning_days,
+                                 critical_days=args.critical_days)
     
     keys_to_rotate = results["keys_to_rotate"]
     warning_keys = results["warning_keys"]
@@ -6,26 +6,31 @@ Validates keys against compliance frameworks (PCI DSS, SOX, GDPR, NIST)
 
 import os
 import sys
-import yaml
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot
 
 
 class ComplianceChecker:
-    def __init__(self):
+    def __init__(self, snapshot: Optional[InventorySnapshot] = None):
         self.errors = []
         self.warnings = []
         self.compliance_results = {}
+        # Files are loaded on demand unless a shared, preloaded snapshot is given
+        self.snapshot = snapshot or InventorySnapshot()
     
     def load_key_file(self, file_path: str) -> Dict[str, Any]:
-        """Load and parse a key file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
-        except Exception as e:
-            self.errors.append(f"Could not load {file_path}: {e}")
+        """Load and parse a key file through the inventory snapshot."""
+        data = self.snapshot.get(file_path)
+        error = self.snapshot.error(file_path)
+        if error:
+            self.errors.append(f"Could not load {file_path}: {error}")
             return {}
+        return data or {}
     
     def check_pci_compliance(self, data: Dict[str, Any], filename: str) -> Dict[str, Any]:
         """Check PCI DSS compliance requirements."""
@@ -358,21 +363,11 @@ class ComplianceChecker:
         return "".join(report)
 
 
-def main():
-    """Main function."""
-    if len(sys.argv) < 2:
-        print("Usage: compliance-check.py <file1> [file2] ...")
-        sys.exit(1)
-    
-    files_to_check = [f for f in sys.argv[1:] if f.strip()]
-    
-    if not files_to_check:
-        print("No files to check")
-        sys.exit(0)
-    
+def run(files_to_check: List[str], snapshot: Optional[InventorySnapshot] = None) -> int:
+    """Check compliance for the given files, returning the exit code."""
     print(f"Checking compliance for {len(files_to_check)} files...")
     
-    checker = ComplianceChecker()
+    checker = ComplianceChecker(snapshot)
     results = []
     
     for file_path in files_to_check:
@@ -395,10 +390,25 @@ def main():
     
     if non_compliant:
         print("❌ Some files are non-compliant")
-        sys.exit(1)
+        return 1
     else:
         print("✅ All files are compliant!")
+        return 0
+
+
+def main():
+    """Main function."""
+    if len(sys.argv) < 2:
+        print("Usage: compliance-check.py <file1> [file2] ...")
+        sys.exit(1)
+    
+    files_to_check = [f for f in sys.argv[1:] if f.strip()]
+    
+    if not files_to_check:
+        print("No files to check")
         sys.exit(0)
+    
+    sys.exit(run(files_to_check))
 
 
 if __name__ == "__main__":
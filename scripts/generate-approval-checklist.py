@@ -6,17 +6,20 @@ Generates approval checklists for key creation requests
 
 import os
 import sys
-import yaml
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import safe_load
+
 
 def load_key_file(file_path: str) -> Dict[str, Any]:
     """Load and parse a key file."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
+            return safe_load(f) or {}
     except Exception as e:
         print(f"Warning: Could not load {file_path}: {e}")
         return {}
@@ -6,20 +6,28 @@ Generates comprehensive compliance reports for all frameworks
 
 import os
 import sys
-import json
-import yaml
 import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Optional, Iterable, Iterator
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot, load_snapshot, load_yaml_file, normalize_path
+from keyinventory.output import RecordSpool, render_json, write_json_object
+from keyinventory.statistics import Statistics, StatisticsEngine
+
 
 class ComplianceReportGenerator:
-    def __init__(self, inventory_dir: str = "inventory", output_dir: str = "reports"):
+    def __init__(self, inventory_dir: str = "inventory", output_dir: str = "reports",
+                 snapshot: Optional[InventorySnapshot] = None, stream: bool = False):
         self.inventory_dir = Path(inventory_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.snapshot = snapshot
+        # Read keys one file at a time and spool the per-key reports to disk
+        self.stream = stream
         
         self.frameworks = {
             'pci_dss': 'PCI DSS',
@@ -30,25 +38,38 @@ class ComplianceReportGenerator:
     
     def load_all_keys(self) -> List[Dict[str, Any]]:
         """Load all key definitions from inventory."""
-        keys = []
+        return list(self.iter_keys())
+    
+    def iter_keys(self) -> Iterator[Dict[str, Any]]:
+        """Yield the key definitions of the inventory in file order.
         
+        In streaming mode (without a snapshot) files are parsed one at a time
+        and only the current key is held in memory.
+        """
         if not self.inventory_dir.exists():
             print(f"Warning: Inventory directory {self.inventory_dir} does not exist")
-            return keys
-        
-        yaml_files = list(self.inventory_dir.glob('*.yaml')) + list(self.inventory_dir.glob('*.yml'))
-        
-        for file_path in yaml_files:
-            try:
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    if data:
-                        data['_file_path'] = str(file_path)
-                        keys.append(data)
-            except Exception as e:
-                print(f"Warning: Could not load {file_path}: {e}")
-        
-        return keys
+            return
+        
+        if self.stream and self.snapshot is None:
+            yaml_files = sorted(list(self.inventory_dir.glob('*.yaml')) + list(self.inventory_dir.glob('*.yml')))
+            for file_path in yaml_files:
+                try:
+                    data = load_yaml_file(file_path)
+                except Exception as e:
+                    print(f"Warning: Could not load {normalize_path(file_path)}: {e}")
+                    continue
+                if isinstance(data, dict) and data:
+                    yield dict(data, _file_path=str(file_path))
+            return
+        
+        snapshot = self.snapshot or load_snapshot(self.inventory_dir)
+        
+        for file_path, error in snapshot.load_errors.items():
+            print(f"Warning: Could not load {file_path}: {error}")
+        
+        # Copy so the shared snapshot documents are not modified
+        for file_path, data in snapshot.records():
+            yield dict(data, _file_path=str(file_path))
     
     def is_pci_applicable(self, key: Dict[str, Any]) -> bool:
         """Check if key is subject to PCI DSS requirements."""
@@ -339,38 +360,49 @@ class ComplianceReportGenerator:
             }
         }
     
-    def generate_summary_report(self, key_reports: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate summary compliance report."""
+    def summary_engine(self) -> StatisticsEngine:
+        """Engine counting each framework's status and summing its scores in one pass."""
+        def status(framework):
+            return lambda report: report['frameworks'][framework]['status']
+        
+        def score(framework):
+            return lambda report: report['frameworks'][framework]['score']
+        
+        return StatisticsEngine({framework: status(framework) for framework in self.frameworks},
+                                measures={framework: (framework, score(framework)) for framework in self.frameworks})
+    
+    def generate_summary_report(self, key_reports: List[Dict[str, Any]],
+                                keys: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Generate summary compliance report.
+        
+        When ``keys`` is given, the summary also includes the inventory
+        breakdown published by build-data.py in metadata.statistics.
+        """
+        inventory = StatisticsEngine.for_keys().run(keys) if keys is not None else None
+        return self.summarize(self.summary_engine().run(key_reports), inventory)
+    
+    def summarize(self, stats: Statistics, inventory: Optional[Statistics] = None) -> Dict[str, Any]:
+        """Build the summary from framework statistics and, optionally, inventory statistics."""
         summary = {
-            'total_keys': len(key_reports),
+            'total_keys': stats.total,
             'frameworks': {}
         }
         
         for framework in self.frameworks:
-            applicable_keys = [
-                report for report in key_reports 
-                if report['frameworks'][framework]['applicable']
-            ]
+            statuses = stats.counts[framework]
+            scores = stats.sums[framework]
+            compliant = statuses.get('compliant', 0)
+            applicable = compliant + statuses.get('non_compliant', 0)
             
-            if applicable_keys:
-                compliant_keys = [
-                    report for report in applicable_keys
-                    if report['frameworks'][framework]['status'] == 'compliant'
-                ]
-                
-                total_score = sum(
-                    report['frameworks'][framework]['score'] 
-                    for report in applicable_keys
-                )
-                avg_score = total_score / len(applicable_keys)
-                
+            if applicable:
+                total_score = scores.get('compliant', 0) + scores.get('non_compliant', 0)
                 summary['frameworks'][framework] = {
                     'name': self.frameworks[framework],
-                    'applicable_keys': len(applicable_keys),
-                    'compliant_keys': len(compliant_keys),
-                    'non_compliant_keys': len(applicable_keys) - len(compliant_keys),
-                    'compliance_rate': round((len(compliant_keys) / len(applicable_keys)) * 100, 2),
-                    'average_score': round(avg_score, 2)
+                    'applicable_keys': applicable,
+                    'compliant_keys': compliant,
+                    'non_compliant_keys': applicable - compliant,
+                    'compliance_rate': round((compliant / applicable) * 100, 2),
+                    'average_score': round(total_score / applicable, 2)
                 }
             else:
                 summary['frameworks'][framework] = {
@@ -382,11 +414,21 @@ class ComplianceReportGenerator:
                     'average_score': 100.0
                 }
         
+        if inventory is not None:
+            summary['inventory'] = {
+                **{f"by_{name}": counts for name, counts in inventory.counts.items()},
+                'cross_tabs': inventory.crosstabs_dict()
+            }
+        
         return summary
     
-    def generate_html_report(self, summary: Dict[str, Any], key_reports: List[Dict[str, Any]]) -> str:
+    def generate_html_report(self, summary: Dict[str, Any], key_reports: Iterable[Dict[str, Any]]) -> str:
         """Generate HTML compliance report."""
-        html = f"""<!DOCTYPE html>
+        return ''.join(self.iter_html_report(summary, key_reports))
+    
+    def iter_html_report(self, summary: Dict[str, Any], key_reports: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yield the HTML compliance report in pieces, one key report at a time."""
+        yield f"""<!DOCTYPE html>
 <html>
 <head>
     <title>Key Inventory Compliance Report</title>
@@ -423,9 +465,9 @@ class ComplianceReportGenerator:
                 <th>Average Score</th>
             </tr>
 """
-        
+
         for framework, data in summary['frameworks'].items():
-            html += f"""
+            yield f"""
             <tr>
                 <td>{data['name']}</td>
                 <td>{data['applicable_keys']}</td>
@@ -435,17 +477,17 @@ class ComplianceReportGenerator:
                 <td class="score">{data['average_score']}</td>
             </tr>
 """
-        
-        html += """
+
+        yield """
         </table>
     </div>
     
     <div>
         <h2>🔍 Detailed Key Reports</h2>
 """
-        
+
         for report in key_reports:
-            html += f"""
+            yield f"""
         <div class="framework">
             <h3>Key: {report['alias']} ({report['key_id']})</h3>
             <p><strong>Environment:</strong> {report['environment']} | <strong>Owner:</strong> {report['owner']}</p>
@@ -458,7 +500,7 @@ class ComplianceReportGenerator:
                     <th>Violations</th>
                 </tr>
 """
-            
+
             for framework, compliance in report['frameworks'].items():
                 if compliance['applicable']:
                     status_class = 'compliant' if compliance['status'] == 'compliant' else 'non-compliant'
@@ -467,7 +509,7 @@ class ComplianceReportGenerator:
                     status_class = 'not-applicable'
                     violations = 'Not applicable'
                 
-                html += f"""
+                yield f"""
                 <tr class="{status_class}">
                     <td>{self.frameworks[framework]}</td>
                     <td>{compliance['status'].replace('_', ' ').title()}</td>
@@ -475,50 +517,54 @@ class ComplianceReportGenerator:
                     <td>{violations}</td>
                 </tr>
 """
-            
-            html += """
+
+            yield """
             </table>
         </div>
 """
-        
-        html += """
+
+        yield """
     </div>
 </body>
 </html>
 """
-        return html
-    
+
     def generate_compliance_report(self, output_formats: List[str] = None) -> bool:
         """Generate complete compliance report."""
         if output_formats is None:
             output_formats = ['json', 'html']
         
         print("🔍 Loading key inventory...")
-        keys = self.load_all_keys()
+        summary_engine = self.summary_engine()
+        inventory_engine = StatisticsEngine.for_keys()
+        stats = summary_engine.new()
+        inventory = inventory_engine.new()
+        key_reports = RecordSpool() if self.stream else []
+        
+        # One pass: each key is reported, counted and spooled, then dropped
+        for key in self.iter_keys():
+            report = self.generate_key_compliance_report(key)
+            summary_engine.add(stats, report)
+            inventory_engine.add(inventory, key)
+            key_reports.append(report)
         
-        if not keys:
+        if not stats.total:
             print("❌ No keys found in inventory")
             return False
         
-        print(f"📊 Analyzing compliance for {len(keys)} keys...")
+        print(f"📊 Analyzed compliance for {stats.total} keys...")
         
-        key_reports = []
-        for key in keys:
-            report = self.generate_key_compliance_report(key)
-            key_reports.append(report)
-        
-        summary = self.generate_summary_report(key_reports)
+        summary = self.summarize(stats, inventory)
         
         timestamp = datetime.now().isoformat()
         
-        complete_report = {
+        report_header = {
             'metadata': {
                 'generated_at': timestamp,
-                'total_keys': len(keys),
+                'total_keys': stats.total,
                 'frameworks_checked': list(self.frameworks.keys())
             },
-            'summary': summary,
-            'detailed_reports': key_reports
+            'summary': summary
         }
         
         # Save reports in requested formats
@@ -527,19 +573,19 @@ class ComplianceReportGenerator:
         if 'json' in output_formats:
             json_file = self.output_dir / f"compliance-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
             try:
-                with open(json_file, 'w') as f:
-                    json.dump(complete_report, f, indent=2)
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    rendered = key_reports.rendered() if self.stream else map(render_json, key_reports)
+                    write_json_object(f, report_header, 'detailed_reports', rendered)
                 print(f"✅ JSON report saved: {json_file}")
             except Exception as e:
                 print(f"❌ Failed to save JSON report: {e}")
                 success = False
         
         if 'html' in output_formats:
-            html_content = self.generate_html_report(summary, key_reports)
             html_file = self.output_dir / f"compliance-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.html"
             try:
                 with open(html_file, 'w') as f:
-                    f.write(html_content)
+                    f.writelines(self.iter_html_report(summary, key_reports))
                 print(f"✅ HTML report saved: {html_file}")
             except Exception as e:
                 print(f"❌ Failed to save HTML report: {e}")
@@ -550,6 +596,9 @@ class ComplianceReportGenerator:
         for framework, data in summary['frameworks'].items():
             print(f"{data['name']}: {data['compliance_rate']}% compliant ({data['compliant_keys']}/{data['applicable_keys']})")
         
+        if self.stream:
+            key_reports.close()
+        
         return success
 
 
@@ -560,12 +609,14 @@ def main():
     parser.add_argument('--format', choices=['json', 'html'], action='append', help='Output format(s)')
     parser.add_argument('--framework', choices=['pci_dss', 'sox', 'gdpr', 'nist'], action='append', 
                        help='Specific framework(s) to check')
+    parser.add_argument('--stream', action='store_true',
+                       help='Read keys one file at a time and spool per-key reports to disk (bounded memory)')
     
     args = parser.parse_args()
     
     output_formats = args.format or ['json', 'html']
     
-    generator = ComplianceReportGenerator(args.inventory_dir, args.output_dir)
+    generator = ComplianceReportGenerator(args.inventory_dir, args.output_dir, stream=args.stream)
     success = generator.generate_compliance_report(output_formats)
     
     sys.exit(0 if success else 1)
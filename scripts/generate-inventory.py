@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Synthetic Inventory Generator
+Writes a realistic inventory of any size, seeded from a template key
+definition, with relationships, mixed schema layouts, duplicates and
+invalid files, for scale testing the build and the scripts
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory.synthetic import DEFAULT_TEMPLATE, InventoryGenerator, parse_count
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Generate a synthetic key inventory for scale testing')
+    parser.add_argument('count', type=parse_count,
+                      help='Number of key files, e.g. 1000, 10k or 1M')
+    parser.add_argument('--output-dir', '-o', required=True,
+                      help='Directory to write the key files to (must be empty or not exist)')
+    parser.add_argument('--template', default=str(DEFAULT_TEMPLATE),
+                      help='Key definition every generated key starts from (default: templates/enhanced-key-example.yaml)')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='Random seed; the same seed gives the same inventory (default: 0)')
+    parser.add_argument('--legacy-ratio', type=float, default=0.2,
+                      help='Share of keys written in the minimal legacy layout (default: 0.2)')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.01,
+                      help='Share of files repeating an existing key_id or alias (default: 0.01)')
+    parser.add_argument('--invalid-ratio', type=float, default=0.01,
+                      help='Share of files with an invalid definition (default: 0.01)')
+    
+    args = parser.parse_args()
+    
+    output_dir = Path(args.output_dir)
+    if output_dir.exists() and any(output_dir.iterdir()):
+        print(f"Error: {output_dir} is not empty")
+        sys.exit(1)
+    
+    generator = InventoryGenerator(args.template, seed=args.seed, legacy_ratio=args.legacy_ratio,
+                                   duplicate_ratio=args.duplicate_ratio, invalid_ratio=args.invalid_ratio)
+    started = time.perf_counter()
+    manifest = generator.write(output_dir, args.count)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Generated {args.count} key files in {output_dir} ({elapsed:.1f}s)")
+    for kind, count in sorted(manifest["files"].items()):
+        print(f"  {kind}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Key Relationship Graph Script
+Answers "what breaks if this key is revoked" from the depends_on, used_by and
+related_keys relationships of the inventory, and checks the dependencies for
+cycles and for references to keys that do not exist
+
+The graph is built from the pre-parsed pack (docs/keys.pack) when it is
+fresh, so the inventory YAML files are only parsed when it is not.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import load_snapshot
+from keyinventory.graph import KeyGraph
+
+
+def print_blast_radius(radius: Dict[str, Any]):
+    """Print a blast radius report for the console."""
+    key = radius['key']
+    print(f"\nBlast radius of {key['key_id']} ({key.get('alias') or 'unknown alias'}):")
+    
+    affected_keys = radius['affected_keys']
+    print(f"\nAffected keys: {len(affected_keys)}")
+    for affected in affected_keys:
+        status = f", {affected['status']}" if affected.get('status') else ''
+        print(f"  {'  ' * (affected['depth'] - 1)}↳ {affected['key_id']} ({affected.get('alias') or 'missing'}"
+              f"{status}) depends on {affected['via']}")
+    
+    affected_services = radius['affected_services']
+    print(f"\nAffected services: {len(affected_services)}")
+    for service in affected_services:
+        print(f"  • {service['service']} (uses {', '.join(service['through'])})")
+    
+    if radius['related_keys']:
+        print(f"\nRelated keys to review: {len(radius['related_keys'])}")
+        for related in radius['related_keys']:
+            print(f"  • {related['key_id']} ({related.get('alias') or 'missing'})")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Query the key relationship graph')
+    parser.add_argument('--blast-radius', metavar='KEY_ID', action='append', default=[],
+                        help='Report the keys and services affected if KEY_ID is revoked; may be repeated')
+    parser.add_argument('--follow-related', action='store_true',
+                        help='Also follow related_keys links, not only depends_on')
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help='Follow dependencies at most this many levels (default: unlimited)')
+    parser.add_argument('--cycles', action='store_true',
+                        help='Report dependency cycles and references to undefined keys; exit 1 on cycles')
+    parser.add_argument('--inventory-dir', default='inventory',
+                        help='Inventory directory (default: inventory)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Also write the results as JSON to FILE')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON instead of text')
+    args = parser.parse_args()
+    
+    if not args.blast_radius and not args.cycles:
+        parser.error('nothing to do: give --blast-radius KEY_ID and/or --cycles')
+    
+    started = time.perf_counter()
+    graph = KeyGraph.from_snapshot(load_snapshot(args.inventory_dir))
+    loaded = time.perf_counter()
+    
+    results: Dict[str, Any] = {"graph": graph.statistics()}
+    exit_code = 0
+    
+    if args.blast_radius:
+        results["blast_radius"] = []
+        for key_id in args.blast_radius:
+            radius = graph.blast_radius(key_id, follow_related=args.follow_related, max_depth=args.max_depth)
+            if radius is None:
+                print(f"Error: key {key_id} is not in the inventory")
+                exit_code = 1
+                continue
+            results["blast_radius"].append(radius)
+    
+    if args.cycles:
+        results["cycles"] = graph.cycles()
+        results["missing_references"] = [{"key_id": key_id, "references": missing}
+                                         for key_id, missing in graph.missing_references()]
+        if results["cycles"]:
+            exit_code = 1
+    
+    queried = time.perf_counter()
+    
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(exit_code)
+    
+    stats = results["graph"]
+    print(f"Key graph: {stats['keys']} keys, {stats['dependencies']} dependencies, "
+          f"{stats['related_links']} related links, {stats['services']} services "
+          f"(loaded in {loaded - started:.2f}s, queried in {(queried - loaded) * 1000:.1f}ms)")
+    
+    for radius in results.get("blast_radius", []):
+        print_blast_radius(radius)
+    
+    if args.cycles:
+        # Each cycle is a group of keys that all depend on each other, directly or not
+        print(f"\nDependency cycles: {len(results['cycles'])}")
+        for cycle in results['cycles']:
+            print(f"  ❌ {', '.join(cycle)}" if len(cycle) > 1 else f"  ❌ {cycle[0]} depends on itself")
+        print(f"References to undefined keys: {len(results['missing_references'])}")
+        for missing in results['missing_references']:
+            print(f"  ⚠️ {missing['key_id']} references {missing['references']}")
+    
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Key Lookup Script
+Lists the keys a consuming service uses and the keys stored under a location
+prefix (e.g. hashicorp://payments-kv), for emergency response
+
+Lookups go to the key index database written by the build
+(docs/keys.index.db), one indexed query each, without parsing the
+inventory. When the database is missing or does not match the inventory,
+the inventory is indexed in memory first.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import InventorySnapshot, load_snapshot
+from keyinventory.index import DEFAULT_INDEX_FILE, LOCATION_SEPARATORS, InventoryLookup
+
+
+def location_parent(location: str) -> Optional[str]:
+    """The container of a location: everything before its last separator, never just the scheme."""
+    position = max(location.rfind(separator) for separator in LOCATION_SEPARATORS)
+    if position <= 0:
+        return None
+    parent = location[:position].rstrip(''.join(LOCATION_SEPARATORS))
+    scheme = location.find('://')
+    return parent if parent and len(parent) > scheme + 3 else None
+
+
+def expand_key(lookup: InventoryLookup, key_id: str, inventory_dir: str) -> Optional[Dict[str, Any]]:
+    """The services and location container of a key, or None if it is not in the index."""
+    definitions = lookup.by_key_id(key_id)
+    if not definitions:
+        return None
+    
+    snapshot = InventorySnapshot(inventory_dir)
+    services: List[str] = []
+    locations: List[str] = []
+    for definition in definitions:
+        # Only the files defining the key are parsed, for their used_by lists
+        data = snapshot.get(Path(inventory_dir) / definition['file'])
+        relationships = data.get('relationships') if isinstance(data, dict) else None
+        used_by = relationships.get('used_by') if isinstance(relationships, dict) else None
+        if isinstance(used_by, list):
+            services.extend(service for service in used_by if isinstance(service, str) and service not in services)
+        parent = location_parent(definition['location']) if definition.get('location') else None
+        if parent and parent not in locations:
+            locations.append(parent)
+    return {"definitions": definitions, "services": services, "locations": locations}
+
+
+def print_keys(title: str, keys: List[Dict[str, Any]]):
+    """Print one group of keys for the console."""
+    print(f"\n{title}: {len(keys)} keys")
+    for key in keys:
+        details = ', '.join(value for value in (key.get('environment'), key.get('status'), key.get('owner')) if value)
+        print(f"  • {key.get('key_id') or key['file']} ({key.get('alias') or 'no alias'}) {details}")
+        if key.get('location'):
+            print(f"      {key['location']}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='List the keys of consuming services and location prefixes')
+    parser.add_argument('--service', action='append', default=[],
+                        help='Consuming service (relationships.used_by) to list the keys of; may be repeated')
+    parser.add_argument('--location', action='append', default=[],
+                        help='Location prefix to list the keys under, e.g. hashicorp://payments-kv; may be repeated')
+    parser.add_argument('--key-id', action='append', default=[],
+                        help='Key whose consuming services and location container are looked up; may be repeated')
+    parser.add_argument('--list-services', action='store_true',
+                        help='List every consuming service and how many keys it uses')
+    parser.add_argument('--index-file', default=DEFAULT_INDEX_FILE,
+                        help=f'Key index database written by the build (default: {DEFAULT_INDEX_FILE})')
+    parser.add_argument('--inventory-dir', default='inventory',
+                        help='Inventory directory (default: inventory)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Also write the results as JSON to FILE')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON instead of text')
+    args = parser.parse_args()
+    
+    if not (args.service or args.location or args.key_id or args.list_services):
+        parser.error('nothing to look up: give --service, --location, --key-id or --list-services')
+    
+    started = time.perf_counter()
+    lookup = InventoryLookup.from_database(args.index_file, args.inventory_dir)
+    if lookup is None:
+        print(f"Note: {args.index_file} does not match the inventory, indexing the inventory instead")
+        lookup = InventoryLookup.from_snapshot(load_snapshot(args.inventory_dir))
+    opened = time.perf_counter()
+    
+    results: Dict[str, Any] = {"services": {}, "locations": {}}
+    services = list(args.service)
+    locations = list(args.location)
+    exit_code = 0
+    
+    if args.key_id:
+        results["keys"] = {}
+        for key_id in args.key_id:
+            expanded = expand_key(lookup, key_id, args.inventory_dir)
+            if expanded is None:
+                print(f"Error: key {key_id} is not in the inventory")
+                exit_code = 1
+                continue
+            results["keys"][key_id] = expanded
+            services.extend(service for service in expanded["services"] if service not in services)
+            locations.extend(location for location in expanded["locations"] if location not in locations)
+    
+    for service in services:
+        results["services"][service] = lookup.by_service(service)
+    for location in locations:
+        results["locations"][location] = lookup.by_location(location)
+    if args.list_services:
+        results["all_services"] = [{"service": service, "keys": count} for service, count in lookup.services()]
+    
+    queried = time.perf_counter()
+    lookup.close()
+    
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(exit_code)
+    
+    print(f"Looked up {len(services)} services and {len(locations)} locations in {(queried - opened) * 1000:.1f}ms "
+          f"(index opened in {(opened - started) * 1000:.0f}ms)")
+    
+    for key_id, expanded in results.get("keys", {}).items():
+        print(f"\nKey {key_id}: used by {', '.join(expanded['services']) or 'no services'}; "
+              f"stored under {', '.join(expanded['locations']) or 'unknown location'}")
+    for service, keys in results["services"].items():
+        print_keys(f"Service {service}", keys)
+    for location, keys in results["locations"].items():
+        print_keys(f"Location {location}", keys)
+    
+    if args.list_services:
+        print(f"\nConsuming services: {len(results['all_services'])}")
+        for entry in results["all_services"]:
+            print(f"  {entry['service']}: {entry['keys']} keys")
+    
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
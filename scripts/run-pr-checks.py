@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+PR Check Runner
+Runs key validation, duplicate checks and compliance checks in one process,
+sharing a single parsed inventory snapshot between them
+
+With --changed-since, the files to check are taken from git and only those
+files are parsed; duplicates are checked against the key index of the last
+main-branch build (docs/keys.index.db, or docs/keys.pack). Near-duplicate
+aliases, purposes and locations are reported as warnings only.
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import DEFAULT_PACK_FILE, InventorySnapshot, load_snapshot
+from keyinventory.changes import GitError, git_changes
+from keyinventory.index import DEFAULT_INDEX_FILE
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Checks run in order; each script exposes run(files, snapshot) -> exit code
+CHECKS = [
+    'validate-key-creation',
+    'check-duplicates',
+    'compliance-check',
+    'check-near-duplicates',
+]
+
+
+def load_script(name: str):
+    """Import a hyphenated script from the scripts directory as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Run the PR checks on new or changed key files')
+    parser.add_argument('files', nargs='*', help='Key files to check')
+    parser.add_argument('--changed-since', metavar='BASE',
+                        help='Check the inventory files changed since BASE (git diff BASE...HEAD)')
+    parser.add_argument('--pack-file', default=DEFAULT_PACK_FILE,
+                        help=f'Pack of the base inventory used with --changed-since (default: {DEFAULT_PACK_FILE})')
+    parser.add_argument('--index-file', default=DEFAULT_INDEX_FILE,
+                        help=f'Key index database of the base inventory used with --changed-since '
+                             f'(default: {DEFAULT_INDEX_FILE})')
+    args = parser.parse_args()
+    
+    if not args.files and not args.changed_since:
+        print("Usage: run-pr-checks.py <file1> [file2] ... | --changed-since <base>")
+        sys.exit(1)
+    
+    files = [f for f in args.files if f.strip()]
+    index = None
+    base_texts = None
+    
+    if args.changed_since:
+        try:
+            changes = git_changes(args.changed_since)
+        except GitError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        files = changes.changed
+    
+    if not files:
+        print("No files to check")
+        sys.exit(0)
+    
+    if args.changed_since:
+        index = load_script('check-duplicates').load_changed_index(changes, args.pack_file, args.index_file)
+        base_texts = load_script('check-near-duplicates').load_changed_texts(changes, args.index_file)
+    
+    # Only the checked files are parsed when the base index is available
+    snapshot = InventorySnapshot('inventory') if index else load_snapshot('inventory')
+    
+    failed = []
+    for name in CHECKS:
+        print(f"\n{'=' * 60}\n{name}\n{'=' * 60}")
+        module = load_script(name)
+        if name == 'check-duplicates':
+            exit_code = module.run(files, snapshot, index=index)
+        elif name == 'check-near-duplicates':
+            exit_code = module.run(files, snapshot, base=base_texts)
+        else:
+            exit_code = module.run(files, snapshot)
+        if exit_code != 0:
+            failed.append(name)
+    
+    print(f"\nPR Check Summary:")
+    print(f"Checks run: {len(CHECKS)}")
+    
+    if failed:
+        print(f"❌ Failed checks: {', '.join(failed)}")
+        sys.exit(1)
+    else:
+        print("✅ All checks passed!")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,16 @@ Sends notifications for key lifecycle events
 import os
 import sys
 import json
-import yaml
 import requests
 import argparse
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyinventory import safe_load
+
 
 class NotificationService:
     def __init__(self):
@@ -311,7 +314,7 @@ def load_key_from_file(key_id: str) -> Dict[str, Any]:
     
     try:
         with open(key_file, 'r') as f:
-            return yaml.safe_load(f) or {}
+            return safe_load(f) or {}
     except Exception as e:
         print(f"Warning: Could not load key file {key_file}: {e}")
         return {'key_id': key_id, 'alias': 'unknown'}